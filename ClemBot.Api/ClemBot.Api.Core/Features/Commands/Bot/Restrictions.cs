@@ -0,0 +1,62 @@
+using ClemBot.Api.Common;
+using ClemBot.Api.Data.Contexts;
+using ClemBot.Api.Services.Caching.Guilds.Models;
+using FluentValidation;
+using Microsoft.EntityFrameworkCore;
+
+namespace ClemBot.Api.Core.Features.Commands.Bot;
+
+public class Restrictions
+{
+    public class Validator : AbstractValidator<Query>
+    {
+        public Validator()
+        {
+            RuleFor(c => c.GuildId).NotNull();
+        }
+    }
+
+    public class CommandRestrictionDto : IResponseModel
+    {
+        public string CommandName { get; set; } = null!;
+
+        public ulong? ChannelId { get; set; }
+
+        public CommandRestrictionType RestrictionType { get; set; }
+
+        public bool? SilentlyFail { get; set; }
+    }
+
+    public class Query : IRequest<QueryResult<IEnumerable<CommandRestrictionDto>>>
+    {
+        public ulong GuildId { get; set; }
+    }
+
+    public record Handler(ClemBotContext _context, IMediator _mediator)
+        : IRequestHandler<Query, QueryResult<IEnumerable<CommandRestrictionDto>>>
+    {
+        public async Task<QueryResult<IEnumerable<CommandRestrictionDto>>> Handle(Query request,
+            CancellationToken cancellationToken)
+        {
+            if (!await _mediator.Send(new GuildExistsRequest { Id = request.GuildId }))
+            {
+                return QueryResult<IEnumerable<CommandRestrictionDto>>.NotFound();
+            }
+
+            // Every restriction of the guild at once, so the bot can work out the status of
+            // any command in any channel without asking for each of them
+            var restrictions = await _context.CommandRestrictions
+                .Where(c => c.GuildId == request.GuildId)
+                .Select(c => new CommandRestrictionDto
+                {
+                    CommandName = c.CommandName,
+                    ChannelId = c.ChannelId,
+                    RestrictionType = c.RestrictionType,
+                    SilentlyFail = c.SilentlyFail
+                })
+                .ToListAsync(cancellationToken);
+
+            return QueryResult<IEnumerable<CommandRestrictionDto>>.Success(restrictions);
+        }
+    }
+}
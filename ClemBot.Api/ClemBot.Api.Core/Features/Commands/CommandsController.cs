@@ -40,6 +40,16 @@ public class CommandsController : ControllerBase
             _ => throw new InvalidOperationException()
         };
 
+    [HttpGet("bot/[controller]/restrictions/{GuildId}")]
+    [BotMasterAuthorize]
+    public async Task<IActionResult> Restrictions([FromRoute] Restrictions.Query query) =>
+        await _mediator.Send(query) switch
+        {
+            { Status: QueryStatus.Success } result => Ok(result.Value),
+            { Status: QueryStatus.NotFound } => NotFound(),
+            _ => throw new InvalidOperationException()
+        };
+
     [HttpGet("bot/[controller]/details/{GuildId}/{CommandName}")]
     [BotMasterAuthorize]
     public async Task<IActionResult> Details([FromRoute] Details.Command command) =>
@@ -3,6 +3,7 @@ using ClemBot.Api.Data.Models;
 using ClemBot.Api.Services.Caching.Channels.Models;
 using ClemBot.Api.Services.Caching.Guilds.Models;
 using ClemBot.Api.Services.Caching.Users.Models;
+using Microsoft.EntityFrameworkCore;
 using NodaTime.Text;
 
 namespace ClemBot.Api.Core.Features.Messages.Bot;
@@ -36,8 +37,22 @@ public class Create
         {
             List<ulong> createdMessageIds = new();
 
+            // The bot sends a batch again when it didnt get a response, messages that were
+            // already created are skipped instead of failing the whole batch on their key
+            var ids = request.Messages.Select(m => m.Id).ToList();
+            var existingIds = (await _context.Messages
+                .Where(m => ids.Contains(m.Id))
+                .Select(m => m.Id)
+                .ToListAsync(cancellationToken))
+                .ToHashSet();
+
             foreach (var messageDto in request.Messages)
             {
+                if (!existingIds.Add(messageDto.Id))
+                {
+                    continue;
+                }
+
                 if (!await _mediator.Send(new UserExistsRequest { Id = messageDto.UserId }))
                 {
                     continue;
@@ -0,0 +1,72 @@
+using ClemBot.Api.Data.Contexts;
+using ClemBot.Api.Data.Models;
+using FluentValidation;
+using Microsoft.EntityFrameworkCore;
+
+namespace ClemBot.Api.Core.Features.Users.Bot;
+
+public class UpdateRolesBulk
+{
+    public class Validator : AbstractValidator<Command>
+    {
+        public Validator()
+        {
+            RuleFor(p => p.GuildId).NotNull();
+        }
+    }
+
+    public class UserRolesDto
+    {
+        public ulong Id { get; set; }
+
+        public List<ulong> Roles { get; set; } = new();
+    }
+
+    public record Command : IRequest<QueryResult<IEnumerable<ulong>>>
+    {
+        public ulong GuildId { get; init; }
+
+        public List<UserRolesDto> Users { get; init; } = new();
+    }
+
+    public record Handler(ClemBotContext _context) : IRequestHandler<Command, QueryResult<IEnumerable<ulong>>>
+    {
+        public async Task<QueryResult<IEnumerable<ulong>>> Handle(Command request, CancellationToken cancellationToken)
+        {
+            var requestedIds = request.Users
+                .Select(x => x.Id)
+                .ToList();
+
+            // Users that dont exist are skipped, the bot only tracks the roles of known users
+            var userIds = (await _context.Users
+                    .Where(x => requestedIds.Contains(x.Id))
+                    .Select(x => x.Id)
+                    .ToListAsync())
+                .ToHashSet();
+
+            var roleMappings = await _context.RoleUser
+                .Where(ru => userIds.Contains(ru.UserId) && ru.Role.GuildId == request.GuildId)
+                .ToListAsync();
+
+            foreach (var user in request.Users.Where(x => userIds.Contains(x.Id)))
+            {
+                var userMappings = roleMappings
+                    .Where(ru => ru.UserId == user.Id)
+                    .ToList();
+
+                var oldRoleMappings = userMappings.Where(ru => !user.Roles.Contains(ru.RoleId));
+
+                var newRoleMappings = user.Roles
+                    .Where(r => userMappings.All(ru => ru.RoleId != r))
+                    .Select(r => new RoleUser { RoleId = r, UserId = user.Id });
+
+                _context.RoleUser.RemoveRange(oldRoleMappings);
+                _context.RoleUser.AddRange(newRoleMappings);
+            }
+
+            await _context.SaveChangesAsync();
+
+            return QueryResult<IEnumerable<ulong>>.Success(userIds);
+        }
+    }
+}
@@ -108,6 +108,15 @@ public class UsersController : ControllerBase
             _ => throw new InvalidOperationException()
         };
 
+    [HttpPost("bot/[controller]/UpdateRolesBulk")]
+    [BotMasterAuthorize]
+    public async Task<IActionResult> UpdateRolesBulk(Bot.UpdateRolesBulk.Command command) =>
+        await _mediator.Send(command) switch
+        {
+            { Status: QueryStatus.Success } result => Ok(result.Value),
+            _ => throw new InvalidOperationException()
+        };
+
     [HttpGet("bot/[controller]/{UserId}/reminders")]
     [BotMasterAuthorize]
     public async Task<IActionResult> Reminders([FromRoute] Bot.Reminders.Query query) =>
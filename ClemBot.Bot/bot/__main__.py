@@ -1,7 +1,10 @@
 import asyncio
+import contextlib
 import logging
 import os
+import signal
 import sys
+import typing as t
 
 import discord
 
@@ -10,12 +13,16 @@ from bot.clem_bot import ClemBot
 from bot.consts import INVALID_PREFIXES
 from bot.custom_prefix import CustomPrefix
 from bot.messaging.messenger import Messenger
+from bot.sharding.ipc import IpcClient
+from bot.sharding.launcher import ClusterConfig, ShardLauncher
+from bot.utils.log_pipeline import LogPipeline, install_lazy_value_filter, parse_sample_rates
+from bot.utils.memory_profile import MEMORY_PROFILES, MemoryProfileName
 from bot.utils.scheduler import Scheduler
 
+bot_log = logging.getLogger()
 
-async def main() -> None:
-    bot_log = logging.getLogger()
 
+def load_secrets() -> None:
     try:
         bot_secrets.secrets.load_secrets("BotSecrets.json")
     except KeyError as e:
@@ -25,6 +32,30 @@ async def main() -> None:
         bot_log.fatal(e)
         sys.exit(0)
 
+
+@contextlib.contextmanager
+def log_pipeline() -> t.Iterator[None]:
+    """Moves logging to a background thread while open if the bot logs asynchronously"""
+    if not bot_secrets.secrets.log_async:
+        # Without the pipeline the handlers get the records as they were logged
+        install_lazy_value_filter(logging.getLogger().handlers)
+        yield
+        return
+
+    pipeline = LogPipeline(
+        queue_size=bot_secrets.secrets.log_queue_size,
+        sample_rates=parse_sample_rates(bot_secrets.secrets.log_sample_rates),
+        max_field_size=bot_secrets.secrets.log_max_field_size,
+    )
+    pipeline.start()
+    try:
+        yield
+    finally:
+        # Writes the records that are still queued before the process exits
+        pipeline.stop()
+
+
+async def run_bot(cluster: ClusterConfig | None = None) -> None:
     # get the default prefix for the bot instance
     prefix = bot_secrets.secrets.bot_prefix
     if prefix in INVALID_PREFIXES:
@@ -35,7 +66,12 @@ async def main() -> None:
     # this is so it can be reused later on
     # if we decide to add something not related to the bot
     # E.G a website frontend
-    messenger = Messenger(name="primary_bot_messenger")
+    messenger = Messenger(
+        name="primary_bot_messenger",
+        queue_workers=bot_secrets.secrets.messenger_queue_workers,
+        queue_idle_timeout=bot_secrets.secrets.messenger_queue_idle_timeout,
+        drain_timeout=bot_secrets.secrets.messenger_drain_timeout,
+    )
 
     # create the custom prefix handler class
     custom_prefix = CustomPrefix(default=prefix)
@@ -48,26 +84,81 @@ async def main() -> None:
     # Create the scheduler for injection into the bot instance
     scheduler = Scheduler()
 
+    # How much of the discord state is cached, the full profile caches every member
+    try:
+        memory_profile = MEMORY_PROFILES[MemoryProfileName(bot_secrets.secrets.memory_profile)]
+    except ValueError:
+        bot_log.fatal(f"Invalid memory profile {bot_secrets.secrets.memory_profile}")
+        sys.exit(0)
+
+    bot_log.info(f"Using the {memory_profile.name.value} memory profile")
+
     # set allowed mentions
     mentions = discord.AllowedMentions(everyone=False, roles=False)
 
+    # A cluster only connects the shards it owns, a single process lets discord.py
+    # connect as many shards as discord recommends unless a shard count is configured
+    shards: dict[str, t.Any] = {}
+    ipc = None
+    if cluster:
+        shards = {"shard_ids": cluster.shard_ids, "shard_count": cluster.shard_count}
+        ipc = IpcClient(cluster.ipc_path, cluster.cluster_id, cluster.cluster_count)
+    elif shard_count := bot_secrets.secrets.shard_count:
+        shards = {"shard_count": shard_count}
+
     bot_log.info("Creating Bot Client")
     client = ClemBot(
         messenger=messenger,
         scheduler=scheduler,
+        ipc=ipc,
+        **shards,
         command_prefix=custom_prefix.get_prefix,  # noqa: E126
         activity=discord.Game(name="https://clembot.io"),
         help_command=None,
         case_insensitive=True,
-        max_messages=50000,
         allowed_mentions=mentions,
         intents=intents,
+        **memory_profile.client_options(
+            intents, max_messages=bot_secrets.secrets.message_cache_size
+        ),
     )
 
+    # Close gracefully when the container is stopped so queued events are drained or persisted,
+    # signal handlers arent supported by the windows event loop
+    with contextlib.suppress(NotImplementedError):
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGTERM, lambda: asyncio.create_task(client.close())
+        )
+
     async with client:
         bot_log.info("Bot starting up")
         await client.start(bot_secrets.secrets.bot_token)
 
 
+def run_cluster(cluster: ClusterConfig) -> None:
+    """Entry point of a cluster process started by the shard launcher"""
+    load_secrets()
+    with log_pipeline():
+        asyncio.run(run_bot(cluster))
+
+
+def main() -> None:
+    load_secrets()
+
+    processes = bot_secrets.secrets.shard_processes
+    if processes <= 1:
+        with log_pipeline():
+            asyncio.run(run_bot())
+        return
+
+    # Without a shard count every cluster runs a single shard
+    shard_count = bot_secrets.secrets.shard_count or processes
+
+    bot_log.info(f"Launching {processes} clusters with {shard_count} shards")
+    launcher = ShardLauncher(processes, shard_count, run_cluster)
+    with log_pipeline():
+        asyncio.run(launcher.run())
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
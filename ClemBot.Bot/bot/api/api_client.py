@@ -1,4 +1,6 @@
 import asyncio
+import copy
+import dataclasses
 import json
 import typing as t
 from http import HTTPStatus
@@ -7,6 +9,8 @@ from urllib.parse import quote
 import aiohttp
 
 import bot.bot_secrets as bot_secrets
+from bot.api.bulk_payload import CsvJsonBody
+from bot.api.response_cache import ResponseCache
 from bot.consts import Urls
 from bot.errors import ApiClientRequestError, BotOnlyRequestError
 from bot.utils.logging_utils import get_logger
@@ -35,6 +39,36 @@ class HttpRequestType:
     patch = "PATCH"
 
 
+@dataclasses.dataclass
+class CoalescingMetrics:
+    """Counts of GET requests sent to the api vs GETs that joined an identical in flight request"""
+
+    issued: int = 0
+    coalesced: int = 0
+
+    @property
+    def coalesced_ratio(self) -> float:
+        total = self.issued + self.coalesced
+        return self.coalesced / total if total else 0.0
+
+
+@dataclasses.dataclass
+class PoolMetrics:
+    """Usage of the connection pool of the api session"""
+
+    limit: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+
+    # Requests that started while every connection in the pool was in use and had to wait
+    saturated: int = 0
+    timeouts: int = 0
+
+    @property
+    def saturation(self) -> float:
+        return self.in_flight / self.limit if self.limit else 0.0
+
+
 T_STATE_CHANGE_CB = t.Optional[t.Callable[[], t.Coroutine[t.Any, t.Any, None]]]
 
 
@@ -45,16 +79,30 @@ class ApiClient:
         connect_callback: T_STATE_CHANGE_CB = None,
         disconnect_callback: T_STATE_CHANGE_CB = None,
         bot_only: bool = False,
+        coalesce_gets: bool = False,
+        response_cache: ResponseCache | None = None,
     ):
         self.auth_token: str | None = None
         self.session: aiohttp.ClientSession | None = None
         self.connected: bool = False
         self.headers = dict[str, str]()
+        self.pool_metrics = PoolMetrics()
+
+        # Prefix of every request url, set once the api url is known on connect
+        self._base_url: str | None = None
 
         self._is_reconnecting: bool = False
 
         self.bot_only = bot_only
 
+        # When enabled concurrent GETs with the same url, params and body share a single request
+        self.coalesce_gets = coalesce_gets
+        self.coalescing_metrics = CoalescingMetrics()
+        self._in_flight_gets = dict[str, asyncio.Task[t.Any]]()
+
+        # Optional cache of GET responses, routes opt in by declaring cache policies
+        self.response_cache = response_cache
+
         # Create an empty async method so our callback doesnt throw when we await it
         async def async_stub() -> None:
             pass
@@ -65,12 +113,63 @@ class ApiClient:
         # Specify a callback to alert the creation context of disconnection events
         self.disconnect_callback = disconnect_callback or async_stub
 
-    @staticmethod
-    def _build_url(url: str) -> str:
-        url = f"{bot_secrets.secrets.api_url}{Urls.base_api_url}{quote(url)}"
+    def _build_url(self, url: str) -> str:
+        if self._base_url is None:
+            self._base_url = f"{bot_secrets.secrets.api_url}{Urls.base_api_url}"
+
+        url = f"{self._base_url}{quote(url)}"
         log.info("Building URL: {url}", url=url)
         return url
 
+    @staticmethod
+    def _pool_limit() -> int:
+        """Gets how many requests can be in flight before they wait for a connection"""
+        secrets = bot_secrets.secrets
+
+        # Every request goes to the api host, so the per host limit is the one that binds.
+        # aiohttp treats a limit of 0 as unlimited
+        limits = [n for n in (secrets.api_pool_size, secrets.api_pool_size_per_host) if n]
+        return min(limits, default=0)
+
+    @staticmethod
+    def _create_session() -> aiohttp.ClientSession:
+        secrets = bot_secrets.secrets
+
+        # Bound the amount of open sockets so a slow api cant pile up connections,
+        # requests past the limit wait for a free connection from the pool
+        connector = aiohttp.TCPConnector(
+            limit=secrets.api_pool_size,
+            limit_per_host=secrets.api_pool_size_per_host,
+            keepalive_timeout=secrets.api_keepalive_timeout,
+            ttl_dns_cache=secrets.api_dns_cache_ttl,
+            ssl=False,
+        )
+
+        # The total timeout includes the time spent waiting for a connection from the pool
+        timeout = aiohttp.ClientTimeout(
+            total=secrets.api_request_timeout, sock_connect=secrets.api_connect_timeout
+        )
+
+        log.info(
+            "Creating ClemBot.Api session with pool size {limit} and request timeout {timeout}",
+            limit=secrets.api_pool_size,
+            timeout=secrets.api_request_timeout,
+        )
+
+        return aiohttp.ClientSession(connector=connector, timeout=timeout, raise_for_status=False)
+
+    @staticmethod
+    def _streamed_timeout() -> aiohttp.ClientTimeout:
+        secrets = bot_secrets.secrets
+
+        # Streamed bulk uploads can take longer than any total timeout, they only time out
+        # waiting on a connection or when the api stops reading or responding
+        return aiohttp.ClientTimeout(
+            connect=secrets.api_request_timeout,
+            sock_connect=secrets.api_connect_timeout,
+            sock_read=secrets.api_request_timeout,
+        )
+
     async def close(self) -> None:
         """Close the aiohttp session."""
         assert self.session is not None
@@ -106,7 +205,8 @@ class ApiClient:
         # Check if we have an active session, this means we are trying to reconnect
         # if we are, do nothing
         if not self.session:
-            self.session = aiohttp.ClientSession(raise_for_status=False)
+            self.session = self._create_session()
+            self.pool_metrics.limit = self._pool_limit()
 
         # Loop infinitely checking the api every RECONNECT_TIMEOUT seconds
         # Once auth succeeds then we allow other requests
@@ -129,18 +229,14 @@ class ApiClient:
         await self._reconnect()
 
     async def _get_auth_token(self) -> str | None:
-        auth_args = {
-            "method": HttpRequestType.get,
-            "ssl": False,
-            "url": self._build_url("bot/authorize"),
-            "headers": {"Accept": "*/*"},
-            "params": {"key": bot_secrets.secrets.api_key},
-        }
-
         assert self.session is not None
 
         try:
-            async with self.session.request(**auth_args) as resp:  # type: ignore
+            async with self.session.get(
+                self._build_url("bot/authorize"),
+                headers={"Accept": "*/*"},
+                params={"key": bot_secrets.secrets.api_key},
+            ) as resp:
 
                 if resp.status == HTTPStatus.OK:
                     log.info("JWT Bearer token received")
@@ -152,6 +248,9 @@ class ApiClient:
         except aiohttp.ClientConnectorError:
             log.exception("Error: ClemBot.Api not found")
 
+        except asyncio.TimeoutError:
+            log.exception("Error: ClemBot.Api authorize request timed out")
+
         return None
 
     async def _authorize(self) -> bool:
@@ -179,6 +278,42 @@ class ApiClient:
         params: t.Any = None,
         body: t.Any = None,
     ) -> Result:
+        cache = self.response_cache
+
+        if cache is None:
+            return await self._send_request(http_type, endpoint, raise_on_error, params, body)
+
+        if http_type != HttpRequestType.get:
+            try:
+                return await self._send_request(http_type, endpoint, raise_on_error, params, body)
+            finally:
+                # Invalidate even if the request errored, we cant know if the mutation went through
+                cache.invalidate(endpoint)
+
+        if not (policy := cache.policy_for(endpoint)):
+            return await self._send_request(http_type, endpoint, raise_on_error, params, body)
+
+        hit, value = cache.get(endpoint, params, body)
+        if hit:
+            log.info("GET Request at endpoint {endpoint} served from cache", endpoint=endpoint)
+            return Result(HTTPStatus.OK, value)
+
+        generation = cache.generation(policy, endpoint)
+        resp = await self._send_request(http_type, endpoint, raise_on_error, params, body)
+
+        if resp.status == HTTPStatus.OK and resp.value is not None:
+            cache.set(policy, endpoint, params, body, resp.value, generation)
+
+        return resp
+
+    async def _send_request(
+        self,
+        http_type: str,
+        endpoint: str,
+        raise_on_error: bool,
+        params: t.Any,
+        body: t.Any,
+    ) -> Result:
 
         log.info(
             "HTTP {http_type} Request initializing to route: {endpoint}",
@@ -186,21 +321,51 @@ class ApiClient:
             endpoint=endpoint,
         )
 
-        req_args = {
-            "method": http_type,
-            "ssl": False,
-            "url": self._build_url(endpoint),
-            "raise_for_status": raise_on_error,
-            "headers": self.headers,
-            "params": params,
-        }
+        assert self.session is not None
+
+        metrics = self.pool_metrics
+        if metrics.limit and metrics.in_flight >= metrics.limit:
+            metrics.saturated += 1
+            log.warning(
+                "ClemBot.Api connection pool saturated with {in_flight} requests in flight",
+                in_flight=metrics.in_flight,
+            )
 
-        if body:
-            req_args["json"] = body
+        metrics.in_flight += 1
+        metrics.peak_in_flight = max(metrics.peak_in_flight, metrics.in_flight)
 
+        try:
+            return await self._send(http_type, endpoint, raise_on_error, params, body)
+        finally:
+            metrics.in_flight -= 1
+
+    async def _send(
+        self,
+        http_type: str,
+        endpoint: str,
+        raise_on_error: bool,
+        params: t.Any,
+        body: t.Any,
+    ) -> Result:
         assert self.session is not None
 
-        async with self.session.request(**req_args) as resp:
+        # Streamed bodies are sent chunk by chunk as they are generated
+        if isinstance(body, CsvJsonBody):
+            payload: dict[str, t.Any] = {
+                "data": body.chunks(),
+                "headers": {**self.headers, aiohttp.hdrs.CONTENT_TYPE: body.content_type},
+                "timeout": self._streamed_timeout(),
+            }
+        else:
+            payload = {"json": body or None, "headers": self.headers}
+
+        async with self.session.request(
+            http_type,
+            self._build_url(endpoint),
+            raise_for_status=raise_on_error,
+            params=params,
+            **payload,
+        ) as resp:
             if resp.status == HTTPStatus.OK:
                 data = await resp.json()
                 log.info(
@@ -263,6 +428,13 @@ class ApiClient:
             asyncio.create_task(self._disconnected())
             raise ConnectionError("Request to ClemBot.Api failed")
 
+        # The request took longer than the configured timeout, dont reconnect here
+        # a slow api is still connected, fail this request so its caller isnt stalled
+        except asyncio.TimeoutError:
+            self.pool_metrics.timeouts += 1
+            log.error("Request to ClemBot.Api endpoint {endpoint} timed out", endpoint=endpoint)
+            raise ApiClientRequestError(f"Request to ClemBot.Api endpoint {endpoint} timed out")
+
         # Check if the response returned an HTTP 401 Unauthorized or 403 Forbidden
         # with raise_for_status set to False We still need to handle that case
         # and put the client in reconnect mode
@@ -283,7 +455,34 @@ class ApiClient:
             for status codes above 400
         @return:
         """
-        return await self._request_or_reconnect(HttpRequestType.get, endpoint, **kwargs)
+        if not self.coalesce_gets:
+            return await self._request_or_reconnect(HttpRequestType.get, endpoint, **kwargs)
+
+        return await self._coalesced_get(endpoint, **kwargs)
+
+    async def _coalesced_get(self, endpoint: str, **kwargs: t.Any) -> t.Any:
+        key = json.dumps(
+            [endpoint, kwargs.get("params"), kwargs.get("data"), kwargs.get("raise_on_error")],
+            sort_keys=True,
+            default=str,
+        )
+
+        if task := self._in_flight_gets.get(key):
+            self.coalescing_metrics.coalesced += 1
+            log.info("Coalescing GET request to in flight route: {endpoint}", endpoint=endpoint)
+
+            # Shield the shared request so a cancelled waiter doesnt cancel it for everyone else
+            # and copy the response so waiters cant mutate each others data
+            return copy.deepcopy(await asyncio.shield(task))
+
+        self.coalescing_metrics.issued += 1
+        task = asyncio.create_task(
+            self._request_or_reconnect(HttpRequestType.get, endpoint, **kwargs)
+        )
+        self._in_flight_gets[key] = task
+        task.add_done_callback(lambda _: self._in_flight_gets.pop(key, None))
+
+        return await asyncio.shield(task)
 
     async def post(self, endpoint: str, **kwargs: t.Any) -> t.Any:
         """
@@ -1,8 +1,16 @@
 import abc
+import typing as t
 
 from bot.api.api_client import ApiClient
+from bot.api.response_cache import CachePolicy
 
 
 class BaseRoute(abc.ABC):
+    # Endpoints of this route whose GET responses can be served from the api clients response cache
+    cache_policies: t.ClassVar[tuple[CachePolicy, ...]] = ()
+
     def __init__(self, client: ApiClient):
         self._client: ApiClient = client
+
+        if client.response_cache is not None:
+            client.response_cache.register(*self.cache_policies)
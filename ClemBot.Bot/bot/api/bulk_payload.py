@@ -0,0 +1,78 @@
+"""
+Streams the csv bulk uploads of whole guilds to the api. Rows are generated and encoded
+a chunk at a time, so neither memory nor time spent blocking the loop grow with the guild
+"""
+
+import asyncio
+import csv
+import io
+import json
+import typing as t
+
+# Rows encoded between two chunks of the request body
+BULK_CHUNK_ROWS = 1000
+
+
+class CsvJsonBody:
+    """
+    Json object request body with a csv string field, the form the bulk routes of the api
+    take their rows in, e.g. {"GuildId": 1, "UserCsv": "UserId,Name\\n..."}
+
+    The csv is escaped straight into the json string chunk by chunk and sent with a chunked
+    transfer encoding, the body can only be sent once
+
+    Args:
+        fields (dict[str, Any]): The other fields of the object
+        csv_field (str): The name of the field that holds the csv
+        header (Sequence[str]): The column names of the csv
+        rows (Iterable[Sequence[Any]]): The rows of the csv, best generated lazily
+        chunk_rows (int): How many rows are encoded per chunk
+    """
+
+    content_type = "application/json"
+
+    def __init__(
+        self,
+        fields: dict[str, t.Any],
+        csv_field: str,
+        header: t.Sequence[str],
+        rows: t.Iterable[t.Sequence[t.Any]],
+        *,
+        chunk_rows: int = BULK_CHUNK_ROWS,
+    ) -> None:
+        self.fields = fields
+        self.csv_field = csv_field
+        self.header = header
+        self.rows = rows
+        self.chunk_rows = chunk_rows
+
+    def __repr__(self) -> str:
+        return f"<streamed {self.csv_field} of {self.fields}>"
+
+    async def chunks(self) -> t.AsyncIterator[bytes]:
+        # The csv field goes last, cut the empty string off so the csv can be written into it
+        prefix = json.dumps({**self.fields, self.csv_field: ""})
+        yield prefix[:-2].encode("utf-8")
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(self.header)
+
+        for i, row in enumerate(self.rows, 1):
+            writer.writerow(row)
+            if i % self.chunk_rows == 0:
+                yield self.__flush(buffer)
+
+                # Let the loop run other tasks between chunks of large guilds
+                await asyncio.sleep(0)
+
+        yield self.__flush(buffer)
+        yield b'"}'
+
+    @staticmethod
+    def __flush(buffer: io.StringIO) -> bytes:
+        # Escaping is per character, so chunks of the csv can be escaped on their own
+        chunk = json.dumps(buffer.getvalue())[1:-1]
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk.encode("utf-8")
@@ -2,7 +2,7 @@ import typing as t
 
 from bot.api.api_client import ApiClient
 from bot.api.base_route import BaseRoute
-from bot.models.command_models import CommandModel, CommandStatusModel
+from bot.models.command_models import CommandModel, CommandRestrictionModel, CommandStatusModel
 
 
 class CommandsRoute(BaseRoute):
@@ -35,6 +35,18 @@ class CommandsRoute(BaseRoute):
 
         return CommandStatusModel(**resp)
 
+    async def get_restrictions(
+        self, guild_id: int, **kwargs: t.Any
+    ) -> list[CommandRestrictionModel] | None:
+
+        resp = await self._client.get(f"bot/commands/restrictions/{guild_id}", **kwargs)
+
+        # A guild without restrictions is an empty list, None means the api doesnt know it
+        if resp is None:
+            return None
+
+        return [CommandRestrictionModel(**r) for r in resp]
+
     async def get_details(
         self, guild_id: int, command_name: str, **kwargs: t.Any
     ) -> CommandModel | None:
@@ -27,8 +27,10 @@ class DesignatedChannelRoute(BaseRoute):
 
         return t.cast(list[int], resp["mappings"])
 
-    async def get_guild_all_designated_channels(self, guild_id: int) -> dict[str, list[int]]:
-        resp = await self._client.get(f"bot/guilds/{guild_id}/designatedchannels")
+    async def get_guild_all_designated_channels(
+        self, guild_id: int, **kwargs: t.Any
+    ) -> dict[str, list[int]]:
+        resp = await self._client.get(f"bot/guilds/{guild_id}/designatedchannels", **kwargs)
 
         if not resp:
             return {}
@@ -4,6 +4,7 @@ import discord
 
 from bot.api.api_client import ApiClient
 from bot.api.base_route import BaseRoute
+from bot.api.response_cache import CachePolicy
 from bot.models.emote_board_models import (
     EmoteBoard,
     EmoteBoardPost,
@@ -22,6 +23,11 @@ log = get_logger(__name__)
 
 
 class EmoteBoardRoute(BaseRoute):
+    cache_policies = (
+        CachePolicy(r"bot/emoteboards/\d+(/[^/]+)?", ttl=300),
+        CachePolicy(r"bot/emoteboardposts/leaderboard/\d+/\w+", ttl=60),
+    )
+
     def __init__(self, client: ApiClient):
         super().__init__(client)
 
@@ -1,15 +1,22 @@
 import typing as t
 
 import discord
-import pandas as pd
 
 from bot.api.api_client import ApiClient
 from bot.api.base_route import BaseRoute
+from bot.api.bulk_payload import CsvJsonBody
+from bot.api.response_cache import CachePolicy
 from bot.consts import GuildSettings
 from bot.models.guild_models import Guild, SlotScore
+from bot.utils.memory_profile import ensure_chunked
 
 
 class GuildRoute(BaseRoute):
+    cache_policies = (
+        CachePolicy(r"bot/guilds", ttl=60),
+        CachePolicy(r"bot/guilds/\d+", ttl=300),
+    )
+
     def __init__(self, api_client: ApiClient):
         super().__init__(api_client)
 
@@ -57,67 +64,64 @@ class GuildRoute(BaseRoute):
         await self._client.patch("bot/guilds", data=json)
 
     async def update_guild_users(self, guild: discord.Guild) -> None:
-        users = [{"UserId": u.id, "Name": u.name} for u in guild.members]
-
-        df: pd.DataFrame = pd.DataFrame.from_records(users)
-
-        json = {"GuildId": guild.id, "UserCsv": df.to_csv(index=False)}
+        await ensure_chunked(guild)
+
+        # guild.members is a copy, so the rows are safe to generate while the cache changes
+        body = CsvJsonBody(
+            {"GuildId": guild.id},
+            "UserCsv",
+            ("UserId", "Name"),
+            ((u.id, u.name) for u in guild.members),
+        )
 
-        await self._client.patch("bot/guilds/update/users", data=json)
+        await self._client.patch("bot/guilds/update/users", data=body)
 
     async def update_guild_roles(self, guild: discord.Guild) -> None:
-        roles = [
-            {
-                "Id": r.id,
-                "Name": r.name,
-                "Admin": r.permissions.administrator,
-            }
-            for r in guild.roles
-        ]
-
-        df: pd.DataFrame = pd.DataFrame.from_records(roles)
-
-        json = {"GuildId": guild.id, "RoleCsv": df.to_csv(index=False)}
+        body = CsvJsonBody(
+            {"GuildId": guild.id},
+            "RoleCsv",
+            ("Id", "Name", "Admin"),
+            ((r.id, r.name, r.permissions.administrator) for r in guild.roles),
+        )
 
-        await self._client.patch("bot/guilds/update/roles", data=json)
+        await self._client.patch("bot/guilds/update/roles", data=body)
 
     async def update_guild_role_user_mappings(self, guild: discord.Guild) -> None:
+        await ensure_chunked(guild)
+
+        body = CsvJsonBody(
+            {"GuildId": guild.id},
+            "RoleMappingCsv",
+            ("RoleId", "UserId"),
+            # Walking the roles of every member once is cheaper than role.members, which
+            # walks every member once per role
+            ((role.id, user.id) for user in guild.members for role in user.roles),
+        )
 
-        mappings = []
-        for role in guild.roles:
-            for user in role.members:
-                mappings.append({"RoleId": role.id, "UserId": user.id})
-
-        df: pd.DataFrame = pd.DataFrame.from_records(mappings)
-
-        json = {"GuildId": guild.id, "RoleMappingCsv": df.to_csv(index=False)}
-
-        await self._client.patch("bot/guilds/update/RoleUserMappings", data=json)
+        await self._client.patch("bot/guilds/update/RoleUserMappings", data=body)
 
     async def update_guild_channels(self, guild: discord.Guild) -> None:
+        body = CsvJsonBody(
+            {"GuildId": guild.id},
+            "ChannelCsv",
+            ("ChannelId", "Name"),
+            ((c.id, c.name) for c in guild.channels),
+        )
 
-        channels = [{"ChannelId": c.id, "Name": c.name} for c in guild.channels]
-
-        df: pd.DataFrame = pd.DataFrame.from_records(channels)
-
-        json = {"GuildId": guild.id, "ChannelCsv": df.to_csv(index=False)}
-
-        await self._client.patch("bot/guilds/update/channels", data=json)
+        await self._client.patch("bot/guilds/update/channels", data=body)
 
     async def update_guild_threads(self, guild: discord.Guild) -> None:
+        body = CsvJsonBody(
+            {"GuildId": guild.id},
+            "ThreadCsv",
+            ("ThreadId", "Name", "ParentId"),
+            ((c.id, c.name, c.parent_id) for c in guild.threads),
+        )
 
-        threads = [
-            {"ThreadId": c.id, "Name": c.name, "ParentId": c.parent_id} for c in guild.threads
-        ]
-
-        df: pd.DataFrame = pd.DataFrame.from_records(threads)
-
-        json = {"GuildId": guild.id, "ThreadCsv": df.to_csv(index=False)}
-
-        await self._client.patch("bot/guilds/update/threads", data=json)
+        await self._client.patch("bot/guilds/update/threads", data=body)
 
-    async def get_can_embed_link(self, guild_id: int) -> t.Any:
+    async def get_can_embed_link(self, guild_id: int, **kwargs: t.Any) -> t.Any:
         resp = await self._client.get(
-            f"guildsettings/{guild_id}/{GuildSettings.allow_embed_links.name}"
+            f"guildsettings/{guild_id}/{GuildSettings.allow_embed_links.name}", **kwargs
         )
         return resp["value"]
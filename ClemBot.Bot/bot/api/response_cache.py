@@ -0,0 +1,219 @@
+import copy
+import dataclasses
+import json
+import re
+import typing as t
+
+from bot.utils.logging_utils import get_logger
+from bot.utils.ttl_cache import TTLCache
+
+log = get_logger(__name__)
+
+RESPONSE_CACHE_MAX_SIZE = 5000
+
+# Only used as the fallback of the underlying cache, every entry is stored with its policies ttl
+RESPONSE_CACHE_DEFAULT_TTL = 60
+
+ResponseCacheKey = tuple[str, str]
+
+# The entries of a policy that are invalidated together, policies with explicit
+# invalidation patterns are one scope, others have a scope per resource
+ResponseCacheScope = tuple["CachePolicy", tuple[str, ...] | None]
+
+
+@dataclasses.dataclass(frozen=True)
+class CachePolicy:
+    """
+    Declares that successful GET responses of endpoints matching a pattern can be cached
+
+    Args:
+        pattern (str): Regex that has to fully match the endpoint of a GET request, case insensitive
+        ttl (float): How long a cached response is served for in seconds
+        invalidated_by (tuple[str, ...] | None): Regexes of endpoints that invalidate cached
+            responses of this policy when a mutating request is sent to them. If None, any mutating
+            request to the same resource (the first two segments of the endpoint) invalidates them
+    """
+
+    pattern: str
+    ttl: float
+    invalidated_by: tuple[str, ...] | None = None
+
+    def matches(self, endpoint: str) -> bool:
+        return re.fullmatch(self.pattern, endpoint, re.IGNORECASE) is not None
+
+    def is_invalidated_by(self, cached_endpoint: str, mutated_endpoint: str) -> bool:
+        return self.scope(cached_endpoint) == self.invalidated_scope(mutated_endpoint)
+
+    def scope(self, endpoint: str) -> ResponseCacheScope:
+        return self, (_resource(endpoint) if self.invalidated_by is None else None)
+
+    def invalidated_scope(self, mutated_endpoint: str) -> ResponseCacheScope | None:
+        """
+        Gets the scope of this policy that a mutating request to an endpoint invalidates, if any
+        """
+        if self.invalidated_by is None:
+            return self, _resource(mutated_endpoint)
+
+        if any(re.fullmatch(p, mutated_endpoint, re.IGNORECASE) for p in self.invalidated_by):
+            return self, None
+
+        return None
+
+
+def _resource(endpoint: str) -> tuple[str, ...]:
+    return tuple(endpoint.lower().split("/")[:2])
+
+
+@dataclasses.dataclass
+class ResponseCacheMetrics:
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ResponseCache:
+    """
+    Size bounded, least recently used cache of api GET responses
+
+    Only endpoints that match a registered CachePolicy are cached, routes declare their
+    policies so each route decides how stale its data is allowed to be
+    """
+
+    def __init__(self, *, max_size: int = RESPONSE_CACHE_MAX_SIZE) -> None:
+        self.metrics = ResponseCacheMetrics()
+        self._policies = list[CachePolicy]()
+
+        # Maps (endpoint, request data) to (scope, response)
+        self._entries = TTLCache[ResponseCacheKey, tuple[ResponseCacheScope, t.Any]](
+            ttl=RESPONSE_CACHE_DEFAULT_TTL, max_size=max_size, on_evict=self._unindex
+        )
+
+        # The keys of the cached entries by scope, so an invalidation only visits
+        # the entries it drops
+        self._scopes = dict[ResponseCacheScope, set[ResponseCacheKey]]()
+
+        # Bumped on every invalidation so that a GET that started before a mutating
+        # request doesnt store the response from before the mutation. Every scope
+        # keeps the value of its last invalidation, clear() invalidates all of them
+        self._counter = 0
+        self._generations = dict[ResponseCacheScope, int]()
+        self._cleared = 0
+
+    def register(self, *policies: CachePolicy) -> None:
+        for policy in policies:
+            if policy not in self._policies:
+                self._policies.append(policy)
+
+    def policy_for(self, endpoint: str) -> CachePolicy | None:
+        return next((p for p in self._policies if p.matches(endpoint)), None)
+
+    def generation(self, policy: CachePolicy, endpoint: str) -> int:
+        """
+        Gets the generation of the cached responses of an endpoint, pass it to set()
+        to drop the response if the endpoint is invalidated while it is requested
+
+        Args:
+            policy (CachePolicy): The policy of the endpoint
+            endpoint (str): The endpoint of the request
+        """
+        return max(self._generations.get(policy.scope(endpoint), 0), self._cleared)
+
+    def get(self, endpoint: str, params: t.Any, body: t.Any) -> tuple[bool, t.Any]:
+        """
+        Looks up a cached GET response, returns a tuple of (hit, response)
+
+        Args:
+            endpoint (str): The endpoint of the request
+            params (Any): The query params of the request
+            body (Any): The json body of the request
+        """
+        entry = self._entries.get(self._key(endpoint, params, body))
+
+        if entry is None:
+            self.metrics.misses += 1
+            return False, None
+
+        self.metrics.hits += 1
+
+        # Copy the response so callers cant mutate the cached value
+        return True, copy.deepcopy(entry[1])
+
+    def set(
+        self,
+        policy: CachePolicy,
+        endpoint: str,
+        params: t.Any,
+        body: t.Any,
+        response: t.Any,
+        generation: int,
+    ) -> None:
+        if generation != self.generation(policy, endpoint):
+            return
+
+        key = self._key(endpoint, params, body)
+        scope = policy.scope(endpoint)
+
+        # Setting a key again may move it to another scope if the policies changed
+        if (entry := self._entries.get_stale(key)) is not None:
+            self._unindex(key, entry)
+
+        self._scopes.setdefault(scope, set()).add(key)
+        self._entries.set(key, (scope, copy.deepcopy(response)), ttl=policy.ttl)
+
+    def invalidate(self, mutated_endpoint: str) -> None:
+        """
+        Drops every cached response whose policy is invalidated by a mutating request to an endpoint
+
+        Args:
+            mutated_endpoint (str): The endpoint of the POST, PUT, PATCH or DELETE request
+        """
+        scopes = [s for p in self._policies if (s := p.invalidated_scope(mutated_endpoint))]
+        if not scopes:
+            return
+
+        self._counter += 1
+        keys = list[ResponseCacheKey]()
+        for scope in scopes:
+            self._generations[scope] = self._counter
+            keys.extend(self._scopes.pop(scope, ()))
+
+        if not keys:
+            return
+
+        log.info(
+            "Invalidating {count} cached responses after request to {endpoint}",
+            count=len(keys),
+            endpoint=mutated_endpoint,
+        )
+
+        self.metrics.invalidations += len(keys)
+        for key in keys:
+            self._entries.invalidate(key)
+
+    def clear(self) -> None:
+        self._counter += 1
+        self._cleared = self._counter
+        self._generations.clear()
+        self._scopes.clear()
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _unindex(self, key: ResponseCacheKey, entry: tuple[ResponseCacheScope, t.Any]) -> None:
+        keys = self._scopes.get(entry[0])
+        if keys is None:
+            return
+
+        keys.discard(key)
+        if not keys:
+            del self._scopes[entry[0]]
+
+    @staticmethod
+    def _key(endpoint: str, params: t.Any, body: t.Any) -> ResponseCacheKey:
+        return endpoint, json.dumps([params, body], sort_keys=True, default=str)
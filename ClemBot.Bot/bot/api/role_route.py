@@ -2,10 +2,19 @@ import typing as t
 
 from bot.api.api_client import ApiClient
 from bot.api.base_route import BaseRoute
+from bot.api.response_cache import CachePolicy
 from bot.models.role_models import Role, RoleFull
 
 
 class RoleRoute(BaseRoute):
+    cache_policies = (
+        CachePolicy(r"bot/roles/\d+", ttl=60),
+        # The guild role list lives under the guilds resource but changes with every role write
+        CachePolicy(
+            r"bot/guilds/\d+/roles", ttl=60, invalidated_by=(r"bot/roles.*", r"bot/guilds.*")
+        ),
+    )
+
     def __init__(self, api_client: ApiClient):
         super().__init__(api_client)
 
@@ -3,9 +3,17 @@ import typing as t
 import bot.models.tag_models as models
 from bot.api.api_client import ApiClient
 from bot.api.base_route import BaseRoute
+from bot.api.response_cache import CachePolicy
 
 
 class TagRoute(BaseRoute):
+    # Tag invokes are left out of the invalidation on purpose, otherwise every use of a tag
+    # would drop it from the cache. Use counts can lag behind by up to the ttl because of that
+    cache_policies = (
+        CachePolicy(r"bot/tags", ttl=30, invalidated_by=(r"tags", r"bot/tags")),
+        CachePolicy(r"guilds/\d+/tags", ttl=30, invalidated_by=(r"tags", r"bot/tags")),
+    )
+
     def __init__(self, api_client: ApiClient):
         super().__init__(api_client)
 
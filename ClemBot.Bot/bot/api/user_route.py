@@ -95,6 +95,27 @@ class UserRoute(BaseRoute):
 
         await self._client.post(f"bot/users/{user_id}/updateroles", data=json, **kwargs)
 
+    async def update_roles_bulk(
+        self, guild_id: int, user_roles: dict[int, list[int]], **kwargs: t.Any
+    ) -> list[int]:
+        """
+        Sets the roles of many users in a guild at once, users the api doesnt know are skipped
+
+        Returns:
+            list[int]: The ids of the users whose roles were updated
+        """
+        json = {
+            "GuildId": guild_id,
+            "Users": [{"Id": user_id, "Roles": roles} for user_id, roles in user_roles.items()],
+        }
+
+        resp = await self._client.post("bot/users/UpdateRolesBulk", data=json, **kwargs)
+
+        if not resp:
+            return []
+
+        return t.cast(list[int], resp)
+
     async def get_reminders(self, user_id: int, **kwargs: t.Any) -> list[Reminder]:
         resp = await self._client.get(f"bot/users/{user_id}/reminders", **kwargs)
 
@@ -7,6 +7,28 @@ from bot.utils.logging_utils import get_logger
 
 log = get_logger(__name__)
 
+DEFAULT_API_POOL_SIZE = 100
+DEFAULT_API_POOL_SIZE_PER_HOST = 50
+DEFAULT_API_KEEPALIVE_TIMEOUT = 30.0
+DEFAULT_API_DNS_CACHE_TTL = 300
+DEFAULT_API_CONNECT_TIMEOUT = 10.0
+DEFAULT_API_REQUEST_TIMEOUT = 30.0
+DEFAULT_DATA_DIR = "data"
+DEFAULT_MESSENGER_QUEUE_WORKERS = 8
+DEFAULT_MESSENGER_QUEUE_IDLE_TIMEOUT = 300.0
+DEFAULT_MESSENGER_DRAIN_TIMEOUT = 20.0
+DEFAULT_MESSAGE_BATCH_SIZE = 20
+DEFAULT_MESSAGE_BATCH_MAX_AGE = 10.0
+DEFAULT_SHARD_PROCESSES = 1
+DEFAULT_MEMORY_PROFILE = "full"
+DEFAULT_LOG_QUEUE_SIZE = 10_000
+DEFAULT_LOG_MAX_FIELD_SIZE = 4096
+DEFAULT_STARTUP_SYNC_CONCURRENCY = 4
+DEFAULT_COMMAND_STATUS_MAX_AGE = 600.0
+
+# Default of _load_secret for required keys, None is the default of optional keys
+_REQUIRED = object()
+
 
 class BotSecrets:
     def __init__(self) -> None:
@@ -24,6 +46,29 @@ class BotSecrets:
         self._site_url: str | None = None
         self._docs_url: str | None = None
         self._allow_bot_input_ids: list[int] | None = None
+        self._api_pool_size: int | None = None
+        self._api_pool_size_per_host: int | None = None
+        self._api_keepalive_timeout: float | None = None
+        self._api_dns_cache_ttl: int | None = None
+        self._api_connect_timeout: float | None = None
+        self._api_request_timeout: float | None = None
+        self._data_dir: str | None = None
+        self._messenger_queue_workers: int | None = None
+        self._messenger_queue_idle_timeout: float | None = None
+        self._messenger_drain_timeout: float | None = None
+        self._message_batch_size: int | None = None
+        self._message_batch_max_age: float | None = None
+        self._metrics_port: int | None = None
+        self._shard_processes: int | None = None
+        self._shard_count: int | None = None
+        self._memory_profile: str | None = None
+        self._message_cache_size: int | None = None
+        self._log_async: bool | None = None
+        self._log_queue_size: int | None = None
+        self._log_sample_rates: list[str] | None = None
+        self._log_max_field_size: int | None = None
+        self._startup_sync_concurrency: int | None = None
+        self._command_status_max_age: float | None = None
 
     @property
     def client_token(self) -> str:
@@ -197,6 +242,276 @@ class BotSecrets:
             raise ConfigAccessError("allow_bot_input_ids has already been initialized")
         self._allow_bot_input_ids = value
 
+    @property
+    def api_pool_size(self) -> int:
+        if self._api_pool_size is None:
+            return DEFAULT_API_POOL_SIZE
+        return self._api_pool_size
+
+    @api_pool_size.setter
+    def api_pool_size(self, value: int | None) -> None:
+        if self._api_pool_size is not None:
+            raise ConfigAccessError("api_pool_size has already been initialized")
+        self._api_pool_size = value
+
+    @property
+    def api_pool_size_per_host(self) -> int:
+        if self._api_pool_size_per_host is None:
+            return DEFAULT_API_POOL_SIZE_PER_HOST
+        return self._api_pool_size_per_host
+
+    @api_pool_size_per_host.setter
+    def api_pool_size_per_host(self, value: int | None) -> None:
+        if self._api_pool_size_per_host is not None:
+            raise ConfigAccessError("api_pool_size_per_host has already been initialized")
+        self._api_pool_size_per_host = value
+
+    @property
+    def api_keepalive_timeout(self) -> float:
+        if self._api_keepalive_timeout is None:
+            return DEFAULT_API_KEEPALIVE_TIMEOUT
+        return self._api_keepalive_timeout
+
+    @api_keepalive_timeout.setter
+    def api_keepalive_timeout(self, value: float | None) -> None:
+        if self._api_keepalive_timeout is not None:
+            raise ConfigAccessError("api_keepalive_timeout has already been initialized")
+        self._api_keepalive_timeout = value
+
+    @property
+    def api_dns_cache_ttl(self) -> int:
+        if self._api_dns_cache_ttl is None:
+            return DEFAULT_API_DNS_CACHE_TTL
+        return self._api_dns_cache_ttl
+
+    @api_dns_cache_ttl.setter
+    def api_dns_cache_ttl(self, value: int | None) -> None:
+        if self._api_dns_cache_ttl is not None:
+            raise ConfigAccessError("api_dns_cache_ttl has already been initialized")
+        self._api_dns_cache_ttl = value
+
+    @property
+    def api_connect_timeout(self) -> float:
+        if self._api_connect_timeout is None:
+            return DEFAULT_API_CONNECT_TIMEOUT
+        return self._api_connect_timeout
+
+    @api_connect_timeout.setter
+    def api_connect_timeout(self, value: float | None) -> None:
+        if self._api_connect_timeout is not None:
+            raise ConfigAccessError("api_connect_timeout has already been initialized")
+        self._api_connect_timeout = value
+
+    @property
+    def api_request_timeout(self) -> float:
+        if self._api_request_timeout is None:
+            return DEFAULT_API_REQUEST_TIMEOUT
+        return self._api_request_timeout
+
+    @api_request_timeout.setter
+    def api_request_timeout(self, value: float | None) -> None:
+        if self._api_request_timeout is not None:
+            raise ConfigAccessError("api_request_timeout has already been initialized")
+        self._api_request_timeout = value
+
+    @property
+    def data_dir(self) -> str:
+        if not self._data_dir:
+            return DEFAULT_DATA_DIR
+        return self._data_dir
+
+    @data_dir.setter
+    def data_dir(self, value: str | None) -> None:
+        if self._data_dir:
+            raise ConfigAccessError("data_dir has already been initialized")
+        self._data_dir = value
+
+    @property
+    def messenger_queue_workers(self) -> int:
+        if self._messenger_queue_workers is None:
+            return DEFAULT_MESSENGER_QUEUE_WORKERS
+        return self._messenger_queue_workers
+
+    @messenger_queue_workers.setter
+    def messenger_queue_workers(self, value: int | None) -> None:
+        if self._messenger_queue_workers is not None:
+            raise ConfigAccessError("messenger_queue_workers has already been initialized")
+        self._messenger_queue_workers = value
+
+    @property
+    def messenger_queue_idle_timeout(self) -> float:
+        if self._messenger_queue_idle_timeout is None:
+            return DEFAULT_MESSENGER_QUEUE_IDLE_TIMEOUT
+        return self._messenger_queue_idle_timeout
+
+    @messenger_queue_idle_timeout.setter
+    def messenger_queue_idle_timeout(self, value: float | None) -> None:
+        if self._messenger_queue_idle_timeout is not None:
+            raise ConfigAccessError("messenger_queue_idle_timeout has already been initialized")
+        self._messenger_queue_idle_timeout = value
+
+    @property
+    def messenger_drain_timeout(self) -> float:
+        if self._messenger_drain_timeout is None:
+            return DEFAULT_MESSENGER_DRAIN_TIMEOUT
+        return self._messenger_drain_timeout
+
+    @messenger_drain_timeout.setter
+    def messenger_drain_timeout(self, value: float | None) -> None:
+        if self._messenger_drain_timeout is not None:
+            raise ConfigAccessError("messenger_drain_timeout has already been initialized")
+        self._messenger_drain_timeout = value
+
+    @property
+    def message_batch_size(self) -> int:
+        if self._message_batch_size is None:
+            return DEFAULT_MESSAGE_BATCH_SIZE
+        return self._message_batch_size
+
+    @message_batch_size.setter
+    def message_batch_size(self, value: int | None) -> None:
+        if self._message_batch_size is not None:
+            raise ConfigAccessError("message_batch_size has already been initialized")
+        self._message_batch_size = value
+
+    @property
+    def message_batch_max_age(self) -> float:
+        if self._message_batch_max_age is None:
+            return DEFAULT_MESSAGE_BATCH_MAX_AGE
+        return self._message_batch_max_age
+
+    @message_batch_max_age.setter
+    def message_batch_max_age(self, value: float | None) -> None:
+        if self._message_batch_max_age is not None:
+            raise ConfigAccessError("message_batch_max_age has already been initialized")
+        self._message_batch_max_age = value
+
+    @property
+    def metrics_port(self) -> int | None:
+        return self._metrics_port
+
+    @metrics_port.setter
+    def metrics_port(self, value: int | None) -> None:
+        if self._metrics_port is not None:
+            raise ConfigAccessError("metrics_port has already been initialized")
+        self._metrics_port = value
+
+    @property
+    def shard_processes(self) -> int:
+        if self._shard_processes is None:
+            return DEFAULT_SHARD_PROCESSES
+        return self._shard_processes
+
+    @shard_processes.setter
+    def shard_processes(self, value: int | None) -> None:
+        if self._shard_processes is not None:
+            raise ConfigAccessError("shard_processes has already been initialized")
+        self._shard_processes = value
+
+    @property
+    def shard_count(self) -> int | None:
+        return self._shard_count
+
+    @shard_count.setter
+    def shard_count(self, value: int | None) -> None:
+        if self._shard_count is not None:
+            raise ConfigAccessError("shard_count has already been initialized")
+        self._shard_count = value
+
+    @property
+    def memory_profile(self) -> str:
+        if not self._memory_profile:
+            return DEFAULT_MEMORY_PROFILE
+        return self._memory_profile
+
+    @memory_profile.setter
+    def memory_profile(self, value: str | None) -> None:
+        if self._memory_profile:
+            raise ConfigAccessError("memory_profile has already been initialized")
+        self._memory_profile = value
+
+    @property
+    def message_cache_size(self) -> int | None:
+        return self._message_cache_size
+
+    @message_cache_size.setter
+    def message_cache_size(self, value: int | None) -> None:
+        if self._message_cache_size is not None:
+            raise ConfigAccessError("message_cache_size has already been initialized")
+        self._message_cache_size = value
+
+    @property
+    def log_async(self) -> bool:
+        if not self._log_async:
+            return False
+        return self._log_async
+
+    @log_async.setter
+    def log_async(self, value: bool) -> None:
+        if self._log_async is not None:
+            raise ConfigAccessError("log_async has already been initialized")
+        self._log_async = value
+
+    @property
+    def log_queue_size(self) -> int:
+        if self._log_queue_size is None:
+            return DEFAULT_LOG_QUEUE_SIZE
+        return self._log_queue_size
+
+    @log_queue_size.setter
+    def log_queue_size(self, value: int | None) -> None:
+        if self._log_queue_size is not None:
+            raise ConfigAccessError("log_queue_size has already been initialized")
+        self._log_queue_size = value
+
+    @property
+    def log_sample_rates(self) -> list[str]:
+        if not self._log_sample_rates:
+            return []
+        return self._log_sample_rates
+
+    @log_sample_rates.setter
+    def log_sample_rates(self, value: list[str] | None) -> None:
+        if self._log_sample_rates:
+            raise ConfigAccessError("log_sample_rates has already been initialized")
+        self._log_sample_rates = value
+
+    @property
+    def log_max_field_size(self) -> int:
+        if self._log_max_field_size is None:
+            return DEFAULT_LOG_MAX_FIELD_SIZE
+        return self._log_max_field_size
+
+    @log_max_field_size.setter
+    def log_max_field_size(self, value: int | None) -> None:
+        if self._log_max_field_size is not None:
+            raise ConfigAccessError("log_max_field_size has already been initialized")
+        self._log_max_field_size = value
+
+    @property
+    def startup_sync_concurrency(self) -> int:
+        if self._startup_sync_concurrency is None:
+            return DEFAULT_STARTUP_SYNC_CONCURRENCY
+        return self._startup_sync_concurrency
+
+    @startup_sync_concurrency.setter
+    def startup_sync_concurrency(self, value: int | None) -> None:
+        if self._startup_sync_concurrency is not None:
+            raise ConfigAccessError("startup_sync_concurrency has already been initialized")
+        self._startup_sync_concurrency = value
+
+    @property
+    def command_status_max_age(self) -> float:
+        if self._command_status_max_age is None:
+            return DEFAULT_COMMAND_STATUS_MAX_AGE
+        return self._command_status_max_age
+
+    @command_status_max_age.setter
+    def command_status_max_age(self, value: float | None) -> None:
+        if self._command_status_max_age is not None:
+            raise ConfigAccessError("command_status_max_age has already been initialized")
+        self._command_status_max_age = value
+
     def _convert_value(self, value: str, type_hint: type) -> Any:
         """Convert a string value from environment variable to the appropriate type."""
 
@@ -207,6 +522,8 @@ class BotSecrets:
                     return bool(val)
                 case t if t is int:
                     return int(val)
+                case t if t is float:
+                    return float(val)
                 case _:
                     return val
 
@@ -225,7 +542,7 @@ class BotSecrets:
         key: str,
         json_data: dict[str, Any] | None,
         type_hint: type = str,
-        default: Any = None,
+        default: Any = _REQUIRED,
     ) -> Any:
         """
         Load a secret from environment variable first, then fall back to JSON file, then default.
@@ -234,7 +551,7 @@ class BotSecrets:
             key: The configuration key name
             json_data: Merged JSON configuration data
             type_hint: The expected type (e.g., str, int, bool, list[int])
-            default: Default value if not found in env or json
+            default: Default value if not found in env or json, raises if not given
         """
         # Try environment variable first
         env_value = os.environ.get(key)
@@ -250,7 +567,7 @@ class BotSecrets:
             return value
 
         # Use default if available
-        if default is not None:
+        if default is not _REQUIRED:
             log.info(f"{key}: loaded from default")
             return default
 
@@ -299,6 +616,70 @@ class BotSecrets:
         self.site_url = self._load_secret("SITE_URL", json_data, str)
         self.docs_url = self._load_secret("DOCS_URL", json_data, str)
         self.allow_bot_input_ids = self._load_secret("ALLOW_BOT_INPUT_IDS", json_data, list[int])
+        self.api_pool_size = self._load_secret(
+            "API_POOL_SIZE", json_data, int, default=DEFAULT_API_POOL_SIZE
+        )
+        self.api_pool_size_per_host = self._load_secret(
+            "API_POOL_SIZE_PER_HOST", json_data, int, default=DEFAULT_API_POOL_SIZE_PER_HOST
+        )
+        self.api_keepalive_timeout = self._load_secret(
+            "API_KEEPALIVE_TIMEOUT", json_data, float, default=DEFAULT_API_KEEPALIVE_TIMEOUT
+        )
+        self.api_dns_cache_ttl = self._load_secret(
+            "API_DNS_CACHE_TTL", json_data, int, default=DEFAULT_API_DNS_CACHE_TTL
+        )
+        self.api_connect_timeout = self._load_secret(
+            "API_CONNECT_TIMEOUT", json_data, float, default=DEFAULT_API_CONNECT_TIMEOUT
+        )
+        self.api_request_timeout = self._load_secret(
+            "API_REQUEST_TIMEOUT", json_data, float, default=DEFAULT_API_REQUEST_TIMEOUT
+        )
+        self.data_dir = self._load_secret("DATA_DIR", json_data, str, default=DEFAULT_DATA_DIR)
+        self.messenger_queue_workers = self._load_secret(
+            "MESSENGER_QUEUE_WORKERS", json_data, int, default=DEFAULT_MESSENGER_QUEUE_WORKERS
+        )
+        self.messenger_queue_idle_timeout = self._load_secret(
+            "MESSENGER_QUEUE_IDLE_TIMEOUT",
+            json_data,
+            float,
+            default=DEFAULT_MESSENGER_QUEUE_IDLE_TIMEOUT,
+        )
+        self.messenger_drain_timeout = self._load_secret(
+            "MESSENGER_DRAIN_TIMEOUT", json_data, float, default=DEFAULT_MESSENGER_DRAIN_TIMEOUT
+        )
+        self.message_batch_size = self._load_secret(
+            "MESSAGE_BATCH_SIZE", json_data, int, default=DEFAULT_MESSAGE_BATCH_SIZE
+        )
+        self.message_batch_max_age = self._load_secret(
+            "MESSAGE_BATCH_MAX_AGE", json_data, float, default=DEFAULT_MESSAGE_BATCH_MAX_AGE
+        )
+        self.metrics_port = self._load_secret("METRICS_PORT", json_data, int, default=None)
+        self.shard_processes = self._load_secret(
+            "SHARD_PROCESSES", json_data, int, default=DEFAULT_SHARD_PROCESSES
+        )
+        self.shard_count = self._load_secret("SHARD_COUNT", json_data, int, default=None)
+        self.memory_profile = self._load_secret(
+            "MEMORY_PROFILE", json_data, str, default=DEFAULT_MEMORY_PROFILE
+        )
+        self.message_cache_size = self._load_secret(
+            "MESSAGE_CACHE_SIZE", json_data, int, default=None
+        )
+        self.log_async = self._load_secret("LOG_ASYNC", json_data, bool, default=False)
+        self.log_queue_size = self._load_secret(
+            "LOG_QUEUE_SIZE", json_data, int, default=DEFAULT_LOG_QUEUE_SIZE
+        )
+        self.log_sample_rates = self._load_secret(
+            "LOG_SAMPLE_RATES", json_data, list[str], default=[]
+        )
+        self.log_max_field_size = self._load_secret(
+            "LOG_MAX_FIELD_SIZE", json_data, int, default=DEFAULT_LOG_MAX_FIELD_SIZE
+        )
+        self.startup_sync_concurrency = self._load_secret(
+            "STARTUP_SYNC_CONCURRENCY", json_data, int, default=DEFAULT_STARTUP_SYNC_CONCURRENCY
+        )
+        self.command_status_max_age = self._load_secret(
+            "COMMAND_STATUS_MAX_AGE", json_data, float, default=DEFAULT_COMMAND_STATUS_MAX_AGE
+        )
 
         log.info("All bot secrets loaded successfully")
 
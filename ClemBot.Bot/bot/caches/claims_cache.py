@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+import typing as t
+
+import discord
+
+from bot.consts import Claims
+from bot.utils.logging_utils import get_logger
+from bot.utils.ttl_cache import TTLCache
+
+if t.TYPE_CHECKING:
+    from bot.clem_bot import ClemBot
+
+log = get_logger(__name__)
+
+CLAIMS_TTL = 60
+CLAIMS_MAX_SIZE = 10000
+
+ClaimsKey = tuple[int, int]
+
+
+class ClaimsCache:
+    """
+    In memory cache of the claims of a user in a guild, keyed by (guild id, user id)
+
+    A single command invocation can check a users claims multiple times, this makes sure that
+    only the first check hits the api. Concurrent lookups of the same user share one request
+    """
+
+    def __init__(
+        self,
+        bot: ClemBot,
+        *,
+        ttl: float = CLAIMS_TTL,
+        max_size: int = CLAIMS_MAX_SIZE,
+    ) -> None:
+        self.bot = bot
+        self._claims = TTLCache[ClaimsKey, list[Claims]](ttl=ttl, max_size=max_size)
+
+        # In flight requests, so that concurrent lookups for the same key share one request
+        self._loads = dict[ClaimsKey, asyncio.Task[list[Claims]]]()
+
+        # Bumped on every invalidation so that a request that started before a
+        # claims change doesnt overwrite the cache with outdated claims
+        self._generation = 0
+
+    async def get(self, member: discord.Member) -> list[Claims]:
+        """
+        Gets the claims of a given member in their guild
+
+        Args:
+            member (discord.Member): The member to get the claims of
+        """
+        key = (member.guild.id, member.id)
+
+        if (claims := self._claims.get(key)) is not None:
+            return claims
+
+        if (task := self._loads.get(key)) is None:
+            task = asyncio.create_task(self._load(key, member))
+            self._loads[key] = task
+            task.add_done_callback(lambda _: self._remove_load(key, task))
+
+        return await task
+
+    async def has_claim(self, claim: Claims, member: discord.Member) -> bool:
+        return claim in await self.get(member)
+
+    def invalidate(self, guild_id: int, user_id: int) -> None:
+        """
+        Drops the cached claims of a single user in a guild, used when that users roles change
+        """
+        self._generation += 1
+        self._claims.invalidate((guild_id, user_id))
+        self._loads.pop((guild_id, user_id), None)
+
+    def invalidate_guild(self, guild_id: int) -> None:
+        """
+        Drops the cached claims of every user in a guild, used when the claims of a role change
+        """
+        log.info("Invalidating cached claims for guild {guild}", guild=guild_id)
+        self._generation += 1
+        self._claims.invalidate_where(lambda k: k[0] == guild_id)
+
+        for key in [k for k in self._loads if k[0] == guild_id]:
+            del self._loads[key]
+
+    def _remove_load(self, key: ClaimsKey, task: asyncio.Task[list[Claims]]) -> None:
+        if self._loads.get(key) is task:
+            del self._loads[key]
+
+    async def _load(self, key: ClaimsKey, member: discord.Member) -> list[Claims]:
+        generation = self._generation
+
+        claims = await self.bot.claim_route.get_claims_user(member)
+
+        if generation == self._generation:
+            self._claims.set(key, claims)
+
+        return claims
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import asyncio
+import typing as t
+
+import bot.bot_secrets as bot_secrets
+from bot.models.command_models import (
+    CommandRestrictionModel,
+    CommandRestrictionType,
+    CommandStatusModel,
+)
+from bot.utils.logging_utils import get_logger
+from bot.utils.ttl_cache import TTLCache
+
+if t.TYPE_CHECKING:
+    from bot.clem_bot import ClemBot
+
+log = get_logger(__name__)
+
+COMMAND_STATUS_MAX_GUILDS = 10000
+
+# The restrictions of a guild by command name
+GuildRestrictions = dict[str, list[CommandRestrictionModel]]
+
+
+def command_status(
+    restrictions: t.Iterable[CommandRestrictionModel], channel_id: int
+) -> CommandStatusModel:
+    """
+    Works out the status of a command in a channel from the commands restrictions, the same
+    way the api does for a single channel
+
+    Args:
+        restrictions (Iterable[CommandRestrictionModel]): The restrictions of the command
+        channel_id (int): The channel the command was invoked in
+    """
+    restrictions = list(restrictions)
+
+    # A channel that is white listed is always allowed
+    if any(
+        r.channel_id == channel_id and r.restriction_type == CommandRestrictionType.white_list
+        for r in restrictions
+    ):
+        return CommandStatusModel(disabled=False, silently_fail=None)
+
+    for r in restrictions:
+        # Disabled server wide or in the channel
+        if r.channel_id is None or r.channel_id == channel_id:
+            return CommandStatusModel(disabled=True, silently_fail=r.silently_fail)
+
+    return CommandStatusModel(disabled=False, silently_fail=False)
+
+
+class CommandStatusIndex:
+    """
+    In memory index of the command restrictions of every guild
+
+    The restrictions of a guild are loaded at once the first time a command is checked in it,
+    every later check in that guild is answered from memory. Enabling or disabling a command
+    through the bot writes the change through to the index, guilds older than max_age are
+    loaded again to pick up changes made outside the bot
+    """
+
+    def __init__(
+        self,
+        bot: ClemBot,
+        *,
+        max_age: float | None = None,
+        max_size: int = COMMAND_STATUS_MAX_GUILDS,
+    ) -> None:
+        self.bot = bot
+        self._guilds = TTLCache[int, GuildRestrictions](
+            ttl=max_age or bot_secrets.secrets.command_status_max_age, max_size=max_size
+        )
+
+        # In flight loads, so that concurrent checks in the same guild share one request
+        self._loads = dict[int, asyncio.Task[GuildRestrictions | None]]()
+
+        # Bumped on every restriction change so that a request that started before the
+        # change doesnt overwrite the index with outdated restrictions
+        self._generation = 0
+
+    async def get_status(
+        self, guild_id: int, channel_id: int, command_name: str
+    ) -> CommandStatusModel | None:
+        """
+        Gets the restriction status of a command in a given channel
+
+        Args:
+            guild_id (int): The guild the command was invoked in
+            channel_id (int): The channel the command was invoked in
+            command_name (str): The qualified name of the command
+        """
+        if (restrictions := self._guilds.get(guild_id)) is None:
+            restrictions = await self._get_load(guild_id)
+
+        if restrictions is None:
+            return None
+
+        return command_status(restrictions.get(command_name, ()), channel_id)
+
+    def command_enabled(self, guild_id: int, command_name: str, channel_id: int | None) -> None:
+        """
+        Writes an enabled command through to the index, the same way the api changes the
+        restrictions of the command
+
+        Args:
+            guild_id (int): The guild the command was enabled in
+            command_name (str): The qualified name of the command
+            channel_id (int | None): The channel the command was enabled in, None for every channel
+        """
+        if (restrictions := self.__changed(guild_id, command_name)) is None:
+            return
+
+        if channel_id is None:
+            restrictions.clear()
+        elif any(r.channel_id is None for r in restrictions):
+            # Disabled server wide, the channel is white listed instead
+            restrictions.append(
+                CommandRestrictionModel(
+                    command_name=command_name,
+                    channel_id=channel_id,
+                    restriction_type=CommandRestrictionType.white_list,
+                    silently_fail=None,
+                )
+            )
+        else:
+            restrictions[:] = [r for r in restrictions if r.channel_id != channel_id]
+
+    def command_disabled(
+        self, guild_id: int, command_name: str, channel_id: int | None, silent: bool
+    ) -> None:
+        """
+        Writes a disabled command through to the index, the same way the api changes the
+        restrictions of the command
+
+        Args:
+            guild_id (int): The guild the command was disabled in
+            command_name (str): The qualified name of the command
+            channel_id (int | None): The channel the command was disabled in, None for every channel
+            silent (bool): Whether the command fails without telling the user
+        """
+        if (restrictions := self.__changed(guild_id, command_name)) is None:
+            return
+
+        black_list = CommandRestrictionModel(
+            command_name=command_name,
+            channel_id=channel_id,
+            restriction_type=CommandRestrictionType.black_list,
+            silently_fail=silent,
+        )
+
+        if channel_id is None:
+            # A server wide restriction replaces the ones of single channels
+            restrictions[:] = [black_list]
+            return
+
+        white_listed = [
+            r
+            for r in restrictions
+            if r.channel_id == channel_id
+            and r.restriction_type == CommandRestrictionType.white_list
+        ]
+        if white_listed:
+            # Back to being disabled by the server wide restriction
+            restrictions[:] = [r for r in restrictions if r not in white_listed]
+        elif not any(r.channel_id is None or r.channel_id == channel_id for r in restrictions):
+            restrictions.append(black_list)
+
+    def __changed(self, guild_id: int, command_name: str) -> list[CommandRestrictionModel] | None:
+        log.info(
+            "Updating indexed restrictions of command {command} in guild {guild}",
+            command=command_name,
+            guild=guild_id,
+        )
+        self._generation += 1
+        self._loads.pop(guild_id, None)
+
+        if (guild := self._guilds.get(guild_id)) is None:
+            return None
+
+        return guild.setdefault(command_name, [])
+
+    def _get_load(self, guild_id: int) -> asyncio.Task[GuildRestrictions | None]:
+        if (task := self._loads.get(guild_id)) is None:
+            task = asyncio.create_task(self._load(guild_id))
+            self._loads[guild_id] = task
+            task.add_done_callback(lambda _: self._remove_load(guild_id, task))
+
+        return task
+
+    def _remove_load(self, guild_id: int, task: asyncio.Task[GuildRestrictions | None]) -> None:
+        if self._loads.get(guild_id) is task:
+            del self._loads[guild_id]
+
+    async def _load(self, guild_id: int) -> GuildRestrictions | None:
+        generation = self._generation
+
+        restrictions = await self.bot.commands_route.get_restrictions(guild_id)
+        if restrictions is None:
+            return None
+
+        guild = GuildRestrictions()
+        for r in restrictions:
+            guild.setdefault(r.command_name, []).append(r)
+
+        if generation == self._generation:
+            self._guilds.set(guild_id, guild)
+
+        return guild
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import typing as t
+
+import discord
+
+from bot.messaging.events import Events
+from bot.utils.logging_utils import get_logger
+from bot.utils.ttl_cache import TTLCache
+
+if t.TYPE_CHECKING:
+    from bot.clem_bot import ClemBot
+
+log = get_logger(__name__)
+
+GUILD_SETTINGS_TTL = 300
+GUILD_SETTINGS_MAX_SIZE = 10000
+
+
+@dataclasses.dataclass(frozen=True)
+class GuildSettingsSnapshot:
+    """A point in time copy of the per guild settings that are needed on the message hot path"""
+
+    designated_channels: dict[str, list[int]]
+    prefixes: list[str]
+    tag_prefixes: list[str]
+    allow_embed_links: bool
+
+    def designated_channel_ids(self, designation: str) -> list[int]:
+        return self.designated_channels.get(designation, [])
+
+
+class GuildSettingsCache:
+    """
+    In memory cache of guild settings snapshots so that we dont have to hit the api
+    for every message to check things like prefixes or designated channels
+
+    Snapshots are loaded lazily the first time a guild is requested, once a snapshot
+    is older than the ttl it is still served while a refresh runs in the background.
+    If the refresh fails the last known snapshot continues to be served
+    """
+
+    def __init__(
+        self,
+        bot: ClemBot,
+        *,
+        ttl: float = GUILD_SETTINGS_TTL,
+        max_size: int = GUILD_SETTINGS_MAX_SIZE,
+    ) -> None:
+        self.bot = bot
+        self._snapshots = TTLCache[int, GuildSettingsSnapshot](ttl=ttl, max_size=max_size)
+
+        # In flight loads, this makes sure only one request per guild is sent at a time
+        self._loads = dict[int, asyncio.Task[GuildSettingsSnapshot]]()
+
+        # Bumped on every invalidation so that a load that started before a
+        # settings change doesnt overwrite the cache with outdated values
+        self._generations = dict[int, int]()
+
+        bot.messenger.subscribe(Events.on_set_custom_prefix, self.on_set_custom_prefix)
+        bot.messenger.subscribe(Events.on_set_custom_tag_prefix, self.on_set_custom_tag_prefix)
+        bot.messenger.subscribe(
+            Events.on_designated_channels_update, self.on_designated_channels_update
+        )
+        bot.messenger.subscribe(Events.on_guild_leave, self.on_guild_leave)
+
+    async def get(self, guild_id: int) -> GuildSettingsSnapshot:
+        """
+        Gets the settings snapshot of a given guild, raises if the guild has never been
+        loaded and loading it from the api fails
+
+        Args:
+            guild_id (int): The id of the guild to get the settings of
+        """
+        if (snapshot := self._snapshots.get(guild_id)) is not None:
+            return snapshot
+
+        if (stale := self._snapshots.get_stale(guild_id)) is not None:
+            # Refresh in the background so the caller doesnt wait on the api
+            self._begin_load(guild_id).add_done_callback(self._on_background_load_done)
+            return stale
+
+        return await self._begin_load(guild_id)
+
+    async def designated_channel_ids(self, guild_id: int, designation: str) -> list[int]:
+        """
+        Gets the channels of a designation in a given guild, if the settings cant be
+        loaded the guild is treated as having no channels so publishing doesnt fail
+
+        Args:
+            guild_id (int): The id of the guild to get the channels of
+            designation (str): The name of the designated channel
+        """
+        try:
+            settings = await self.get(guild_id)
+        except Exception:
+            log.exception(
+                "Loading designated channels of guild {guild} failed, assuming none",
+                guild=guild_id,
+            )
+            return []
+
+        return settings.designated_channel_ids(designation)
+
+    def invalidate(self, guild_id: int) -> None:
+        log.info("Invalidating guild settings snapshot for guild {guild}", guild=guild_id)
+        self._snapshots.invalidate(guild_id)
+        self._generations[guild_id] = self._generations.get(guild_id, 0) + 1
+        self._loads.pop(guild_id, None)
+
+    async def on_set_custom_prefix(self, guild: discord.Guild, prefix: str) -> None:
+        self.invalidate(guild.id)
+
+    async def on_set_custom_tag_prefix(self, guild: discord.Guild, tag_prefix: str) -> None:
+        self.invalidate(guild.id)
+
+    async def on_designated_channels_update(self, guild: discord.Guild) -> None:
+        self.invalidate(guild.id)
+
+    async def on_guild_leave(self, guild: discord.Guild) -> None:
+        self.invalidate(guild.id)
+
+    def _begin_load(self, guild_id: int) -> asyncio.Task[GuildSettingsSnapshot]:
+        if (task := self._loads.get(guild_id)) is not None:
+            return task
+
+        task = asyncio.create_task(self._load(guild_id))
+        self._loads[guild_id] = task
+        task.add_done_callback(lambda _: self._remove_load(guild_id, task))
+        return task
+
+    def _remove_load(self, guild_id: int, task: asyncio.Task[GuildSettingsSnapshot]) -> None:
+        if self._loads.get(guild_id) is task:
+            del self._loads[guild_id]
+
+    async def _load(self, guild_id: int) -> GuildSettingsSnapshot:
+        log.info("Loading guild settings snapshot for guild {guild}", guild=guild_id)
+        generation = self._generations.get(guild_id, 0)
+
+        designated_channels, prefixes, tag_prefixes, allow_embed_links = await asyncio.gather(
+            self.bot.designated_channel_route.get_guild_all_designated_channels(
+                guild_id, raise_on_error=True
+            ),
+            self.bot.custom_prefix_route.get_custom_prefixes(guild_id, raise_on_error=True),
+            self.bot.custom_tag_prefix_route.get_custom_tag_prefixes(guild_id, raise_on_error=True),
+            self.bot.guild_route.get_can_embed_link(guild_id, raise_on_error=True),
+        )
+
+        snapshot = GuildSettingsSnapshot(
+            designated_channels=designated_channels,
+            prefixes=prefixes,
+            tag_prefixes=tag_prefixes,
+            allow_embed_links=bool(allow_embed_links),
+        )
+
+        if generation == self._generations.get(guild_id, 0):
+            self._snapshots.set(guild_id, snapshot)
+
+        return snapshot
+
+    @staticmethod
+    def _on_background_load_done(task: asyncio.Task[GuildSettingsSnapshot]) -> None:
+        if task.cancelled():
+            return
+
+        if e := task.exception():
+            log.error("Background guild settings refresh failed with error: {error}", error=e)
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import datetime
+import functools
 import importlib
 import logging
 import pkgutil
+import time
 import traceback
 import typing as t
+from pathlib import Path
 from types import ModuleType
 
 import discord
@@ -39,12 +42,21 @@ from bot.api import (
     welcome_message_route,
 )
 from bot.api.api_client import ApiClient
+from bot.api.response_cache import ResponseCache
+from bot.caches.claims_cache import ClaimsCache
+from bot.caches.command_status_index import CommandStatusIndex
+from bot.caches.guild_settings_cache import GuildSettingsCache
 from bot.consts import Colors
 from bot.errors import BotOnlyRequestError, SilentCommandRestrictionError
+from bot.messaging.event_metrics import render_prometheus
+from bot.messaging.event_store import QUEUED_EVENTS_FILE, QueuedEventStore
 from bot.messaging.events import Events
 from bot.messaging.messenger import Messenger
+from bot.sharding.ipc import IpcClient
 from bot.utils.logging_utils import get_logger
+from bot.utils.metrics_server import MetricsServer
 from bot.utils.scheduler import Scheduler
+from bot.utils.task_graph import DependencyFailedError, run_task_graph
 
 log = get_logger(__name__)
 
@@ -54,21 +66,37 @@ if t.TYPE_CHECKING:
     from bot.services.fuzzy_matching_service import FuzzyMatchingService
 
 
-class ClemBot(commands.Bot):
+class ClemBot(commands.AutoShardedBot):
     """
     This is the base level bot class for ClemBot.
 
     This handles the sending of all api events
     as well as the dynamic loading of services and cogs
+
+    When the bot runs as multiple processes every process is a cluster that owns
+    the shards given in shard_ids, clusters coordinate through the ipc client
     """
 
     # Override the parent user type here which is optional, we know that user won't be null
     user: discord.ClientUser
 
-    def __init__(self, messenger: Messenger, scheduler: Scheduler, **kwargs: t.Any) -> None:
+    def __init__(
+        self,
+        messenger: Messenger,
+        scheduler: Scheduler,
+        ipc: IpcClient | None = None,
+        **kwargs: t.Any,
+    ) -> None:
         # this super call is to pass the prefix up to the super class
         super().__init__(**kwargs)
 
+        self.ipc = ipc
+
+        # Clusters each get their own data dir so they dont write to the same files
+        self.data_dir = Path(bot_secrets.secrets.data_dir)
+        if ipc:
+            self.data_dir /= f"cluster-{ipc.cluster_id}"
+
         # Set the error callback in the messenger for queued events
         messenger.error_callback = self.global_error_handler
 
@@ -77,6 +105,8 @@ class ClemBot(commands.Bot):
             connect_callback=self.on_backend_connect,
             disconnect_callback=self.on_backend_disconnect,
             bot_only=bot_secrets.secrets.bot_only,
+            coalesce_gets=True,
+            response_cache=ResponseCache(),
         )
 
         # Bool to indicate if the bot is still in its startup procedure, if it is then
@@ -84,6 +114,9 @@ class ClemBot(commands.Bot):
         self.is_starting_up = True
 
         self.messenger: Messenger = messenger
+
+        # Events left in the guild queues when closing are kept here and replayed on startup
+        messenger.event_store = QueuedEventStore(self.data_dir / QUEUED_EVENTS_FILE, self)
         self.scheduler: Scheduler = scheduler
 
         # Register our before and after invoke hooks
@@ -112,8 +145,30 @@ class ClemBot(commands.Bot):
         self.reminder_route = reminder_route.ReminderRoute(self.api_client)
         self.emote_board_route = emote_board_route.EmoteBoardRoute(self.api_client)
 
+        # Per guild settings that are read on the message hot path, cached to avoid api round trips
+        self.guild_settings = GuildSettingsCache(self)
+
+        # Per user claims, cached so that a single command invocation only checks the api once
+        self.claims_cache = ClaimsCache(self)
+
+        # Command restriction statuses, indexed so the pre invoke check doesn't wait on the api
+        self.command_status_index = CommandStatusIndex(self)
+
         self.active_services: dict[str, base_service.BaseService] = {}
 
+        # Seconds every service took to load, in the order they finished
+        self.service_load_times = dict[str, float]()
+        self.services_load_time: float | None = None
+
+        self.metrics_server: MetricsServer | None = None
+        if port := bot_secrets.secrets.metrics_port:
+            # Every cluster serves its own metrics on the port after the one of the cluster before
+            port += self.cluster_id
+            self.metrics_server = MetricsServer(port, lambda: render_prometheus(self.messenger))
+
+        if ipc:
+            ipc.handle("cluster_stats", self.get_cluster_stats)
+
     async def setup_hook(self) -> None:
         """
         This is the entry point of the bot that is run after discord.py has finished its startup procedures.
@@ -122,6 +177,12 @@ class ClemBot(commands.Bot):
 
         await self.load_cogs()
 
+        if self.ipc:
+            await self.ipc.connect()
+
+        if self.metrics_server:
+            await self.metrics_server.start()
+
         # Connect to the api Before the services are loaded, so they can begin their startup routines
         # this will block until the api is connected to, only THEN will we run our service startups
         # until this is connected no commands will be processed because there is no message_handling_service
@@ -137,15 +198,36 @@ class ClemBot(commands.Bot):
         # So that we can be sure that we correctly iterate over known guilds
         await self.load_services()
 
+        # The services are listening again, queue what was left when the bot last closed
+        await self.messenger.replay_persisted()
+
         embed = discord.Embed(
             title="Bot Started Up  :white_check_mark:", color=Colors.ClemsonOrange
         )
         embed.description = datetime.datetime.now().strftime("%m/%d/%Y, %H:%M")
         embed.set_author(name=f"{self.user.name}", icon_url=self.user.display_avatar.url)
 
+        if self.service_load_times and self.services_load_time is not None:
+            embed.add_field(
+                name=f"Services loaded in {self.services_load_time:.2f}s",
+                value=self.service_load_report(),
+            )
+
         await self.send_startup_log_embed(embed)
 
+    def service_load_report(self, top: int = 10) -> str:
+        """
+        Lists the services that took the longest to load
+
+        Args:
+            top (int): How many services to list
+        """
+        slowest = sorted(self.service_load_times.items(), key=lambda s: s[1], reverse=True)
+        return "\n".join(f"{name}: {seconds:.2f}s" for name, seconds in slowest[:top])
+
     async def on_backend_connect(self) -> None:
+        await self.messenger.publish(Events.on_backend_connect)
+
         embed = discord.Embed(
             title="Bot Connected to ClemBot.Api  :rocket:", color=Colors.ClemsonOrange
         )
@@ -177,10 +259,50 @@ class ClemBot(commands.Bot):
 
         log.info("Shutdown started: logging close time")
 
+        # Drain the queues first so the services still handle and flush the drained events
         await self.messenger.close()
+
+        for name, service in self.active_services.items():
+            try:
+                await service.close()
+            except Exception as e:
+                log.error(f"Closing service {name} failed with error {e}")
+
+        if self.metrics_server:
+            await self.metrics_server.close()
+
+        if self.ipc:
+            await self.ipc.close()
+
         await super().close()
 
+    @property
+    def cluster_id(self) -> int:
+        return self.ipc.cluster_id if self.ipc else 0
+
+    @property
+    def is_primary_cluster(self) -> bool:
+        """
+        Whether this process does the work that only one cluster may do, like
+        scheduling the reminders of every cluster
+        """
+        return self.cluster_id == 0
+
+    async def get_cluster_stats(self, _: t.Any = None) -> dict[str, t.Any]:
+        """Gets the stats of this cluster that owner commands combine across clusters"""
+        return {
+            "shards": sorted(self.shards),
+            "guilds": len(self.guilds),
+            "users": sum(len(g.members) for g in self.guilds),
+            "latency_ms": round(self.latency * 1000, 1),
+            "queued_events": sum(q.qsize() for q in self.messenger.guild_queues.values()),
+        }
+
     async def send_startup_log_embed(self, embed: discord.Embed) -> None:
+        # Every cluster sends its own embeds, say which one it was
+        if self.ipc:
+            embed.set_footer(text=f"Cluster {self.cluster_id}, shards {sorted(self.shards)}")
+
         for channel_id in bot_secrets.secrets.startup_log_channel_ids:
             channel = await self.fetch_channel(channel_id)
 
@@ -219,8 +341,8 @@ class ClemBot(commands.Bot):
             # command requires no claims nothing else to do
             return True
 
-        # Hit the db to get a users current claims
-        claims = await self.claim_route.get_claims_user(author)
+        # Get a users current claims, this only hits the db if they aren't cached
+        claims = await self.claims_cache.get(author)
 
         if claims and command.claims_check(claims):
             # Author has valid claims
@@ -377,7 +499,7 @@ class ClemBot(commands.Bot):
     """
 
     async def publish_to_queue_with_error(
-        self, event: str, guild_id: int, *args: t.Any, **kwargs: dict[str, t.Any]
+        self, event: str, guild_id: int, *args: t.Any, **kwargs: t.Any
     ) -> None:
         try:
             if not self.is_starting_up:
@@ -549,22 +671,48 @@ class ClemBot(commands.Bot):
     parent type.
     """
 
-    async def activate_service(self, service: t.Any) -> None:
-        log.info("Loading service: {service}", service=service.__module__)
+    async def activate_service(self, name: str) -> None:
+        service = self.active_services[name]
+        log.info("Loading service: {service}", service=type(service).__module__)
 
-        s = service(bot=self)
+        start = time.perf_counter()
         try:
-            await s.load_service()
+            await service.load_service()
         except Exception as e:
             await self.global_error_handler(e)
-        self.active_services[service.__name__] = s
+
+            # Raised again so the services that depend on this one are skipped, the other
+            # services still load
+            raise
+        finally:
+            self.service_load_times[name] = time.perf_counter() - start
 
     async def load_services(self) -> None:
         log.info("Loading Services")
+
+        # Create every service before any of them loads so that they are all subscribed
+        # to their events by the time the first service finishes its startup
         for m in ClemBot.walk_modules("services", services):
             for s in ClemBot.walk_types(m, services.base_service.BaseService):
                 if s is not services.base_service.BaseService:
-                    await self.activate_service(s)
+                    self.active_services[s.__name__] = s(bot=self)
+
+        start = time.perf_counter()
+        errors = await run_task_graph(
+            {name: functools.partial(self.activate_service, name) for name in self.active_services},
+            {name: s.depends_on for name, s in self.active_services.items()},
+        )
+
+        for name, error in errors.items():
+            if isinstance(error, DependencyFailedError):
+                log.error("Skipped loading service {service}: {error}", service=name, error=error)
+
+        self.services_load_time = time.perf_counter() - start
+        log.info(
+            "Loaded {count} services in {seconds:.2f} seconds",
+            count=len(self.active_services),
+            seconds=self.services_load_time,
+        )
 
     async def load_cogs(self) -> None:
         log.info("Loading Cogs")
@@ -597,4 +745,4 @@ class ClemBot(commands.Bot):
 
     async def get_tag_prefix(self, ctx: ext.ClemBotCtx) -> list[str]:
         assert ctx.guild is not None
-        return await self.custom_tag_prefix_route.get_custom_tag_prefixes(ctx.guild.id)
+        return (await self.guild_settings.get(ctx.guild.id)).tag_prefixes
@@ -84,6 +84,7 @@ class ClaimsAuthorizationCog(commands.Cog):
             return
 
         await self.bot.claim_route.add_claim_mapping(claim, role.id, raise_on_error=True)
+        self.bot.claims_cache.invalidate_guild(role.guild.id)
 
         title = f'Claim: "{claim.name}" successfully added to role @{role.name} :white_check_mark:'
 
@@ -117,6 +118,7 @@ class ClaimsAuthorizationCog(commands.Cog):
         )
 
         await self.bot.claim_route.remove_claim_mapping(claim, role.id, raise_on_error=True)
+        self.bot.claims_cache.invalidate_guild(role.guild.id)
 
         claims = await self.bot.claim_route.get_claims_role(role.id)
         claims_str = "\n".join(c.name for c in claims) if claims else "No current claims"
@@ -100,6 +100,9 @@ class CommandCog(commands.Cog):
         await self.bot.commands_route.enable_command(
             cmd.qualified_name, ctx.guild.id, channel.id if channel is not None else None
         )
+        self.bot.command_status_index.command_enabled(
+            ctx.guild.id, cmd.qualified_name, channel.id if channel is not None else None
+        )
         embed = discord.Embed(title="⚙️ Command Enabled", color=Colors.ClemsonOrange)
         embed.add_field(name="Command Name", value=f"`{cmd.qualified_name}`")
         embed.add_field(
@@ -174,6 +177,9 @@ class CommandCog(commands.Cog):
         await self.bot.commands_route.disable_command(
             cmd.qualified_name, ctx.guild.id, channel.id if channel is not None else None, silent
         )
+        self.bot.command_status_index.command_disabled(
+            ctx.guild.id, cmd.qualified_name, channel.id if channel is not None else None, silent
+        )
         embed = discord.Embed(title="⚙️ Command Disabled", color=Colors.ClemsonOrange)
         embed.add_field(name="Command Name", value=f"`{cmd.qualified_name}`")
         embed.add_field(
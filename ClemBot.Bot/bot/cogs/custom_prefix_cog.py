@@ -5,6 +5,7 @@ import bot.bot_secrets as bot_secrets
 import bot.extensions as ext
 from bot.clem_bot import ClemBot
 from bot.consts import INVALID_PREFIXES, Claims, Colors
+from bot.messaging.events import Events
 from bot.utils.logging_utils import get_logger
 
 log = get_logger(__name__)
@@ -62,6 +63,7 @@ class CustomPrefixCog(commands.Cog):
 
         assert ctx.guild is not None
         await self.bot.custom_prefix_route.set_custom_prefix(ctx.guild.id, prefix)
+        await self.bot.messenger.publish(Events.on_set_custom_prefix, ctx.guild, prefix)
 
         embed = discord.Embed(color=Colors.ClemsonOrange)
         embed.add_field(
@@ -88,6 +90,7 @@ class CustomPrefixCog(commands.Cog):
 
         assert ctx.guild is not None
         await self.bot.custom_prefix_route.set_custom_prefix(ctx.guild.id, default_prefix)
+        await self.bot.messenger.publish(Events.on_set_custom_prefix, ctx.guild, default_prefix)
 
         embed = discord.Embed(color=Colors.ClemsonOrange)
         embed.add_field(
@@ -4,6 +4,7 @@ import discord.ext.commands as commands
 import bot.extensions as ext
 from bot.clem_bot import ClemBot
 from bot.consts import Claims, Colors, DesignatedChannels, OwnerDesignatedChannels
+from bot.messaging.events import Events
 from bot.utils.logging_utils import get_logger
 
 log = get_logger(__name__)
@@ -96,6 +97,7 @@ class DesignatedChannelsCog(commands.Cog):
         await self.bot.designated_channel_route.register_channel(
             channel.id, channel_type, raise_on_error=True
         )
+        await self.bot.messenger.publish(Events.on_designated_channels_update, ctx.guild)
 
         embed = discord.Embed(title="Designated Channel added", color=Colors.ClemsonOrange)
         embed.add_field(
@@ -151,6 +153,7 @@ class DesignatedChannelsCog(commands.Cog):
         await self.bot.designated_channel_route.delete_channel(
             channel.id, channel_type, raise_on_error=True
         )
+        await self.bot.messenger.publish(Events.on_designated_channels_update, ctx.guild)
 
         embed = discord.Embed(title="Designated Channel deleted", color=Colors.ClemsonOrange)
         embed.add_field(
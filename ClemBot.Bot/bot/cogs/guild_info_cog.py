@@ -6,6 +6,7 @@ import bot.extensions as ext
 from bot.clem_bot import ClemBot
 from bot.consts import Colors
 from bot.messaging.events import Events
+from bot.utils.memory_profile import ensure_chunked
 
 
 class GuildInfoCog(commands.Cog):
@@ -28,6 +29,7 @@ class GuildInfoCog(commands.Cog):
         )
         embed.set_thumbnail(url=guild.icon.url)
 
+        await ensure_chunked(guild)
         member_count = len([m for m in guild.members if not m.bot])
         bot_count = len([m for m in guild.members if m.bot])
         channel_count = len(guild.text_channels) + len(guild.voice_channels)  # excludes categories
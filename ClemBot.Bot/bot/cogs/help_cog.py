@@ -3,6 +3,7 @@ from collections.abc import Iterable
 
 import discord
 import discord.ext.commands as commands
+from discord.ext.commands.bot import BotBase
 
 import bot.bot_secrets as bot_secrets
 import bot.extensions as ext
@@ -139,12 +140,12 @@ class HelpCog(commands.Cog):
         await ctx.send(embed=embed)
 
     def find_command(
-        self, parent: commands.Command[t.Any, t.Any, t.Any] | commands.Bot, command_name: str
+        self, parent: commands.Command[t.Any, t.Any, t.Any] | BotBase, command_name: str
     ) -> ext.ClemBotCommand | None:
         """
         Recursively searches the command tree to find a given command, if none found then returns None
         """
-        if isinstance(parent, commands.Bot):
+        if isinstance(parent, BotBase):
             found = None
             for c in parent.commands:
                 if result := self.find_command(c, command_name):
@@ -45,7 +45,8 @@ class InfoCog(commands.Cog):
         embed.set_thumbnail(url=user.display_avatar.url)
 
         # since member objects include guild ID's and information, we try to get a member object for the target user
-        member = ctx.guild.get_member(user.id)
+        # The converter returns members that arent cached when members are cached lazily
+        member = ctx.guild.get_member(user.id) or user
         # check to see if the target user is in the calling context's guild. If None then the user isn't in the calling server
         if member:
 
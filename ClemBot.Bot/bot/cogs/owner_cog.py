@@ -1,16 +1,22 @@
 # type: ignore
 
 import asyncio
+import dataclasses
 import json
+import typing as t
 from collections import deque
 
 import discord
 import discord.ext.commands as commands
 
+import bot.bot_secrets as bot_secrets
 import bot.extensions as ext
 from bot.clem_bot import ClemBot
 from bot.consts import Colors, DesignatedChannels, Moderation, OwnerDesignatedChannels
+from bot.messaging.event_policy import EventPriority
+from bot.messaging.events import Events
 from bot.utils.logging_utils import get_logger
+from bot.utils.memory_profile import memory_report
 
 log = get_logger(__name__)
 
@@ -23,6 +29,26 @@ class OwnerCog(commands.Cog):
     def __init__(self, bot: ClemBot):
         self.bot: ClemBot = bot
 
+        if bot.ipc:
+            bot.ipc.handle("leave_guild", self._leave_local_guild)
+            bot.ipc.handle("guild_ids", self._local_guild_ids)
+
+    async def _leave_local_guild(self, id: int) -> str | None:
+        if not (server := self.bot.get_guild(id)):
+            return None
+
+        await server.leave()
+        return server.name
+
+    async def _local_guild_ids(self, _=None) -> list[int]:
+        return [g.id for g in self.bot.guilds]
+
+    async def _cluster_stats(self) -> dict[int, dict[str, t.Any]]:
+        """Gets the stats of every cluster, guilds of other clusters arent in this ones cache"""
+        if self.bot.ipc:
+            return await self.bot.ipc.request("cluster_stats")
+        return {0: await self.bot.get_cluster_stats()}
+
     @ext.group(invoke_without_command=True, hidden=True, case_insensitive=True)
     @commands.is_owner()
     async def owner(self, ctx):
@@ -43,6 +69,16 @@ class OwnerCog(commands.Cog):
     @commands.is_owner()
     async def leave(self, ctx: ext.ClemBotCtx, id: int):
         await ctx.send("Leaving guild")
+
+        # The guild can be owned by any cluster, the one that owns it leaves
+        if self.bot.ipc:
+            left = [n for n in (await self.bot.ipc.request("leave_guild", id)).values() if n]
+            if not left:
+                await ctx.send(f"No cluster is in guild {id}")
+                return
+            await ctx.send(f"Left guild: {left[0]}")
+            return
+
         server = self.bot.get_guild(id)
         await ctx.send(f"Leaving guild: {server.name}")
         await server.leave()
@@ -75,6 +111,13 @@ class OwnerCog(commands.Cog):
         db_guilds = await self.bot.guild_route.get_all_guilds()
         db_guilds_ids = set(g.id for g in db_guilds)
         disc_guilds = set(g.id for g in self.bot.guilds)
+        if self.bot.ipc:
+            # Guilds of other clusters would look like guilds the bot left
+            replies = await self.bot.ipc.request("guild_ids")
+            if len(replies) < self.bot.ipc.cluster_count:
+                await ctx.send(f"Only {len(replies)} clusters replied, not resetting guilds")
+                return
+            disc_guilds = set(i for ids in replies.values() for i in ids)
 
         difference = db_guilds_ids - disc_guilds
 
@@ -98,10 +141,119 @@ class OwnerCog(commands.Cog):
 
     @owner.group(invoke_without_command=True)
     @commands.is_owner()
-    async def queuestatus(self, ctx):
-        stats = {}
-        for k, v in self.bot.messenger._guild_event_queue.items():
-            stats[k] = v.qsize()
+    async def messagebatchstats(self, ctx: ext.ClemBotCtx):
+        service = self.bot.active_services["MessageHandlingService"]
+        metrics = service.batch_metrics
+        stats = {
+            "pending_messages": len(service.message_batch),
+            "pending_edits": len(service.message_edit_batch),
+            "spooled_batches": len(service.spool),
+            "spool_bytes": service.spool.size,
+            "spool_dropped_batches": service.spool.dropped,
+            "flushes": metrics.flushes,
+            "failed_flushes": metrics.failed_flushes,
+            "rejected_requests": metrics.rejected_requests,
+            "abandoned_batches": metrics.abandoned_batches,
+            "messages_flushed": metrics.messages_flushed,
+            "edits_flushed": metrics.edits_flushed,
+            "edits_coalesced": metrics.edits_coalesced,
+            "last_batch_size": metrics.last_batch_size,
+            "avg_batch_size": round(metrics.avg_batch_size, 2),
+            "last_flush_latency": round(metrics.last_flush_latency, 3),
+            "avg_flush_latency": round(metrics.avg_flush_latency, 3),
+            "max_flush_latency": round(metrics.max_flush_latency, 3),
+        }
+        await ctx.send(json.dumps(stats, indent=2))
+
+    @owner.group(invoke_without_command=True)
+    @commands.is_owner()
+    async def queuestatus(self, ctx, top: int = 10):
+        queues = self.bot.messenger.guild_queues
+
+        # Only the fullest queues, a line per guild wouldnt fit a message on a busy bot
+        fullest = sorted(queues.items(), key=lambda q: q[1].qsize(), reverse=True)[:top]
+
+        stats: dict[str, t.Any] = {"queues": len(queues)}
+        for k, v in fullest:
+            stats[str(k)] = {
+                "size": v.qsize(),
+                "peak_size": v.metrics.peak_size,
+                "dropped": v.metrics.dropped,
+                "coalesced": v.metrics.coalesced,
+                "blocked": v.metrics.blocked,
+                "lanes": {p.name: v.lane_size(p) for p in EventPriority},
+                "starvation_promotions": v.metrics.starvation_promotions,
+            }
+
+        output = json.dumps(stats, indent=2)
+        chunks = [output[i : i + MAX_MESSAGE_SIZE] for i in range(0, len(output), MAX_MESSAGE_SIZE)]
+        for c in chunks:
+            await ctx.send(f"```{c}```")
+
+    @owner.group(invoke_without_command=True)
+    @commands.is_owner()
+    async def eventstats(self, ctx: ext.ClemBotCtx, top: int = 10):
+        metrics = self.bot.messenger.metrics
+
+        def slowest(items):
+            # Order by total time spent, that is where optimizing pays off the most
+            ranked = sorted(items, key=lambda i: i[1].latency.sum, reverse=True)
+            return {name: m.summary() for name, m in ranked[:top]}
+
+        queues = sorted(
+            self.bot.messenger.guild_queues.items(),
+            key=lambda i: i[1].metrics.wait.quantile(0.99),
+            reverse=True,
+        )
+        stats = {
+            "events": slowest(metrics.events.items()),
+            "listeners": slowest((f"{e}:{l}", m) for (e, l), m in metrics.listeners.items()),
+            "queue_wait": {g: q.metrics.wait.summary() for g, q in queues[:top]},
+            "drain": dataclasses.asdict(self.bot.messenger.drain_metrics),
+        }
+
+        output = json.dumps(stats, indent=2)
+        chunks = [output[i : i + MAX_MESSAGE_SIZE] for i in range(0, len(output), MAX_MESSAGE_SIZE)]
+        for c in chunks:
+            await ctx.send(f"```{c}```")
+
+    @owner.group(invoke_without_command=True)
+    @commands.is_owner()
+    async def memory(self, ctx: ext.ClemBotCtx, top: int = 10):
+        report = {"profile": bot_secrets.secrets.memory_profile, **memory_report(self.bot, top)}
+
+        output = json.dumps(report, indent=2)
+        chunks = [output[i : i + MAX_MESSAGE_SIZE] for i in range(0, len(output), MAX_MESSAGE_SIZE)]
+        for c in chunks:
+            await ctx.send(f"```{c}```")
+
+    @owner.group(invoke_without_command=True)
+    @commands.is_owner()
+    async def apistats(self, ctx: ext.ClemBotCtx):
+        metrics = self.bot.api_client.coalescing_metrics
+        pool = self.bot.api_client.pool_metrics
+        stats: dict[str, t.Any] = {
+            "issued_gets": metrics.issued,
+            "coalesced_gets": metrics.coalesced,
+            "coalesced_ratio": round(metrics.coalesced_ratio, 3),
+            "pool": {
+                "limit": pool.limit,
+                "in_flight": pool.in_flight,
+                "peak_in_flight": pool.peak_in_flight,
+                "saturation": round(pool.saturation, 3),
+                "saturated_requests": pool.saturated,
+                "timeouts": pool.timeouts,
+            },
+        }
+
+        if cache := self.bot.api_client.response_cache:
+            stats["response_cache"] = {
+                "size": len(cache),
+                "hits": cache.metrics.hits,
+                "misses": cache.metrics.misses,
+                "hit_ratio": round(cache.metrics.hit_ratio, 3),
+                "invalidations": cache.metrics.invalidations,
+            }
 
         await ctx.send(json.dumps(stats, indent=2))
 
@@ -158,6 +310,7 @@ class OwnerCog(commands.Cog):
             return
 
         await self.bot.designated_channel_route.register_channel(channel.id, channel_type)
+        await self.bot.messenger.publish(Events.on_designated_channels_update, ctx.guild)
 
         embed = discord.Embed(title="Owner Designated Channel added", color=Colors.ClemsonOrange)
         embed.add_field(
@@ -192,6 +345,7 @@ class OwnerCog(commands.Cog):
             return
 
         await self.bot.designated_channel_route.delete_channel(channel.id, channel_type)
+        await self.bot.messenger.publish(Events.on_designated_channels_update, ctx.guild)
 
         embed = discord.Embed(title="Owner Designated Channel deleted", color=Colors.ClemsonOrange)
         embed.add_field(
@@ -205,12 +359,12 @@ class OwnerCog(commands.Cog):
     async def count(self, ctx):
         msg = await ctx.send("Querying global bot metrics (this might take a while)")
 
+        stats = (await self._cluster_stats()).values()
+
         embed = discord.Embed(title="Available metrics", color=Colors.ClemsonOrange)
-        embed.add_field(name="Guilds", value=len(self.bot.guilds), inline=False)
+        embed.add_field(name="Guilds", value=sum(s["guilds"] for s in stats), inline=False)
 
-        embed.add_field(
-            name="Users", value=sum(len(i.members) for i in self.bot.guilds), inline=False
-        )
+        embed.add_field(name="Users", value=sum(s["users"] for s in stats), inline=False)
 
         """
         messages = await MessageRepository().get_message_count()
@@ -220,6 +374,24 @@ class OwnerCog(commands.Cog):
         await msg.delete()
         await ctx.send(embed=embed)
 
+    @owner.group(invoke_without_command=True)
+    @commands.is_owner()
+    async def clusters(self, ctx: ext.ClemBotCtx):
+        stats = await self._cluster_stats()
+
+        embed = discord.Embed(title="Clusters", color=Colors.ClemsonOrange)
+        for cluster_id, s in sorted(stats.items()):
+            embed.add_field(
+                name=f"Cluster {cluster_id}",
+                value="\n".join(f"{k}: {v}" for k, v in s.items()),
+                inline=False,
+            )
+
+        if self.bot.ipc and len(stats) < self.bot.ipc.cluster_count:
+            embed.set_footer(text=f"{self.bot.ipc.cluster_count - len(stats)} clusters didnt reply")
+
+        await ctx.send(embed=embed)
+
     @owner.group(invoke_without_command=True, aliases=["eval"])
     @commands.is_owner()
     async def eval_bot(self, ctx):
@@ -269,7 +441,7 @@ class OwnerCog(commands.Cog):
     @count.command()
     @commands.is_owner()
     async def guilds(self, ctx):
-        count = len(self.bot.guilds)
+        count = sum(s["guilds"] for s in (await self._cluster_stats()).values())
 
         embed = discord.Embed(title="Current guild count", color=Colors.ClemsonOrange)
         embed.add_field(name="Global", value=count)
@@ -279,7 +451,7 @@ class OwnerCog(commands.Cog):
     @count.command()
     @commands.is_owner()
     async def users(self, ctx: ext.ClemBotCtx, guild_id: int = None):
-        count = sum(len(i.members) for i in self.bot.guilds)
+        count = sum(s["users"] for s in (await self._cluster_stats()).values())
 
         embed = discord.Embed(title="Current user count", color=Colors.ClemsonOrange)
         embed.add_field(name=f"Guild: {guild_id}" if guild_id else "Global", value=count)
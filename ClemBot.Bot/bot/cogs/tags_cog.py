@@ -11,6 +11,7 @@ from bot.messaging.events import Events
 from bot.models.tag_models import Tag
 from bot.utils.helpers import chunk_sequence
 from bot.utils.logging_utils import get_logger
+from bot.utils.memory_profile import ensure_chunked, get_or_fetch_member
 
 log = get_logger(__name__)
 
@@ -195,7 +196,7 @@ class TagCog(commands.Cog):
         if not (tag := await self._check_tag_exists(ctx, name, do_fuzzy=True, do_suggestions=True)):
             return
 
-        owner = ctx.guild.get_member(tag.user_id)
+        owner = await get_or_fetch_member(ctx.guild, tag.user_id)
         description = ":warning: This tag is unclaimed." if owner is None else ""
         embed = discord.Embed(
             title=":information_source: Tag Information",
@@ -268,7 +269,7 @@ class TagCog(commands.Cog):
         if not (tag := await self._check_tag_exists(ctx, name, do_suggestions=True)):
             return
         # make sure tag is unclaimed
-        if owner := ctx.guild.get_member(tag.user_id):
+        if owner := await get_or_fetch_member(ctx.guild, tag.user_id):
             await self._error_embed(ctx, f"{owner.mention} already owns the tag `{name}`.")
             return
         # transfer tag to new owner
@@ -287,6 +288,10 @@ class TagCog(commands.Cog):
     @ext.docs("Tags", "unclaimed")
     async def unclaimed(self, ctx: ext.ClemBotCtx) -> None:
         guild_tags = await self.bot.tag_route.get_guilds_tags(ctx.guild.id)
+
+        # A member that isnt cached would look like they left the guild
+        await ensure_chunked(ctx.guild)
+
         unclaimed_tags = []
         for tag in guild_tags:
             if ctx.guild.get_member(tag.user_id) is None:
@@ -332,7 +337,7 @@ class TagCog(commands.Cog):
             return
         author = ctx.author
         # check if tag is unclaimed
-        if not ctx.guild.get_member(tag.user_id):
+        if not await get_or_fetch_member(ctx.guild, tag.user_id):
             desc = f"Cannot transfer tag `{name}`: tag is unclaimed.\n"
             desc += f"Run command `tag claim {name}` to claim the tag."
             await self._error_embed(ctx, desc)
@@ -386,6 +391,7 @@ class TagCog(commands.Cog):
             return await self._error_embed(ctx, "Tag prefix cannot contain the character '`'.")
 
         await self.bot.custom_tag_prefix_route.set_custom_tag_prefix(ctx.guild.id, tag_prefix)
+        await self.bot.messenger.publish(Events.on_set_custom_tag_prefix, ctx.guild, tag_prefix)
         embed = discord.Embed(
             title=":white_check_mark: Tag Prefix Changed", color=Colors.ClemsonOrange
         )
@@ -405,6 +411,9 @@ class TagCog(commands.Cog):
         await self.bot.custom_tag_prefix_route.set_custom_tag_prefix(
             ctx.guild.id, DEFAULT_TAG_PREFIX
         )
+        await self.bot.messenger.publish(
+            Events.on_set_custom_tag_prefix, ctx.guild, DEFAULT_TAG_PREFIX
+        )
         embed = discord.Embed(
             title=":white_check_mark: Tag Prefix Reset", color=Colors.ClemsonOrange
         )
@@ -412,7 +421,7 @@ class TagCog(commands.Cog):
         await ctx.send(embed=embed)
 
     async def _transfer_tag(self, ctx: ext.ClemBotCtx, tag: Tag, to: discord.User) -> None:
-        user = ctx.guild.get_member(tag.user_id)
+        user = await get_or_fetch_member(ctx.guild, tag.user_id)
         assert user is not None
         await self.bot.tag_route.edit_tag_owner(ctx.guild.id, tag.name, to.id, raise_on_error=True)
         embed = discord.Embed(
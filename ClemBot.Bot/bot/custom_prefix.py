@@ -23,12 +23,11 @@ class CustomPrefix:
         if not bot_secrets.secrets.bot_only:
             # noinspection PyBroadException
             try:
-                # Try to grab the prefixes from the db, raise an error on failure
-                # and bailout, we cant respond to anything at the moment
+                # Grab the prefixes from the guild settings cache, this keeps serving the last
+                # known prefixes if the api goes down. It only raises if this guild has never
+                # been loaded, in that case bailout, we cant respond to anything at the moment
                 assert message.guild
-                prefixes = await bot.custom_prefix_route.get_custom_prefixes(
-                    message.guild.id, raise_on_error=True
-                )
+                prefixes = (await bot.guild_settings.get(message.guild.id)).prefixes
             except Exception as e:
                 log.error("Custom prefix request failed with error: {error}", error=e)
                 raise PrefixRequestError("Requesting custom prefix from the api failed")
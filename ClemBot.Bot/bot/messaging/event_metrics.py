@@ -0,0 +1,217 @@
+"""
+This module holds the instrumentation of the messenger, how often events and their
+listeners are called, how often they fail and how long they take
+"""
+
+import bisect
+import dataclasses
+import typing as t
+
+if t.TYPE_CHECKING:
+    from bot.messaging.messenger import Messenger
+
+# Upper bounds in seconds of the latency histogram buckets, the last bucket is unbounded
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+class LatencyHistogram:
+    """
+    Fixed bucket histogram of durations in seconds, observing a value doesnt allocate
+    so it can be used on every dispatch. Quantiles are estimated by interpolating
+    inside the bucket the quantile falls in
+    """
+
+    def __init__(self) -> None:
+        # One count per bucket plus the unbounded bucket
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Adds the observations of another histogram to this one"""
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates the value below which the given fraction of observations fall
+
+        Args:
+            q (float): The quantile between 0 and 1
+        """
+        if self.count == 0:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = LATENCY_BUCKETS[i - 1] if i > 0 else 0.0
+                upper = LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def summary(self) -> dict[str, float]:
+        """Gets the percentiles of the histogram in milliseconds"""
+        return {
+            "p50_ms": round(self.quantile(0.5) * 1000, 3),
+            "p95_ms": round(self.quantile(0.95) * 1000, 3),
+            "p99_ms": round(self.quantile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+@dataclasses.dataclass
+class CallMetrics:
+    calls: int = 0
+    errors: int = 0
+    latency: LatencyHistogram = dataclasses.field(default_factory=LatencyHistogram)
+
+    def summary(self) -> dict[str, t.Any]:
+        return {"calls": self.calls, "errors": self.errors, **self.latency.summary()}
+
+
+class EventBusMetrics:
+    """The call metrics of every event and listener of a messenger"""
+
+    def __init__(self) -> None:
+        self.events = dict[str, CallMetrics]()
+
+        # Indexed by event name and the qualified name of the listener
+        self.listeners = dict[tuple[str, str], CallMetrics]()
+
+    def event(self, event: str) -> CallMetrics:
+        if (metrics := self.events.get(event)) is None:
+            metrics = self.events[event] = CallMetrics()
+        return metrics
+
+    def listener(self, event: str, callback: t.Callable[..., t.Any]) -> CallMetrics:
+        """
+        Gets the metrics of a listener, listeners with the same name share their metrics
+        so a resubscribed service keeps its history
+
+        Args:
+            event (str): The event the listener is subscribed to
+            callback (Callable): The listener
+        """
+        key = (event, getattr(callback, "__qualname__", repr(callback)))
+        if (metrics := self.listeners.get(key)) is None:
+            metrics = self.listeners[key] = CallMetrics()
+        return metrics
+
+
+def _escape(value: t.Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict[str, t.Any]) -> str:
+    return ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+
+
+def _series(name: str, labels: dict[str, t.Any]) -> str:
+    return f"{name}{{{_labels(labels)}}}" if labels else name
+
+
+def _render_histogram(
+    lines: list[str], name: str, labels: dict[str, t.Any], histogram: LatencyHistogram
+) -> None:
+    cumulative = 0
+    for bound, count in zip((*LATENCY_BUCKETS, "+Inf"), histogram.counts):
+        cumulative += count
+        lines.append(f'{_series(f"{name}_bucket", {**labels, "le": bound})} {cumulative}')
+
+    lines.append(f"{_series(f'{name}_sum', labels)} {histogram.sum}")
+    lines.append(f"{_series(f'{name}_count', labels)} {histogram.count}")
+
+
+def render_prometheus(messenger: "Messenger") -> str:
+    """
+    Renders the metrics of a messenger in the prometheus text exposition format
+
+    Args:
+        messenger (Messenger): The messenger to render the metrics of
+    """
+    metrics = messenger.metrics
+    lines = list[str]()
+
+    lines.append("# TYPE clembot_event_calls_total counter")
+    lines.append("# TYPE clembot_event_errors_total counter")
+    lines.append("# TYPE clembot_event_duration_seconds histogram")
+    for event, m in metrics.events.items():
+        labels = {"event": event}
+        lines.append(f"clembot_event_calls_total{{{_labels(labels)}}} {m.calls}")
+        lines.append(f"clembot_event_errors_total{{{_labels(labels)}}} {m.errors}")
+        _render_histogram(lines, "clembot_event_duration_seconds", labels, m.latency)
+
+    lines.append("# TYPE clembot_listener_calls_total counter")
+    lines.append("# TYPE clembot_listener_errors_total counter")
+    lines.append("# TYPE clembot_listener_duration_seconds histogram")
+    for (event, listener), m in metrics.listeners.items():
+        labels = {"event": event, "listener": listener}
+        lines.append(f"clembot_listener_calls_total{{{_labels(labels)}}} {m.calls}")
+        lines.append(f"clembot_listener_errors_total{{{_labels(labels)}}} {m.errors}")
+        _render_histogram(lines, "clembot_listener_duration_seconds", labels, m.latency)
+
+    # Guild queues come and go, they are exported combined so the series dont grow with
+    # the guilds and the counters of reclaimed queues arent lost
+    queues = messenger.guild_queues
+    queue_metrics = messenger.queue_metrics()
+    lines.append("# TYPE clembot_guild_queues gauge")
+    lines.append(f"clembot_guild_queues {len(queues)}")
+    lines.append("# TYPE clembot_guild_queue_size gauge")
+    lines.append(f"clembot_guild_queue_size {sum(q.qsize() for q in queues.values())}")
+    lines.append("# TYPE clembot_guild_queue_max_size gauge")
+    lines.append(
+        f"clembot_guild_queue_max_size {max((q.qsize() for q in queues.values()), default=0)}"
+    )
+    lines.append("# TYPE clembot_guild_queue_dropped_total counter")
+    lines.append(f"clembot_guild_queue_dropped_total {queue_metrics.dropped}")
+    lines.append("# TYPE clembot_guild_queue_coalesced_total counter")
+    lines.append(f"clembot_guild_queue_coalesced_total {queue_metrics.coalesced}")
+    lines.append("# TYPE clembot_guild_queue_wait_seconds histogram")
+    _render_histogram(lines, "clembot_guild_queue_wait_seconds", {}, queue_metrics.wait)
+
+    drain = messenger.drain_metrics
+    lines.append("# TYPE clembot_messenger_drained_total counter")
+    lines.append(f"clembot_messenger_drained_total {drain.drained}")
+    lines.append("# TYPE clembot_messenger_persisted_total counter")
+    lines.append(f"clembot_messenger_persisted_total {drain.persisted}")
+    lines.append("# TYPE clembot_messenger_drain_dropped_total counter")
+    lines.append(f"clembot_messenger_drain_dropped_total {drain.dropped}")
+    lines.append("# TYPE clembot_messenger_replayed_total counter")
+    lines.append(f"clembot_messenger_replayed_total {drain.replayed}")
+
+    return "\n".join(lines) + "\n"
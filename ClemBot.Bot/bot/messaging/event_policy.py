@@ -0,0 +1,97 @@
+"""
+This module defines how the messenger handles an event, event definitions in
+events.py declare their policy with the event_policy decorator
+"""
+
+import dataclasses
+import enum
+import typing as t
+
+T = t.TypeVar("T", bound=t.Callable[..., t.Any])
+
+# Maximum amount of queued events of a single event type in one guild queue
+DEFAULT_MAX_QUEUE_DEPTH = 10_000
+
+CoalesceMerge = t.Callable[[tuple[t.Any, ...], tuple[t.Any, ...]], tuple[t.Any, ...]]
+
+
+class DispatchMode(enum.Enum):
+    # Listeners are awaited one after another, an exception stops the remaining listeners
+    sequential = "sequential"
+
+    # Every listener runs at the same time, an exception only fails its own listener
+    concurrent = "concurrent"
+
+    # Like concurrent but at most max_concurrency listeners run at the same time
+    bounded = "bounded"
+
+
+class EventPriority(enum.Enum):
+    """The lane of the guild queue an event waits in, higher lanes are drained more often"""
+
+    high = "high"
+    normal = "normal"
+    low = "low"
+
+
+class OverflowPolicy(enum.Enum):
+    # Publishing waits until the guild queue has room for the event again
+    block = "block"
+
+    # The oldest queued event of the same type is dropped to make room
+    drop_oldest = "drop_oldest"
+
+    # A queued event with the same coalesce key is replaced instead of queueing another one,
+    # this applies whenever an event with the key is queued, not only when the queue is full
+    coalesce = "coalesce"
+
+
+@dataclasses.dataclass(frozen=True)
+class EventPolicy:
+    dispatch: DispatchMode = DispatchMode.sequential
+    max_concurrency: int = 4
+
+    # The lane the event is queued in when publish_to_queue isnt given a priority
+    priority: EventPriority = EventPriority.normal
+
+    # How many of the event can wait in a guild queue and what happens past that
+    max_queue_depth: int = DEFAULT_MAX_QUEUE_DEPTH
+    overflow: OverflowPolicy = OverflowPolicy.block
+
+    # Gets the key queued events are coalesced by from the event args
+    coalesce_key: t.Callable[..., t.Hashable] | None = None
+
+    # Combines the args of the queued event with the args of the new event,
+    # without one the new args replace the queued ones
+    coalesce_merge: CoalesceMerge | None = None
+
+
+DEFAULT_EVENT_POLICY = EventPolicy()
+
+
+def event_policy(policy: EventPolicy) -> t.Callable[[T], T]:
+    """
+    Decorator to declare the policy of an event definition, must be applied below @property
+
+    Args:
+        policy (EventPolicy): The policy the messenger uses for the event
+    """
+
+    def wrapper(func: T) -> T:
+        setattr(func, "__event_policy__", policy)
+        return func
+
+    return wrapper
+
+
+def first_arg_id(first: t.Any, *args: t.Any, **kwargs: t.Any) -> t.Hashable:
+    """Coalesce key for events whose first arg is the discord object they are about"""
+    return t.cast(t.Hashable, first.id)
+
+
+def merge_before_after(queued: tuple[t.Any, ...], new: tuple[t.Any, ...]) -> tuple[t.Any, ...]:
+    """
+    Coalesce merge for (before, after) events, keeps the before of the queued event
+    so listeners still see the whole change from the first before to the last after
+    """
+    return (queued[0], *new[1:])
@@ -0,0 +1,324 @@
+import asyncio
+import collections
+import dataclasses
+import time
+import typing as t
+
+from bot.messaging.event_metrics import LatencyHistogram
+from bot.messaging.event_policy import (
+    DEFAULT_EVENT_POLICY,
+    EventPolicy,
+    EventPriority,
+    OverflowPolicy,
+)
+from bot.utils.logging_utils import get_logger
+
+log = get_logger(__name__)
+
+# How many events each lane gets to dispatch per round of weighted draining
+LANE_WEIGHTS = {EventPriority.high: 8, EventPriority.normal: 4, EventPriority.low: 1}
+
+# Seconds the oldest event of a lane can wait before its lane is served next regardless of weight
+LANE_STARVATION_TIMEOUT = 5.0
+
+
+@dataclasses.dataclass
+class QueuedEvent:
+    name: str
+    args: tuple[t.Any, ...]
+    kwargs: dict[str, t.Any]
+
+    # Key the event is coalesced by while it waits in the queue
+    coalesce_key: t.Hashable | None = None
+
+    # Set when the event was dropped from the queue before it was dispatched
+    dropped: bool = False
+
+    # time.perf_counter() of when the event was first queued
+    queued_at: float = 0.0
+
+    # The lane the event waits in, set from the events policy when it isnt given
+    priority: EventPriority | None = None
+
+
+@dataclasses.dataclass
+class EventQueueMetrics:
+    dropped: int = 0
+    coalesced: int = 0
+
+    # Amount of publishes that had to wait for room in the queue
+    blocked: int = 0
+    peak_size: int = 0
+
+    # Times a lane was served early because its oldest event waited too long
+    starvation_promotions: int = 0
+
+    # Seconds events waited in the queue before they were dispatched
+    wait: LatencyHistogram = dataclasses.field(default_factory=LatencyHistogram)
+
+    def merge(self, other: "EventQueueMetrics") -> None:
+        """Adds the metrics of another queue to these, the peak size is the larger of both"""
+        self.dropped += other.dropped
+        self.coalesced += other.coalesced
+        self.blocked += other.blocked
+        self.peak_size = max(self.peak_size, other.peak_size)
+        self.starvation_promotions += other.starvation_promotions
+        self.wait.merge(other.wait)
+
+
+class GuildEventQueue:
+    """
+    Bounded queue of the events of a single guild, how many of an event can be queued
+    and what happens once that is reached is defined by the events policy
+
+    Events wait in a lane per priority. Lanes are drained by smooth weighted round robin,
+    so a lane with weight 8 dispatches 8 events for every event of a lane with weight 1,
+    and a lane whose oldest event waited longer than the starvation timeout goes next.
+    Within a lane events are returned in the order they were first queued, a coalesced
+    event keeps the position of the event it was coalesced into
+    """
+
+    def __init__(
+        self,
+        policies: t.Mapping[str, EventPolicy],
+        *,
+        lane_weights: t.Mapping[EventPriority, int] = LANE_WEIGHTS,
+        starvation_timeout: float = LANE_STARVATION_TIMEOUT,
+    ) -> None:
+        self._policies = policies
+        self.lane_weights = lane_weights
+        self.starvation_timeout = starvation_timeout
+
+        self._lanes = {p: collections.deque[QueuedEvent]() for p in EventPriority}
+
+        # Live events in each lane, the lanes also hold dropped events
+        self._lane_sizes = dict.fromkeys(EventPriority, 0)
+
+        # Current weights of the smooth weighted round robin
+        self._lane_credit = dict.fromkeys(EventPriority, 0)
+
+        # Live events of each type in queue order, used to find the oldest event to drop
+        self._by_event = collections.defaultdict[str, collections.deque[QueuedEvent]](
+            collections.deque
+        )
+
+        # Queued events that newer events with the same key are coalesced into
+        self._coalescable = dict[tuple[str, t.Hashable], QueuedEvent]()
+
+        self._size = 0
+
+        # Dropped events that are still in a lane
+        self._tombstones = 0
+
+        self._changed = asyncio.Condition()
+
+        self.metrics = EventQueueMetrics()
+
+    def qsize(self) -> int:
+        return self._size
+
+    def lane_size(self, priority: EventPriority) -> int:
+        """Gets the amount of queued events in a single lane"""
+        return self._lane_sizes[priority]
+
+    def depth(self, event: str) -> int:
+        """Gets the amount of queued events of a single type"""
+        return len(self._by_event.get(event, ()))
+
+    async def put(self, event: QueuedEvent) -> None:
+        """
+        Adds an event to the queue, waits for room if the event blocks on overflow
+
+        Args:
+            event (QueuedEvent): The event to queue
+        """
+        policy = self._policies.get(event.name, DEFAULT_EVENT_POLICY)
+        event.priority = event.priority or policy.priority
+
+        async with self._changed:
+            if policy.overflow is OverflowPolicy.coalesce and policy.coalesce_key:
+                event.coalesce_key = policy.coalesce_key(*event.args, **event.kwargs)
+                queued = self._coalescable.get((event.name, event.coalesce_key))
+
+                if queued is not None:
+                    self.__coalesce(policy, queued, event)
+                    return
+
+            if self.depth(event.name) >= policy.max_queue_depth:
+                if policy.overflow is OverflowPolicy.drop_oldest:
+                    self.__drop_oldest(event.name)
+                else:
+                    # Coalescing events only block once there are more unique keys than fit
+                    self.metrics.blocked += 1
+                    await self._changed.wait_for(
+                        lambda: self.depth(event.name) < policy.max_queue_depth
+                    )
+
+            self._lanes[event.priority].append(event)
+            self._lane_sizes[event.priority] += 1
+            self._by_event[event.name].append(event)
+            if event.coalesce_key is not None:
+                self._coalescable[(event.name, event.coalesce_key)] = event
+
+            self._size += 1
+            self.metrics.peak_size = max(self.metrics.peak_size, self._size)
+
+            self._changed.notify_all()
+
+    async def get(self) -> QueuedEvent:
+        """
+        Removes and returns the next event, waits until there is one
+        """
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._size > 0)
+
+            event = self.__pop(self.__next_lane())
+
+            # Wake publishers that wait for room
+            self._changed.notify_all()
+
+            return event
+
+    async def get_batch(
+        self, event: str, priority: EventPriority, max_items: int, max_wait: float
+    ) -> list[QueuedEvent]:
+        """
+        Removes and returns the events of a type from the front of a lane, stops at the
+        first event of another type so the order of the lane is kept
+
+        Args:
+            event (str): The event type to take from the queue
+            priority (EventPriority): The lane to take the events from
+            max_items (int): The maximum amount of events to return
+            max_wait (float): Seconds to wait for more events while the queue is empty
+        """
+        batch = list[QueuedEvent]()
+        deadline = asyncio.get_running_loop().time() + max_wait
+
+        async with self._changed:
+            while len(batch) < max_items:
+                if self._size == 0:
+                    timeout = deadline - asyncio.get_running_loop().time()
+                    if timeout <= 0:
+                        break
+
+                    try:
+                        await asyncio.wait_for(
+                            self._changed.wait_for(lambda: self._size > 0), timeout
+                        )
+                    except asyncio.TimeoutError:
+                        break
+
+                # Dont hold back events that arrived in other lanes
+                if self._lane_sizes[priority] == 0 or self.__peek(priority).name != event:
+                    break
+
+                batch.append(self.__pop(priority))
+
+            self._changed.notify_all()
+
+        return batch
+
+    def drain(self) -> list[QueuedEvent]:
+        """
+        Removes and returns every queued event without waiting, lane by lane from the
+        highest priority. Only safe once nothing dispatches from the queue anymore
+        """
+        events = list[QueuedEvent]()
+        for priority in EventPriority:
+            while self._lane_sizes[priority]:
+                events.append(self.__pop(priority))
+
+        return events
+
+    def __next_lane(self) -> EventPriority:
+        lanes = [p for p in EventPriority if self._lane_sizes[p]]
+        if len(lanes) == 1:
+            return lanes[0]
+
+        # Serve the lane that waited the longest once it starves
+        now = time.perf_counter()
+        oldest = min(lanes, key=lambda p: self.__peek(p).queued_at)
+        if now - self.__peek(oldest).queued_at > self.starvation_timeout:
+            self.metrics.starvation_promotions += 1
+            return oldest
+
+        # Smooth weighted round robin, every lane earns its weight and the richest lane
+        # goes next and pays the total, this interleaves lanes instead of serving in bursts
+        total = 0
+        for p in lanes:
+            weight = self.lane_weights.get(p, 1)
+            self._lane_credit[p] += weight
+            total += weight
+
+        lane = max(lanes, key=lambda p: self._lane_credit[p])
+        self._lane_credit[lane] -= total
+        return lane
+
+    def __peek(self, priority: EventPriority) -> QueuedEvent:
+        lane = self._lanes[priority]
+        while lane[0].dropped:
+            lane.popleft()
+            self._tombstones -= 1
+
+        return lane[0]
+
+    def __pop(self, priority: EventPriority) -> QueuedEvent:
+        event = self.__peek(priority)
+        self._lanes[priority].popleft()
+        self._lane_sizes[priority] -= 1
+
+        # Events can be queued in another lane than the one of their policy, so the
+        # oldest event of the type isnt necessarily the one that was taken from this lane
+        by_event = self._by_event[event.name]
+        if by_event[0] is event:
+            by_event.popleft()
+        else:
+            del by_event[next(i for i, e in enumerate(by_event) if e is event)]
+        if not by_event:
+            del self._by_event[event.name]
+
+        if event.coalesce_key is not None:
+            self._coalescable.pop((event.name, event.coalesce_key), None)
+
+        self._size -= 1
+
+        return event
+
+    def __coalesce(self, policy: EventPolicy, queued: QueuedEvent, new: QueuedEvent) -> None:
+        if policy.coalesce_merge:
+            queued.args = policy.coalesce_merge(queued.args, new.args)
+        else:
+            queued.args = new.args
+
+        queued.kwargs = new.kwargs
+        self.metrics.coalesced += 1
+
+    def __drop_oldest(self, event: str) -> None:
+        # The dropped event stays in its lane until get reaches it or the lanes are
+        # compacted, so dropping doesnt have to search the lane
+        oldest = self._by_event[event].popleft()
+        oldest.dropped = True
+
+        if oldest.coalesce_key is not None:
+            self._coalescable.pop((event, oldest.coalesce_key), None)
+
+        assert oldest.priority is not None
+        self._lane_sizes[oldest.priority] -= 1
+        self._size -= 1
+        self._tombstones += 1
+        self.metrics.dropped += 1
+
+        # Compact once most of the queue is dropped events so a stalled queue stays bounded
+        if self._tombstones > self._size:
+            for p, lane in self._lanes.items():
+                self._lanes[p] = collections.deque(e for e in lane if not e.dropped)
+            self._tombstones = 0
+
+        # A storm can drop thousands of events, dont log every one of them
+        if self.metrics.dropped % 1000 == 1:
+            log.warning(
+                "Guild event queue is full, dropped oldest event {event}, {count} dropped total",
+                event=event,
+                count=self.metrics.dropped,
+            )
@@ -0,0 +1,184 @@
+"""
+This module persists the guild queue events that are left when the messenger closes,
+discord objects are stored as their ids and looked up again when the events are loaded
+"""
+
+import asyncio
+import json
+import os
+import typing as t
+from pathlib import Path
+
+import discord
+
+from bot.messaging.event_policy import EventPriority
+from bot.messaging.event_queue import QueuedEvent
+from bot.utils.logging_utils import get_logger
+from bot.utils.memory_profile import get_or_fetch_member
+
+log = get_logger(__name__)
+
+# File under the bots data dir that queued events are persisted to on shutdown
+QUEUED_EVENTS_FILE = "queued_events.json"
+
+
+class UnpersistableError(Exception):
+    """An event arg that cant be stored as ids or cant be looked up again"""
+
+
+class EventStore(t.Protocol):
+    async def save(self, events: list[tuple[int, QueuedEvent]]) -> int:
+        """Persists the events and returns how many of them were persisted"""
+        ...
+
+    async def load(self) -> list[tuple[int, QueuedEvent]]:
+        """Returns and forgets the persisted events"""
+        ...
+
+
+class QueuedEventStore:
+    """
+    Stores queued events in a json file of their guild id, event name, priority and args
+
+    Args are stored as the ids of the discord objects they are, when loading the objects
+    are taken from the bots cache as they are then. Members and users that arent cached
+    under a lean memory profile are fetched. Events with args that arent discord objects
+    or primitives, like raw gateway payloads, are not persisted
+    """
+
+    def __init__(self, path: Path | str, bot: discord.Client) -> None:
+        self.path = Path(path)
+        self.bot = bot
+
+    async def save(self, events: list[tuple[int, QueuedEvent]]) -> int:
+        entries = list[dict[str, t.Any]]()
+        for guild_id, event in events:
+            try:
+                entries.append(
+                    {
+                        "guild_id": guild_id,
+                        "event": event.name,
+                        "priority": event.priority.value if event.priority else None,
+                        "args": [self.__dump(a) for a in event.args],
+                        "kwargs": {k: self.__dump(v) for k, v in event.kwargs.items()},
+                    }
+                )
+            except UnpersistableError as e:
+                log.warning(
+                    "Not persisting queued event {event}: {error}", event=event.name, error=e
+                )
+
+        await asyncio.to_thread(self.__write, entries)
+        return len(entries)
+
+    async def load(self) -> list[tuple[int, QueuedEvent]]:
+        entries = await asyncio.to_thread(self.__read)
+
+        events = list[tuple[int, QueuedEvent]]()
+        skipped = 0
+        for entry in entries:
+            try:
+                args = tuple([await self.__restore(a) for a in entry["args"]])
+                kwargs = {k: await self.__restore(v) for k, v in entry["kwargs"].items()}
+            except (UnpersistableError, discord.HTTPException) as e:
+                log.warning(
+                    "Skipping persisted event {event}: {error}", event=entry["event"], error=e
+                )
+                skipped += 1
+                continue
+
+            priority = EventPriority(entry["priority"]) if entry["priority"] else None
+            events.append(
+                (entry["guild_id"], QueuedEvent(entry["event"], args, kwargs, priority=priority))
+            )
+
+        if skipped:
+            log.warning(
+                "Dropped {skipped} of {count} persisted events whose args couldnt be restored",
+                skipped=skipped,
+                count=len(entries),
+            )
+
+        return events
+
+    def __write(self, entries: list[dict[str, t.Any]]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temp file first so a kill mid write cant leave a corrupt file
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+
+        os.replace(tmp_path, self.path)
+
+    def __read(self) -> list[dict[str, t.Any]]:
+        if not self.path.exists():
+            return []
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = t.cast(list[dict[str, t.Any]], json.load(f))
+        except json.JSONDecodeError:
+            log.warning("Discarding corrupt queued event file {path}", path=str(self.path))
+            entries = []
+
+        # The events are queued again, dont replay them a second time on the next start
+        self.path.unlink()
+
+        return entries
+
+    def __dump(self, arg: t.Any) -> dict[str, t.Any]:
+        match arg:
+            case None | bool() | int() | float() | str():
+                return {"value": arg}
+            case discord.Member():
+                return {"member": [arg.guild.id, arg.id]}
+            case discord.User():
+                return {"user": arg.id}
+            case discord.Role():
+                return {"role": [arg.guild.id, arg.id]}
+            case discord.Guild():
+                return {"guild": arg.id}
+            case discord.Thread() | discord.abc.GuildChannel():
+                return {"channel": arg.id}
+            case discord.Reaction():
+                return {"reaction": [arg.message.channel.id, arg.message.id, str(arg.emoji)]}
+            case _:
+                raise UnpersistableError(f"Cant persist arg of type {type(arg).__name__}")
+
+    async def __restore(self, dumped: dict[str, t.Any]) -> t.Any:
+        ((kind, value),) = dumped.items()
+
+        restored: t.Any = None
+        match kind:
+            case "value":
+                return value
+            case "member":
+                if guild := self.bot.get_guild(value[0]):
+                    restored = await get_or_fetch_member(guild, value[1])
+            case "user":
+                restored = self.bot.get_user(value) or await self.bot.fetch_user(value)
+            case "role":
+                guild = self.bot.get_guild(value[0])
+                restored = guild and guild.get_role(value[1])
+            case "guild":
+                restored = self.bot.get_guild(value)
+            case "channel":
+                restored = self.bot.get_channel(value)
+            case "reaction":
+                restored = await self.__restore_reaction(*value)
+
+        if restored is None:
+            raise UnpersistableError(f"{kind} {value} no longer exists")
+
+        return restored
+
+    async def __restore_reaction(
+        self, channel_id: int, message_id: int, emoji: str
+    ) -> discord.Reaction | None:
+        channel = self.bot.get_channel(channel_id)
+        if not isinstance(channel, discord.abc.Messageable):
+            return None
+
+        message = await channel.fetch_message(message_id)
+        return discord.utils.find(lambda r: str(r.emoji) == emoji, message.reactions)
@@ -3,6 +3,23 @@ This module is to define all application level events in one place
 to avoid attempting to remember string event names
 """
 
+from bot.messaging.event_policy import (
+    DispatchMode,
+    EventPolicy,
+    EventPriority,
+    OverflowPolicy,
+    event_policy,
+    first_arg_id,
+    merge_before_after,
+)
+
+# Keeps only the latest state per discord object in a guild queue
+COALESCE_BEFORE_AFTER = EventPolicy(
+    overflow=OverflowPolicy.coalesce,
+    coalesce_key=first_arg_id,
+    coalesce_merge=merge_before_after,
+)
+
 
 class EventsMeta(type):
     """Class that defines what events are exposed at the bot level"""
@@ -20,6 +37,7 @@ class EventsMeta(type):
         return "on_example"
 
     @property
+    @event_policy(EventPolicy(dispatch=DispatchMode.concurrent))
     def on_guild_message_received(self) -> str:
         """
         Published whenever a message is sent in a server
@@ -85,6 +103,7 @@ class EventsMeta(type):
         return "on_message_delete"
 
     @property
+    @event_policy(EventPolicy(dispatch=DispatchMode.concurrent, priority=EventPriority.low))
     def on_reaction_add(self) -> str:
         """
         Published whenever a reaction is sent in a server, and that message is stored
@@ -98,6 +117,7 @@ class EventsMeta(type):
         return "on_reaction_add"
 
     @property
+    @event_policy(EventPolicy(priority=EventPriority.low))
     def on_raw_reaction_add(self) -> str:
         """
         Called when a message has a reaction added. regardless of cache state
@@ -109,6 +129,7 @@ class EventsMeta(type):
         return "on_raw_reaction_add"
 
     @property
+    @event_policy(EventPolicy(priority=EventPriority.low))
     def on_reaction_remove(self) -> str:
         """
         Published whenever a reaction is removed in a server, and that message is stored
@@ -122,6 +143,7 @@ class EventsMeta(type):
         return "on_reaction_remove"
 
     @property
+    @event_policy(EventPolicy(priority=EventPriority.low))
     def on_raw_reaction_remove(self) -> str:
         """
         Called when a message has a reaction removeed. regardless of cache state
@@ -214,6 +236,7 @@ class EventsMeta(type):
         return "on_guild_role_delete"
 
     @property
+    @event_policy(EventPolicy(priority=EventPriority.high))
     def on_initial_user_join(self) -> str:
         """
         Published whenever a new user joins a guild
@@ -236,6 +259,7 @@ class EventsMeta(type):
         return "on_user_joined_initialized"
 
     @property
+    @event_policy(EventPolicy(priority=EventPriority.high))
     def on_user_removed(self) -> str:
         """
         Published whenever a user leaves a guild
@@ -321,6 +345,29 @@ class EventsMeta(type):
         """
         return "on_set_custom_prefix"
 
+    @property
+    def on_set_custom_tag_prefix(self) -> str:
+        """
+        Published when a new custom tag prefix is set in a guild
+
+        Args:
+
+            guild (discord.Guild): The guild object of the set tag prefix
+            tag_prefix (str): The tag prefix that was set
+        """
+        return "on_set_custom_tag_prefix"
+
+    @property
+    def on_designated_channels_update(self) -> str:
+        """
+        Published when a channel is added to or removed from a designated channel in a guild
+
+        Args:
+
+            guild (discord.Guild): The guild whose designated channels changed
+        """
+        return "on_designated_channels_update"
+
     @property
     def on_set_deletable(self) -> str:
         """
@@ -354,6 +401,7 @@ class EventsMeta(type):
         return "on_guild_channel_delete"
 
     @property
+    @event_policy(COALESCE_BEFORE_AFTER)
     def on_guild_channel_update(self) -> str:
         """
         Published when a text channel is edited
@@ -393,6 +441,7 @@ class EventsMeta(type):
         return "on_set_pageable_embed"
 
     @property
+    @event_policy(COALESCE_BEFORE_AFTER)
     def on_member_update(self) -> str:
         """
         This is called when one or more of the following things change:
@@ -478,6 +527,7 @@ class EventsMeta(type):
         return "on_bot_ban"
 
     @property
+    @event_policy(EventPolicy(priority=EventPriority.high))
     def on_member_ban(self) -> str:
         """
         Published when a user is banned with clembot
@@ -549,6 +599,25 @@ class EventsMeta(type):
         """
         return "on_claims_check"
 
+    @property
+    def on_backend_connect(self) -> str:
+        """
+        Published when the bot (re)connects to ClemBot.Api
+
+        Args:
+
+            None
+        """
+        return "on_backend_connect"
+
 
 class Events(metaclass=EventsMeta):
     pass
+
+
+# Maps every event that declares a policy to its policy
+EVENT_POLICIES: dict[str, EventPolicy] = {
+    prop.fget(Events): getattr(prop.fget, "__event_policy__")
+    for prop in vars(EventsMeta).values()
+    if isinstance(prop, property) and prop.fget and hasattr(prop.fget, "__event_policy__")
+}
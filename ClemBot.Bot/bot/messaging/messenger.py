@@ -1,66 +1,257 @@
 import asyncio
 import dataclasses
 import inspect
+import logging
+import time
 import traceback
+import types
 import typing as t
 import weakref as wr
 
+from bot.messaging.event_metrics import CallMetrics, EventBusMetrics
+from bot.messaging.event_policy import (
+    DEFAULT_EVENT_POLICY,
+    DispatchMode,
+    EventPolicy,
+    EventPriority,
+)
+from bot.messaging.event_queue import EventQueueMetrics, GuildEventQueue, QueuedEvent
+from bot.messaging.event_store import EventStore
+from bot.messaging.events import EVENT_POLICIES
 from bot.utils.logging_utils import get_logger
 
 log = get_logger(__name__)
 
+# Amount of workers that dispatch the events of all guild queues
+QUEUE_WORKERS = 8
 
-@dataclasses.dataclass
-class QueuedEvent:
-    name: str
-    args: tuple[t.Any, ...]
-    kwargs: dict[str, t.Any]
+# Seconds a guild queue can stay empty before it is removed
+QUEUE_IDLE_TIMEOUT = 300.0
+
+# Seconds close waits for the guild queues to empty before the rest is persisted
+QUEUE_DRAIN_TIMEOUT = 20.0
+
+# Default maximum amount of events in a batch and seconds to wait for them
+BATCH_MAX_ITEMS = 100
+BATCH_MAX_WAIT = 0.05
 
 
 @dataclasses.dataclass
-class DispatchQueue:
-    task: asyncio.Task[t.Any]
-    cancelled: bool = False
+class DrainMetrics:
+    # Events dispatched while closing
+    drained: int = 0
+
+    # Events still queued at the drain deadline that were written to the event store
+    persisted: int = 0
+
+    # Events still queued at the drain deadline that were lost
+    dropped: int = 0
+
+    # Persisted events that were queued again on startup
+    replayed: int = 0
+
+    # Events that were published to the queue after close
+    rejected: int = 0
+
+
+@dataclasses.dataclass(frozen=True)
+class Subscription:
+    ref: wr.ReferenceType[t.Any]
+    metrics: CallMetrics
+
+
+@dataclasses.dataclass(frozen=True)
+class BatchSubscription(Subscription):
+    max_items: int
+    max_wait: float
 
 
 class Messenger:
     """The global message bus that handles all application level events"""
 
-    def __init__(self, name: str | None = None):
+    def __init__(
+        self,
+        name: str | None = None,
+        *,
+        queue_workers: int = QUEUE_WORKERS,
+        queue_idle_timeout: float = QUEUE_IDLE_TIMEOUT,
+        drain_timeout: float = QUEUE_DRAIN_TIMEOUT,
+        event_store: EventStore | None = None,
+    ):
         log.info("New messenger created with name: {name}", name=name)
         self.name = name
-        self._events = dict[str, list[wr.ReferenceType[t.Any]]]()
+        self._events = dict[str, list[Subscription]]()
+
+        # Immutable snapshot of the listeners of every event that is dispatched from, this is
+        # only rebuilt when listeners change so dispatching an event doesnt allocate
+        self._listeners = dict[str, tuple[Subscription, ...]]()
+
+        # Listeners that get the queued events of a guild in batches, compiled the same way
+        self._batch_events = dict[str, list[BatchSubscription]]()
+        self._batch_listeners = dict[str, tuple[BatchSubscription, ...]]()
 
         # Error callback to report exceptions in queued events back to
         self.error_callback: t.Callable[..., t.Any] | None = None
 
-        self._guild_event_queue = dict[int, asyncio.Queue[QueuedEvent]]()
+        self._guild_event_queue = dict[int, GuildEventQueue]()
+
+        # The combined metrics of the queues that were reclaimed
+        self._reclaimed_queue_metrics = EventQueueMetrics()
+
+        self.queue_workers = queue_workers
+        self.queue_idle_timeout = queue_idle_timeout
+
+        # Guilds with queued events waiting for a worker, in round robin order. A guild is
+        # in here at most once and never while a worker dispatches one of its events,
+        # that way the events of a guild are always dispatched in order
+        self._ready_guilds = asyncio.Queue[int]()
+
+        # Guilds that are either in the ready queue or being dispatched by a worker
+        self._scheduled_guilds = set[int]()
 
-        self._queue_dispatch_tasks = dict[int, DispatchQueue]()
+        # The last time an event was queued for or dispatched from a guild queue
+        self._guild_last_active = dict[int, float]()
+
+        self._queue_workers = list[asyncio.Task[None]]()
+        self._queue_reaper: asyncio.Task[None] | None = None
+
+        # Where events that are still queued at the drain deadline of close are kept
+        # until they are replayed, without one they are dropped
+        self.drain_timeout = drain_timeout
+        self.event_store = event_store
+        self.drain_metrics = DrainMetrics()
+
+        # Set by close, events published to the queue after that would restart the workers
+        self.closed = False
+
+        # How each event is dispatched, events without a policy use the default policy
+        self.event_policies = dict[str, EventPolicy](EVENT_POLICIES)
+
+        self.metrics = EventBusMetrics()
+
+    @property
+    def guild_queues(self) -> t.Mapping[int, GuildEventQueue]:
+        """Read only view of the event queue of every guild that has one"""
+        return types.MappingProxyType(self._guild_event_queue)
+
+    def queue_metrics(self) -> EventQueueMetrics:
+        """Gets the metrics of every guild queue combined, including reclaimed queues"""
+        metrics = EventQueueMetrics()
+        metrics.merge(self._reclaimed_queue_metrics)
+        for queue in self._guild_event_queue.values():
+            metrics.merge(queue.metrics)
+
+        return metrics
 
     def subscribe(self, event: str, callback: t.Callable[..., t.Awaitable[t.Any]]) -> None:
         """Subscribes a method as a callback listener to a given event"""
         if not asyncio.iscoroutinefunction(callback):
             raise TypeError("A given messenger callback must be awaitable")
 
-        weak_ref = self.__get_weak_ref(callback)
+        weak_ref = self.__get_weak_ref(
+            obj=callback, on_dead=lambda r: self.__remove_dead_ref(event, r)
+        )
+        subscription = Subscription(weak_ref, self.metrics.listener(event, callback))
         if event in self._events.keys():
-            self._events[event].append(weak_ref)
+            self._events[event].append(subscription)
         else:
             log.info(
                 "Registering new event: {event} to Messenger: {name}",
                 event=str(event),
                 name=self.name,
             )
-            self._events[event] = [weak_ref]
+            self._events[event] = [subscription]
+
+        self.__compile_listeners(event)
 
         log.info(
             "Registering listener {callback} to event: {event} in Messenger: {name}",
-            callback=str(weak_ref.__callback__),
+            callback=str(callback),
+            event=str(event),
+            name=self.name,
+        )
+
+    def unsubscribe(self, event: str, callback: t.Callable[..., t.Awaitable[t.Any]]) -> None:
+        """Removes a callback listener from a given event, does nothing if it isnt subscribed"""
+        if event not in self._events:
+            return
+
+        self._events[event] = [s for s in self._events[event] if s.ref() != callback]
+        self.__compile_listeners(event)
+
+        log.info(
+            "Removed listener {callback} from event: {event} in Messenger: {name}",
+            callback=str(callback),
             event=str(event),
             name=self.name,
         )
 
+    def subscribe_batch(
+        self,
+        event: str,
+        callback: t.Callable[[list[tuple[t.Any, ...]]], t.Awaitable[t.Any]],
+        *,
+        max_items: int = BATCH_MAX_ITEMS,
+        max_wait: float = BATCH_MAX_WAIT,
+    ) -> None:
+        """
+        Subscribes a method as a batch listener to a given event, the listener is invoked
+        with a list of the args of each event instead of once per event
+
+        Queued events of the same type that directly follow each other in a guild queue are
+        dispatched as one batch, an event published with publish is a batch of one
+
+        Args:
+            event (str): The event to listen to
+            callback (Callable): The listener that receives the list of event args
+            max_items (int): The maximum amount of events in one batch
+            max_wait (float): Seconds to wait for more events when the guild queue is empty
+        """
+        if not asyncio.iscoroutinefunction(callback):
+            raise TypeError("A given messenger callback must be awaitable")
+
+        weak_ref = self.__get_weak_ref(
+            obj=callback, on_dead=lambda r: self.__remove_dead_batch_ref(event, r)
+        )
+        self._batch_events.setdefault(event, []).append(
+            BatchSubscription(weak_ref, self.metrics.listener(event, callback), max_items, max_wait)
+        )
+        self.__compile_batch_listeners(event)
+
+        log.info(
+            "Registering batch listener {callback} to event: {event} in Messenger: {name}",
+            callback=str(callback),
+            event=str(event),
+            name=self.name,
+        )
+
+    def __compile_listeners(self, event: str) -> None:
+        self._listeners[event] = tuple(self._events[event])
+
+    def __compile_batch_listeners(self, event: str) -> None:
+        self._batch_listeners[event] = tuple(self._batch_events[event])
+
+    def __remove_dead_batch_ref(self, event: str, ref: wr.ReferenceType[t.Any]) -> None:
+        subscriptions = self._batch_events.get(event)
+        if subscriptions is None:
+            return
+
+        self._batch_events[event] = [s for s in subscriptions if s.ref is not ref]
+        self.__compile_batch_listeners(event)
+
+        log.info("Deleted dead batch reference in Event: {event}", event=event)
+
+    def __remove_dead_ref(self, event: str, ref: wr.ReferenceType[t.Any]) -> None:
+        listeners = self._events.get(event)
+        if listeners is None:
+            return
+
+        # The same callback can be subscribed more than once, only remove this reference
+        self._events[event] = [s for s in listeners if s.ref is not ref]
+        self.__compile_listeners(event)
+
+        log.info("Deleted dead reference in Event: {event}", event=event)
+
     async def publish(self, event: str, *args: t.Any, **kwargs: t.Any) -> None:
         """
         Immediately publishes an event to listeners with given args onto the global message bus
@@ -69,138 +260,394 @@ class Messenger:
         Args:
             event (str): The event invoke the listeners on
         """
-        log.info("Received published event: {event}", event=str(event))
         await self.__publish(event, *args, **kwargs)
 
     async def publish_to_queue(
-        self, event: str, guild_id: int, *args: t.Any, **kwargs: t.Any
+        self,
+        event: str,
+        guild_id: int,
+        *args: t.Any,
+        priority: EventPriority | None = None,
+        **kwargs: t.Any,
     ) -> None:
         """
         Publishes an event to listeners with given args onto the guild message queue
 
         Args:
             event (str): The event invoke the listeners on
+            priority (EventPriority, optional): The lane to queue the event in.
+            Defaults to the priority of the events policy.
         """
-        log.info("Received published to queue event: {event}", event=str(event))
-        await self.__add_to_queue(event, guild_id, *args, **kwargs)
+        if self.closed:
+            self.drain_metrics.rejected += 1
+            log.warning(
+                "Dropping event {event} published to the queue of closed Messenger: {name}",
+                event=str(event),
+                name=self.name,
+            )
+            return
+
+        await self.__add_to_queue(event, guild_id, priority, *args, **kwargs)
 
     async def close(self) -> None:
         """
-        Sets all dispatch tasks to a cancellation state and clears the task dictionary
+        Waits up to the drain timeout for every queued event to be dispatched and then stops
+        the queue workers, events that are still queued after that go to the event store
         """
+        self.closed = True
+
+        queued = sum(q.qsize() for q in self._guild_event_queue.values())
         log.info(
-            "Gracefully closing all dispatch tasks with ids: {tasks}",
-            tasks=list(self._queue_dispatch_tasks.keys()),
+            "Gracefully closing {count} queue workers with {queued} queued events",
+            count=len(self._queue_workers),
+            queued=queued,
         )
 
-        for guild_id, dispatch_task in self._queue_dispatch_tasks.items():
+        # Wait for all queued events to be dispatched
+        timed_out = False
+        if self._queue_workers:
+            try:
+                await asyncio.wait_for(self._ready_guilds.join(), self.drain_timeout)
+            except asyncio.TimeoutError:
+                timed_out = True
+
+        tasks = [*self._queue_workers, *([self._queue_reaper] if self._queue_reaper else [])]
+        for task in tasks:
+            task.cancel()
 
-            # Check if the event queue contains events to send, if it does not we can cancel the task
-            if self._guild_event_queue[guild_id].qsize() == 0:
-                dispatch_task.task.cancel()
-                continue
+        await asyncio.gather(*tasks, return_exceptions=True)
 
-            # Set the task to exit as soon as all events have cleared the queue
-            dispatch_task.cancelled = True
+        self._queue_workers.clear()
+        self._queue_reaper = None
 
-        # Wait for all dispatch tasks to exit gracefully
-        await asyncio.gather(*[task.task for task in self._queue_dispatch_tasks.values()])
+        leftovers = list[tuple[int, QueuedEvent]]()
+        if timed_out:
+            leftovers = [(g, e) for g, q in self._guild_event_queue.items() for e in q.drain()]
 
-        self._queue_dispatch_tasks.clear()
+            # Nothing is scheduled anymore
+            self._ready_guilds = asyncio.Queue[int]()
+            self._scheduled_guilds.clear()
+
+        self.drain_metrics.drained += queued - len(leftovers)
+
+        if leftovers:
+            await self.__persist(leftovers)
 
         log.info("All messenger tasks cancelled successfully")
 
+    async def replay_persisted(self) -> int:
+        """
+        Queues the events that were persisted when the last close hit its drain deadline
+
+        Returns:
+            int: The amount of replayed events
+        """
+        if not self.event_store:
+            return 0
+
+        events = await self.event_store.load()
+        for guild_id, event in events:
+            await self.__add_to_queue(
+                event.name, guild_id, event.priority, *event.args, **event.kwargs
+            )
+
+        self.drain_metrics.replayed += len(events)
+
+        if events:
+            log.info("Replayed {count} persisted queued events", count=len(events))
+
+        return len(events)
+
+    async def __persist(self, leftovers: list[tuple[int, QueuedEvent]]) -> None:
+        persisted = 0
+        if self.event_store:
+            try:
+                persisted = await self.event_store.save(leftovers)
+            except Exception as e:
+                await self.__report_error(e, traceback.format_exc())
+
+        self.drain_metrics.persisted += persisted
+        self.drain_metrics.dropped += len(leftovers) - persisted
+
+        log.warning(
+            "Drain deadline of {timeout} seconds passed, persisted {persisted} "
+            "and dropped {dropped} queued events",
+            timeout=self.drain_timeout,
+            persisted=persisted,
+            dropped=len(leftovers) - persisted,
+        )
+
     async def __publish(self, event: str, *args: t.Any, **kwargs: t.Any) -> None:
-        if event in self._events.keys():
-            listeners = self._events[event]
-            for i, sub in enumerate(listeners):
-                if sub._alive:  # type: ignore
-                    log.info(
-                        "Invoking listener: {sub} on event {event} in Messenger: {name}",
-                        sub=str(sub),
-                        event=str(event),
-                        name=self.name,
-                    )
-                    await sub()(*args, **kwargs)  # type: ignore
+        await self.__publish_listeners(event, *args, **kwargs)
+
+        if event in self._batch_listeners:
+            await self.__publish_batch(event, [args])
+
+    async def __publish_listeners(self, event: str, *args: t.Any, **kwargs: t.Any) -> None:
+        policy = self.event_policies.get(event, DEFAULT_EVENT_POLICY)
+        event_metrics = self.metrics.event(event)
+        start = time.perf_counter()
+
+        try:
+            if policy.dispatch is not DispatchMode.sequential:
+                # Listener errors are reported without raising, they still count as an error
+                if await self.__publish_concurrent(event, policy, *args, **kwargs):
+                    event_metrics.errors += 1
+                return
+
+            # Dead references are removed by their weakref callbacks, a listener can still
+            # die during the dispatch though so we check the dereferenced callback
+            for sub in self._listeners.get(event, ()):
+                if (callback := sub.ref()) is None:
+                    continue
+
+                # Inlined instead of using __invoke, this is the hot path of every event
+                listener_start = time.perf_counter()
+                try:
+                    await callback(*args, **kwargs)
+                except Exception:
+                    sub.metrics.errors += 1
+                    raise
+                finally:
+                    sub.metrics.calls += 1
+                    sub.metrics.latency.observe(time.perf_counter() - listener_start)
+        except Exception:
+            event_metrics.errors += 1
+            raise
+        finally:
+            event_metrics.calls += 1
+            event_metrics.latency.observe(time.perf_counter() - start)
+
+    @staticmethod
+    async def __invoke(
+        metrics: CallMetrics, callback: t.Callable[..., t.Any], *args: t.Any, **kwargs: t.Any
+    ) -> None:
+        start = time.perf_counter()
+        try:
+            await callback(*args, **kwargs)
+        except Exception:
+            metrics.errors += 1
+            raise
+        finally:
+            metrics.calls += 1
+            metrics.latency.observe(time.perf_counter() - start)
+
+    async def __publish_concurrent(
+        self, event: str, policy: EventPolicy, *args: t.Any, **kwargs: t.Any
+    ) -> bool:
+        """Invokes the listeners of an event concurrently, returns whether any of them failed"""
+        listeners = self._listeners.get(event)
+        if not listeners:
+            return False
+
+        semaphore = None
+        if policy.dispatch is DispatchMode.bounded:
+            semaphore = asyncio.Semaphore(policy.max_concurrency)
+
+        async def invoke(sub: Subscription) -> bool:
+            callback = sub.ref()
+            if callback is None:
+                return False
+
+            try:
+                if semaphore:
+                    async with semaphore:
+                        await self.__invoke(sub.metrics, callback, *args, **kwargs)
                 else:
-                    log.info(
-                        "Deleting dead reference in Event: {event} function: {sub}",
-                        event=str(event),
-                        sub=str(sub),
-                    )
-                    del listeners[i]
+                    await self.__invoke(sub.metrics, callback, *args, **kwargs)
+            except Exception as e:
+                # Isolate the error to this listener so the other listeners still complete
+                await self.__report_error(e, traceback.format_exc())
+                return True
+
+            return False
+
+        return any(await asyncio.gather(*(invoke(sub) for sub in listeners)))
+
+    async def __publish_batch(self, event: str, batch: list[tuple[t.Any, ...]]) -> None:
+        for sub in self._batch_listeners.get(event, ()):
+            if (callback := sub.ref()) is None:
+                continue
+
+            for i in range(0, len(batch), sub.max_items):
+                await self.__invoke(sub.metrics, callback, batch[i : i + sub.max_items])
+
+    async def __report_error(self, e: Exception, tb: str) -> None:
+        # Check if we have an error callback to report the error too
+        if self.error_callback:
+            # pylint: disable=E1102
+            await self.error_callback(e, traceback=tb)
+        else:
+            log.exception(
+                "No error callback set in messenger {messenger} for error {error}",
+                messenger=self.name,
+                error=e,
+            )
 
     async def __add_to_queue(
-        self, event: str, guild_id: int, *args: t.Any, **kwargs: t.Any
+        self,
+        event: str,
+        guild_id: int,
+        priority: EventPriority | None,
+        *args: t.Any,
+        **kwargs: t.Any,
     ) -> None:
+        self.__start_queue_workers()
+
+        # Mark the guild as active before waiting on the queue so it isnt reclaimed under us
+        self._guild_last_active[guild_id] = asyncio.get_running_loop().time()
 
         # Check if the guild_id is the in the queue dict, if it's not we need to create the queue first
         if guild_id not in self._guild_event_queue:
             log.info("Creating guild event queue for guild {guild}", guild=guild_id)
-            self._guild_event_queue[guild_id] = asyncio.Queue[QueuedEvent]()
+            self._guild_event_queue[guild_id] = GuildEventQueue(self.event_policies)
 
-            # Create the polling task to dispatch events
-            task = asyncio.create_task(self.__send_guild_queue(guild_id))
+        queue = self._guild_event_queue[guild_id]
+        await queue.put(
+            QueuedEvent(event, args, kwargs, queued_at=time.perf_counter(), priority=priority)
+        )
 
-            # Add the task to the dispatch task list, so we can stop it later
-            self._queue_dispatch_tasks[guild_id] = DispatchQueue(task=task)
+        # Logged for every event, skip building the record unless it is kept
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(
+                "Added event {event} to queue {queue} with new size {size}",
+                event=event,
+                queue=guild_id,
+                size=queue.qsize(),
+            )
 
-        size = self._guild_event_queue[guild_id].qsize()
-        log.info(
-            "Added event {event} to queue {queue} with new size {size}",
-            event=event,
-            queue=guild_id,
-            size=size + 1,
-        )
+        self.__schedule_guild(guild_id)
 
-        complete_event = QueuedEvent(event, args, kwargs)
+    def __schedule_guild(self, guild_id: int) -> None:
+        # A guild that is already scheduled is rescheduled by its worker if it still has events
+        if guild_id in self._scheduled_guilds:
+            return
 
-        await self._guild_event_queue[guild_id].put(complete_event)
+        self._scheduled_guilds.add(guild_id)
+        self._ready_guilds.put_nowait(guild_id)
 
-    async def __send_guild_queue(self, guild_id: int) -> None:
+    def __start_queue_workers(self) -> None:
+        if self._queue_workers:
+            return
+
+        log.info("Starting {count} guild queue workers", count=self.queue_workers)
+        self._queue_workers = [
+            asyncio.create_task(self.__queue_worker()) for _ in range(self.queue_workers)
+        ]
+        self._queue_reaper = asyncio.create_task(self.__reclaim_idle_queues())
+
+    async def __queue_worker(self) -> None:
 
         # Loop infinitely to dispatch events
         while True:
-            event = await self._guild_event_queue[guild_id].get()
-            size = self._guild_event_queue[guild_id].qsize()
+            guild_id = await self._ready_guilds.get()
+            queue = self._guild_event_queue[guild_id]
 
-            log.info(
-                "Dispatching queued event: {event} on queue: {queue} new queue size: {size}",
-                event=event.name,
-                queue=guild_id,
-                size=size,
-            )
             try:
-                await self.__publish(event.name, *event.args, **event.kwargs)
+                # Dispatch a single event, or batch of events, before moving to the next guild
+                # so one busy guild cant starve the others
+                events = await self.__get_queued_events(queue)
+
+                now = time.perf_counter()
+                for event in events:
+                    queue.metrics.wait.observe(now - event.queued_at)
+
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug(
+                        "Dispatching {count} queued {event} on queue: {queue} "
+                        "new queue size: {size}",
+                        count=len(events),
+                        event=events[0].name,
+                        queue=guild_id,
+                        size=queue.qsize(),
+                    )
+                await self.__dispatch_queued_events(events)
             except Exception as e:
-                # Check if we have an error callback to report the error too
-                if self.error_callback:
-                    # Notify the error callback of the exception and continue attempting to dispatch events
-                    # We don't want to raise the exception further than this because
-                    # That will exit our loop and cause no more events to be dispatched
-                    tb = traceback.format_exc()
-                    # pylint: disable=E1102
-                    await self.error_callback(e, traceback=tb)
+                # The worker serves every guild, it has to outlive an error in one of them
+                await self.__report_error(e, traceback.format_exc())
+            finally:
+                self._guild_last_active[guild_id] = asyncio.get_running_loop().time()
+
+                # Put the guild at the back of the line if it has more events
+                if queue.qsize():
+                    self._ready_guilds.put_nowait(guild_id)
                 else:
-                    log.exception(
-                        "No error callback set in messenger {messenger} for error {error}",
-                        messenger=self.name,
-                        error=e,
-                    )
+                    self._scheduled_guilds.discard(guild_id)
 
-            # Check if the task has been cancelled AFTER we have attempted to dispatch all events
-            # This is important for the tests to be deterministic
-            if (
-                self._queue_dispatch_tasks[guild_id].cancelled
-                and self._guild_event_queue[guild_id].qsize() == 0
-            ):
-                return
+                self._ready_guilds.task_done()
 
-    def __get_weak_ref(self, obj: t.Any) -> wr.WeakMethod[t.Any] | wr.ReferenceType[t.Any]:
+    async def __get_queued_events(self, queue: GuildEventQueue) -> list[QueuedEvent]:
+        event = await queue.get()
+
+        batch_listeners = self._batch_listeners.get(event.name)
+        if not batch_listeners:
+            return [event]
+
+        # Take enough events for the listener with the largest batches
+        max_items = max(s.max_items for s in batch_listeners)
+        max_wait = max(s.max_wait for s in batch_listeners)
+
+        assert event.priority is not None
+        batch = await queue.get_batch(event.name, event.priority, max_items - 1, max_wait)
+
+        return [event, *batch]
+
+    async def __dispatch_queued_events(self, events: list[QueuedEvent]) -> None:
+        # Notify the error callback of exceptions and continue attempting to dispatch events
+        # We don't want to raise the exception further than this because
+        # That will exit our loop and cause no more events to be dispatched
+        for event in events:
+            try:
+                await self.__publish_listeners(event.name, *event.args, **event.kwargs)
+            except Exception as e:
+                await self.__report_error(e, traceback.format_exc())
+
+        if events[0].name not in self._batch_listeners:
+            return
+
+        try:
+            await self.__publish_batch(events[0].name, [e.args for e in events])
+        except Exception as e:
+            await self.__report_error(e, traceback.format_exc())
+
+    async def __reclaim_idle_queues(self) -> None:
+        while True:
+            await asyncio.sleep(self.queue_idle_timeout / 2)
+            self.reclaim_idle_queues()
+
+    def reclaim_idle_queues(self) -> int:
+        """
+        Removes the queues of guilds that had no events for longer than the idle timeout
+
+        Returns:
+            int: The amount of removed queues
+        """
+        now = asyncio.get_running_loop().time()
+        idle = [
+            guild_id
+            for guild_id, queue in self._guild_event_queue.items()
+            if guild_id not in self._scheduled_guilds
+            and queue.qsize() == 0
+            and now - self._guild_last_active.get(guild_id, now) >= self.queue_idle_timeout
+        ]
+
+        for guild_id in idle:
+            self._reclaimed_queue_metrics.merge(self._guild_event_queue.pop(guild_id).metrics)
+            self._guild_last_active.pop(guild_id, None)
+
+        if idle:
+            log.info("Reclaimed {count} idle guild event queues", count=len(idle))
+
+        return len(idle)
+
+    def __get_weak_ref(
+        self, *, obj: t.Any, on_dead: t.Callable[[wr.ReferenceType[t.Any]], None]
+    ) -> wr.WeakMethod[t.Any] | wr.ReferenceType[t.Any]:
         """
         Get a weak reference to obj. If obj is a bound method, a WeakMethod
         object, that behaves like a WeakRef, is returned; if it is
-        anything else a WeakRef is returned.
+        anything else a WeakRef is returned. on_dead is called once obj
+        is garbage collected
         """
 
         create_ref: t.Any
@@ -209,4 +656,7 @@ class Messenger:
         else:
             create_ref = wr.ref
 
-        return t.cast((wr.WeakMethod[t.Any] | wr.ReferenceType[t.Any]), create_ref(obj))
+        return t.cast(
+            (wr.WeakMethod[t.Any] | wr.ReferenceType[t.Any]),
+            create_ref(obj, on_dead),
+        )
@@ -1,6 +1,13 @@
+from enum import Enum
+
 from bot.models.clem_bot_model import ClemBotModel
 
 
+class CommandRestrictionType(str, Enum):
+    white_list = "WhiteList"
+    black_list = "BlackList"
+
+
 class BlackListCommandModel(ClemBotModel):
     channel_id: int
     silently_fail: bool
@@ -18,3 +25,10 @@ class CommandStatusModel(ClemBotModel):
 
     disabled: bool
     silently_fail: bool | None
+
+
+class CommandRestrictionModel(ClemBotModel):
+    command_name: str
+    channel_id: int | None
+    restriction_type: CommandRestrictionType
+    silently_fail: bool | None
@@ -3,6 +3,7 @@ import inspect
 import typing as t
 
 from bot.clem_bot import ClemBot
+from bot.messaging.messenger import BATCH_MAX_ITEMS, BATCH_MAX_WAIT
 
 
 class BaseService(abc.ABC):
@@ -10,8 +11,13 @@ class BaseService(abc.ABC):
     This is the base service class that all services must inherit from
     The bot reflects over itself at runtime and loads all instances with
     this class as a base class
+
+    Services load concurrently, a service that needs another service to have finished
+    loading first names its class in depends_on, it isnt loaded if that service failed
     """
 
+    depends_on: t.ClassVar[list[str]] = []
+
     def __init__(self, bot: ClemBot) -> None:
         self.bot: ClemBot = bot
         self.messenger = bot.messenger
@@ -22,6 +28,11 @@ class BaseService(abc.ABC):
                 event = getattr(value, "__event_listener__")
             if event:
                 self.bot.messenger.subscribe(event, value)
+            if hasattr(value, "__batch_event_listener__"):
+                event, max_items, max_wait = getattr(value, "__batch_event_listener__")
+                self.bot.messenger.subscribe_batch(
+                    event, value, max_items=max_items, max_wait=max_wait
+                )
 
     @abc.abstractmethod
     async def load_service(self) -> None:
@@ -31,6 +42,13 @@ class BaseService(abc.ABC):
         """
         pass
 
+    async def close(self) -> None:
+        """
+        Called when the bot shuts down, services that hold state in memory
+        can override this to persist it before the bot exits
+        """
+        pass
+
     @classmethod
     def listener(cls, event: str | None = None) -> t.Callable[[t.Any], t.Any]:
         """
@@ -53,3 +71,26 @@ class BaseService(abc.ABC):
             return func
 
         return wrapper
+
+    @classmethod
+    def batch_listener(
+        cls, event: str, *, max_items: int = BATCH_MAX_ITEMS, max_wait: float = BATCH_MAX_WAIT
+    ) -> t.Callable[[t.Any], t.Any]:
+        """
+        The method decorator to mark a service method as a batch listener, the method
+        is called with a list of the args of every event in the batch
+
+        Args:
+            event (str): The event that the method is subscribing too
+            max_items (int): The maximum amount of events in one batch
+            max_wait (float): Seconds to wait for more queued events before the batch is sent
+        """
+
+        def wrapper(func: t.Any) -> t.Any:
+            if not inspect.iscoroutinefunction(func):
+                raise TypeError("Listener function must be a coroutine function.")
+            func.__batch_event_listener__ = (event, max_items, max_wait)
+
+            return func
+
+        return wrapper
@@ -39,10 +39,25 @@ class ChannelHandlingService(BaseService):
     async def on_new_guild_init(self, guild: discord.Guild) -> None:
         await self.bot.guild_route.update_guild_channels(guild)
 
-    @BaseService.listener(Events.on_guild_channel_update)
-    async def channel_update(self, before: discord.TextChannel, after: discord.TextChannel) -> None:
-        if before.name != after.name:
+    @BaseService.batch_listener(Events.on_guild_channel_update)
+    async def channel_update(
+        self, updates: list[tuple[discord.TextChannel, discord.TextChannel]]
+    ) -> None:
+        renamed = {after.id: after for before, after in updates if before.name != after.name}
+
+        if len(renamed) == 1:
+            (after,) = renamed.values()
             await self.bot.channel_route.edit_channel(after.id, after.name, raise_on_error=True)
+            return
+
+        # Sync every guild with renames in one request instead of one request per channel
+        for guild in {after.guild for after in renamed.values()}:
+            log.info(
+                "Syncing {count} renamed channels in guild: {guild}",
+                count=sum(1 for c in renamed.values() if c.guild == guild),
+                guild=serializers.log_guild(guild),
+            )
+            await self.bot.guild_route.update_guild_channels(guild)
 
     async def load_service(self) -> None:
         pass
@@ -36,7 +36,7 @@ class CommandService(BaseService):
         if not ctx.command.allow_disable:
             return
 
-        if await self.bot.claim_route.check_claim_user(Claims.bypass_disabled_commands, ctx.author):
+        if await self.bot.claims_cache.has_claim(Claims.bypass_disabled_commands, ctx.author):
             return
 
         assert ctx.guild is not None
@@ -46,7 +46,7 @@ class CommandService(BaseService):
         channel_id = ctx.channel.id
         command_name = ctx.command.qualified_name
 
-        model = await self.bot.commands_route.get_status(guild_id, channel_id, command_name)
+        model = await self.bot.command_status_index.get_status(guild_id, channel_id, command_name)
 
         assert model is not None
 
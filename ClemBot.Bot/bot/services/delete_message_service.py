@@ -78,7 +78,7 @@ class DeleteMessageService(BaseService):
 
         if reaction.emoji != "🗑️" or reaction.message.id not in self.messages:
             return
-        elif await self.bot.claim_route.check_claim_user(
+        elif await self.bot.claims_cache.has_claim(
             Claims.delete_message, t.cast(discord.Member, user)
         ):
             delete = True
@@ -1,3 +1,4 @@
+import typing as t
 import uuid
 from typing import List, Optional, Union
 
@@ -11,6 +12,9 @@ from bot.utils.logging_utils import get_logger
 
 log = get_logger(__name__)
 
+# IPC topic clusters send broadcasts to the channels of the other clusters with
+BROADCAST_TOPIC = "broadcast_designated_message"
+
 
 class DesignatedChannelService(BaseService):
     def __init__(self, *, bot: ClemBot):
@@ -34,15 +38,10 @@ class DesignatedChannelService(BaseService):
             content (Union[str, discord.Embed]): The message to send
             dc_id [optional] (int) an optional callback id to associate sent dc messages at the publish site
         """
-        assigned_channel_ids = (
-            await self.bot.designated_channel_route.get_guild_designated_channel_ids(
-                guild_id, designated_name.name
-            )
+        assigned_channel_ids = await self.bot.guild_settings.designated_channel_ids(
+            guild_id, designated_name.name
         )
 
-        if assigned_channel_ids is None:
-            return
-
         sent_messages = await self._send_dc_messages(assigned_channel_ids, content)
 
         if dc_id:
@@ -69,6 +68,21 @@ class DesignatedChannelService(BaseService):
 
         await self._send_dc_messages(assigned_channel_ids, content)
 
+        # The other clusters send to the channels of the guilds they own
+        if self.bot.ipc:
+            await self.bot.ipc.publish(
+                BROADCAST_TOPIC,
+                {
+                    "channel_ids": assigned_channel_ids,
+                    "content": content if isinstance(content, str) else None,
+                    "embed": content.to_dict() if isinstance(content, discord.Embed) else None,
+                },
+            )
+
+    async def _on_ipc_broadcast(self, data: dict[str, t.Any]) -> None:
+        content = data["content"] or discord.Embed.from_dict(data["embed"])
+        await self._send_dc_messages(data["channel_ids"], content)
+
     async def _send_dc_messages(
         self, assigned_channel_ids: List[int], content: Union[str, discord.Embed]
     ) -> List[discord.Message]:
@@ -77,6 +91,11 @@ class DesignatedChannelService(BaseService):
         if len(assigned_channel_ids) > 0:
             for channel_id in assigned_channel_ids:
                 channel = self.bot.get_channel(channel_id)
+
+                # The channel is in a guild of another cluster
+                if channel is None and self.bot.ipc:
+                    continue
+
                 assert isinstance(channel, discord.TextChannel)
 
                 if isinstance(content, str):
@@ -89,4 +108,5 @@ class DesignatedChannelService(BaseService):
         return sent_messages
 
     async def load_service(self) -> None:
-        pass
+        if self.bot.ipc:
+            self.bot.ipc.handle(BROADCAST_TOPIC, self._on_ipc_broadcast)
@@ -6,6 +6,7 @@ from bot.consts import Colors, OwnerDesignatedChannels
 from bot.messaging.events import Events
 from bot.services.base_service import BaseService
 from bot.utils.logging_utils import get_logger
+from bot.utils.memory_profile import ensure_chunked
 
 log = get_logger(__name__)
 
@@ -75,6 +76,7 @@ class GuildHandlingService(BaseService):
         # Join routines to not run if the embed throws
         try:
             assert guild.owner is not None
+            await ensure_chunked(guild)
 
             guild_str = f"{self.bot.user.name} added to a new guild\n\n"
 
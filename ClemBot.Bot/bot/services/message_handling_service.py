@@ -1,8 +1,15 @@
+import asyncio
+import collections
+import dataclasses
 import datetime
 import json
 import re
-from typing import Iterable
+import time
+import traceback
+from http import HTTPStatus
+from typing import Any, Awaitable, Iterable
 
+import aiohttp
 import discord
 
 import bot.bot_secrets as bot_secrets
@@ -13,36 +20,345 @@ from bot.messaging.events import Events
 from bot.models.message_models import SingleBatchMessage, SingleBatchMessageEdit
 from bot.services.base_service import BaseService
 from bot.utils.logging_utils import get_logger
+from bot.utils.spool import Spool, SpoolRecord
 
 log = get_logger(__name__)
 
-MESSAGE_BATCH_SIZE = 20
+# File under the bots data dir that batches are spooled to before they are sent
+MESSAGE_SPOOL_FILE = "message_spool.ndjson"
+
+SPOOL_CREATE = "create"
+SPOOL_EDIT = "edit"
+
+# Max amount of messages and edits combined into one request when sending spooled batches
+SPOOL_REQUEST_MAX_SIZE = 500
+
+# Error statuses that batches are kept spooled for, sending them again can succeed.
+# Any other error means the api rejected the batch and it is dropped
+RETRIED_STATUSES = {
+    HTTPStatus.UNAUTHORIZED,
+    HTTPStatus.FORBIDDEN,
+    HTTPStatus.REQUEST_TIMEOUT,
+    HTTPStatus.TOO_MANY_REQUESTS,
+}
+
+# Times the api can answer a spooled batch with an error before the batch is dropped, so a
+# batch the api keeps failing on cant hold back every batch after it forever
+SPOOL_MAX_ATTEMPTS = 10
+
 MAX_QUOTED_CONTENT_SIZE = 1021  # 1024 - 3 (for content + '...')
 
 
+@dataclasses.dataclass
+class MessageBatchMetrics:
+    flushes: int = 0
+    failed_flushes: int = 0
+
+    # Requests the api rejected, their batches are dropped instead of sent again
+    rejected_requests: int = 0
+
+    # Spooled batches that were dropped after failing SPOOL_MAX_ATTEMPTS times
+    abandoned_batches: int = 0
+    messages_flushed: int = 0
+    edits_flushed: int = 0
+
+    # Edits that were folded into a pending message or replaced an older pending edit
+    edits_coalesced: int = 0
+    last_batch_size: int = 0
+    last_flush_latency: float = 0.0
+    max_flush_latency: float = 0.0
+    total_flush_latency: float = 0.0
+
+    @property
+    def avg_flush_latency(self) -> float:
+        return self.total_flush_latency / self.flushes if self.flushes else 0.0
+
+    @property
+    def avg_batch_size(self) -> float:
+        total = self.messages_flushed + self.edits_flushed
+        return total / self.flushes if self.flushes else 0.0
+
+
+@dataclasses.dataclass
+class SpooledRequest:
+    """Spooled batches combined into a single create and a single edit request"""
+
+    seqs: list[int] = dataclasses.field(default_factory=list)
+
+    # The batches of the creates, they are done once the create request succeeded
+    create_seqs: list[int] = dataclasses.field(default_factory=list)
+    creates: dict[int, dict[str, Any]] = dataclasses.field(default_factory=dict)
+    edits: dict[int, dict[str, Any]] = dataclasses.field(default_factory=dict)
+    coalesced: int = 0
+
+    def __len__(self) -> int:
+        return len(self.creates) + len(self.edits)
+
+
+def combine_spooled(records: list[SpoolRecord], max_size: int) -> list[SpooledRequest]:
+    """
+    Combines spooled batches into as few requests as possible. Edits of a message that is
+    created in the same request are folded into the create, and repeated edits of a
+    message only send the last one
+
+    Args:
+        records (list[SpoolRecord]): The spooled batches, oldest first
+        max_size (int): The max amount of messages and edits in a single request
+    """
+    requests = list[SpooledRequest]()
+    current = SpooledRequest()
+
+    for record in records:
+        if current.seqs and len(current) + len(record.payload) > max_size:
+            requests.append(current)
+            current = SpooledRequest()
+
+        current.seqs.append(record.seq)
+        if record.kind == SPOOL_CREATE:
+            current.create_seqs.append(record.seq)
+
+        for item in record.payload:
+            if record.kind == SPOOL_CREATE:
+                # Copy so folding edits doesnt change the record that is still in the spool
+                current.creates[item["id"]] = dict(item)
+            elif create := current.creates.get(item["id"]):
+                create["content"] = item["content"]
+                current.coalesced += 1
+            else:
+                current.coalesced += item["id"] in current.edits
+                current.edits[item["id"]] = item
+
+    if current.seqs:
+        requests.append(current)
+
+    return requests
+
+
 class MessageHandlingService(BaseService):
-    def __init__(self, *, bot: ClemBot):
+    def __init__(
+        self,
+        *,
+        bot: ClemBot,
+        batch_size: int | None = None,
+        batch_max_age: float | None = None,
+        spool: Spool | None = None,
+    ):
         super().__init__(bot)
         self.message_batch = dict[int, SingleBatchMessage]()
-        self.message_edit_batch = list[SingleBatchMessageEdit]()
+        # Keyed by message id so repeated edits of a message only send the last content
+        self.message_edit_batch = dict[int, SingleBatchMessageEdit]()
+
+        self.batch_size = batch_size or bot_secrets.secrets.message_batch_size
+
+        # Max amount of seconds a message or edit waits in a batch before the batch is flushed
+        self.batch_max_age = batch_max_age or bot_secrets.secrets.message_batch_max_age
+        self.batch_metrics = MessageBatchMetrics()
+
+        # Every batch is written here before it is sent so that an api outage or a restart
+        # doesnt lose it, batches stay spooled until the api accepted them
+        if spool is None:
+            spool = Spool(self.bot.data_dir / MESSAGE_SPOOL_FILE)
+        self.spool = spool
+
+        # Monotonic time the oldest message or edit in the current batches was added
+        self._batch_started: float | None = None
+
+        # Set to wake the flusher when a batch is full or a new batch was started
+        self._flush_event = asyncio.Event()
+
+        # Makes sure batches are sent in order, an edit should never reach the api
+        # before the batch that creates its message
+        self._flush_lock = asyncio.Lock()
+        self._flusher: asyncio.Task[None] | None = None
+
+        # Times the api answered each spooled batch with an error
+        self._attempts = collections.Counter[int]()
+
+    def _is_batch_full(self) -> bool:
+        return max(len(self.message_batch), len(self.message_edit_batch)) >= self.batch_size
+
+    def _batch_added(self) -> None:
+        # Wake the flusher when a new batch starts so it can wait for the batch to age out
+        if self._batch_started is None:
+            self._batch_started = time.monotonic()
+            self._flush_event.set()
+
+        if self._is_batch_full():
+            self._flush_event.set()
+
+    def _is_flush_due(self) -> bool:
+        if self._batch_started is None:
+            return False
+
+        if self._is_batch_full():
+            return True
+
+        return time.monotonic() - self._batch_started >= self.batch_max_age
+
+    async def _flush_loop(self) -> None:
+        while True:
+            timeout = None
+            if self._batch_started is not None:
+                timeout = max(0, self._batch_started + self.batch_max_age - time.monotonic())
+
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+            self._flush_event.clear()
+
+            if not self._is_flush_due():
+                continue
+
+            try:
+                await self.flush()
+            except Exception as e:
+                # Failed sends stay spooled, this is the spool itself failing. The flusher
+                # has to keep running or the batches pile up in memory for good
+                await self.bot.global_error_handler(e, traceback=traceback.format_exc())
+
+                # The batch can still be due, dont retry in a busy loop
+                await asyncio.sleep(self.batch_max_age)
+
+    async def flush(self) -> None:
+        """
+        Spools the current message and edit batches and sends every spooled batch to the api
+        """
+        async with self._flush_lock:
+            await self.load_spool()
+
+            # Copy the batches and clear them BEFORE we send them. This way we
+            # can accept new messages while the current batch is being sent
+            messages = list(self.message_batch.values())
+            edits = list(self.message_edit_batch.values())
+            self.message_batch.clear()
+            self.message_edit_batch.clear()
+            self._batch_started = None
+
+            if messages:
+                await asyncio.to_thread(
+                    self.spool.append, SPOOL_CREATE, [m.dict() for m in messages]
+                )
+            if edits:
+                await asyncio.to_thread(self.spool.append, SPOOL_EDIT, [e.dict() for e in edits])
+
+            await self._send_spooled()
+
+    async def _send_spooled(self) -> None:
+        # Send in the order the batches were spooled and stop at the first failure,
+        # later batches can contain edits of messages in the failed one
+        for request in combine_spooled(self.spool.pending(), SPOOL_REQUEST_MAX_SIZE):
+            start = time.perf_counter()
+
+            try:
+                await self._send_request(request)
+            except Exception as e:
+                self.batch_metrics.failed_flushes += 1
+                log.error(
+                    "Sending spooled batches {seqs} failed with error: {error}, "
+                    "{count} batches stay spooled until the next flush",
+                    seqs=request.seqs,
+                    error=e,
+                    count=len(self.spool),
+                )
+
+                # Connection errors mean the api is gone, only count what it answered
+                if isinstance(e, aiohttp.ClientResponseError):
+                    await self._count_attempt(request)
+                return
+
+            latency = time.perf_counter() - start
+            await self._ack(request.seqs)
+
+            metrics = self.batch_metrics
+            metrics.flushes += 1
+            metrics.messages_flushed += len(request.creates)
+            metrics.edits_flushed += len(request.edits)
+            metrics.edits_coalesced += request.coalesced
+            metrics.last_batch_size = len(request)
+            metrics.last_flush_latency = latency
+            metrics.max_flush_latency = max(metrics.max_flush_latency, latency)
+            metrics.total_flush_latency += latency
+
+            log.info(
+                "Flushed {messages} messages and {edits} edits from {batches} spooled batches "
+                "in {latency} seconds",
+                messages=len(request.creates),
+                edits=len(request.edits),
+                batches=len(request.seqs),
+                latency=round(latency, 3),
+            )
+
+    async def _send_request(self, request: SpooledRequest) -> None:
+        # Creates go first, the edits can be of messages that are created in this request
+        if request.creates:
+            await self._send_or_reject(
+                self.bot.message_route.batch_create_message(
+                    [SingleBatchMessage.parse_obj(m) for m in request.creates.values()],
+                    raise_on_error=True,
+                ),
+                request,
+            )
+
+            # The messages exist now, if the edits fail only the edits are sent again. The
+            # edits folded into the creates are sent again as well which changes nothing
+            await self._ack(request.create_seqs)
+
+        if request.edits:
+            await self._send_or_reject(
+                self.bot.message_route.batch_edit_message(
+                    [SingleBatchMessageEdit.parse_obj(e) for e in request.edits.values()],
+                    raise_on_error=True,
+                ),
+                request,
+            )
+
+    async def _ack(self, seqs: Iterable[int]) -> None:
+        for seq in seqs:
+            await asyncio.to_thread(self.spool.ack, seq)
+            self._attempts.pop(seq, None)
+
+    async def _count_attempt(self, request: SpooledRequest) -> None:
+        self._attempts.update(s for s in request.seqs if s in self.spool)
+        abandoned = [s for s in request.seqs if self._attempts[s] >= SPOOL_MAX_ATTEMPTS]
+        if not abandoned:
+            return
+
+        self.batch_metrics.abandoned_batches += len(abandoned)
+        log.error(
+            "Spooled batches {seqs} failed {attempts} times, dropping them",
+            seqs=abandoned,
+            attempts=SPOOL_MAX_ATTEMPTS,
+        )
+        await self._ack(abandoned)
+
+    async def _send_or_reject(self, send: Awaitable[None], request: SpooledRequest) -> None:
+        try:
+            await send
+        except aiohttp.ClientResponseError as e:
+            # Server errors and the like keep the batches spooled to be sent again
+            if e.status >= HTTPStatus.INTERNAL_SERVER_ERROR or e.status in RETRIED_STATUSES:
+                raise
+
+            # Sending a batch the api rejected again would only be rejected again
+            self.batch_metrics.rejected_requests += 1
+            log.error(
+                "ClemBot.Api rejected spooled batches {seqs} with status {status}, "
+                "dropping them",
+                seqs=request.seqs,
+                status=e.status,
+            )
 
     async def batch_send_message(self, message: discord.Message) -> None:
         """
         Batch the messages to send them all at once to
-        the api to avoid sending hundreds a second
+        the api to avoid sending hundreds a second, the batch is
+        sent by the background flusher once its full or too old
         """
 
         assert message.guild is not None
 
-        if len(self.message_batch) > MESSAGE_BATCH_SIZE:
-            # Copy the list values and clear the batch list BEFORE
-            # we send them. This way we can accept new messages while
-            # the current batch is being sent
-            batch_values = list(self.message_batch.values())
-            self.message_batch.clear()
-
-            await self.bot.message_route.batch_create_message(batch_values, raise_on_error=False)
-
         # We only want to save a message if a guild has the message log enabled
         # otherwise its useless requests
         if not await self.should_save_message(message.guild.id):
@@ -61,6 +377,7 @@ class MessageHandlingService(BaseService):
             channel=message.channel.id,
             time=datetime.datetime.utcnow(),
         )
+        self._batch_added()
 
     async def batch_send_message_edit(self, id: int, guild_id: int, content: str) -> None:
         """
@@ -70,17 +387,9 @@ class MessageHandlingService(BaseService):
 
         if message := self.message_batch.get(id, None):
             self.message_batch[message.id].content = content
+            self.batch_metrics.edits_coalesced += 1
             return
 
-        if len(self.message_edit_batch) > MESSAGE_BATCH_SIZE:
-            # Copy the list and clear the batch edit list BEFORE
-            # we send them. This way we can accept new message edits while
-            # the current batch is being sent
-            batch_values = list(self.message_edit_batch)
-            self.message_edit_batch.clear()
-
-            await self.bot.message_route.batch_edit_message(batch_values, raise_on_error=False)
-
         # We only want to save a message if a guild has the message log enabled
         # otherwise its useless requests
         if not await self.should_save_message(guild_id):
@@ -92,15 +401,19 @@ class MessageHandlingService(BaseService):
             )
             return
 
-        self.message_edit_batch.append(
-            SingleBatchMessageEdit(id=id, content=content, time=datetime.datetime.utcnow())
+        if id in self.message_edit_batch:
+            self.batch_metrics.edits_coalesced += 1
+
+        self.message_edit_batch[id] = SingleBatchMessageEdit(
+            id=id, content=content, time=datetime.datetime.utcnow()
         )
+        self._batch_added()
 
     async def should_save_message(self, guild_id: int) -> bool:
-        channels = await self.bot.designated_channel_route.get_guild_designated_channel_ids(
+        channel_ids = await self.bot.guild_settings.designated_channel_ids(
             guild_id, DesignatedChannels.message_log.name
         )
-        return len(channels) > 0
+        return len(channel_ids) > 0
 
     @BaseService.listener(Events.on_guild_message_received)
     async def on_guild_message_received(self, message: discord.Message) -> None:
@@ -377,7 +690,7 @@ class MessageHandlingService(BaseService):
 
         assert message.guild is not None
 
-        if not await self.bot.guild_route.get_can_embed_link(message.guild.id):
+        if not (await self.bot.guild_settings.get(message.guild.id)).allow_embed_links:
             return
 
         matches = result.groupdict()
@@ -461,5 +774,30 @@ class MessageHandlingService(BaseService):
     def split_string_chunks(self, string: str, n: int) -> Iterable[str]:
         return (string[i : i + n] for i in range(0, len(string), n))
 
+    async def load_spool(self) -> None:
+        if not self.spool.loaded:
+            await asyncio.to_thread(self.spool.load)
+
+    @BaseService.listener(Events.on_backend_connect)
+    async def on_backend_connect(self) -> None:
+        await self.load_spool()
+
+        if len(self.spool) > 0:
+            log.info(
+                "Replaying {count} spooled message batches after api connect",
+                count=len(self.spool),
+            )
+            await self.flush()
+
     async def load_service(self) -> None:
-        pass
+        await self.load_spool()
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        if self._flusher:
+            # Wait for an in progress flush to finish so we dont cancel it mid request
+            async with self._flush_lock:
+                self._flusher.cancel()
+
+        # Send whatever is left so a shutdown doesnt lose the last batch
+        await self.flush()
@@ -10,11 +10,15 @@ from bot.messaging.events import Events
 from bot.services.base_service import BaseService
 from bot.utils.helpers import format_datetime
 from bot.utils.logging_utils import get_logger
+from bot.utils.memory_profile import get_or_fetch_member
 
 log = get_logger(__name__)
 
 
 class ModerationService(BaseService):
+    # The infractions of guilds are only fetched once the startup sync added them to the api
+    depends_on = ["StartupService"]
+
     def __init__(self, *, bot: ClemBot):
         super().__init__(bot)
 
@@ -113,7 +117,7 @@ class ModerationService(BaseService):
 
         await self.bot.moderation_route.deactivate_mute(mute_id, raise_on_error=True)
 
-        subject = guild.get_member(subject_id)
+        subject = await get_or_fetch_member(guild, subject_id)
 
         if not subject:
             embed = discord.Embed(color=Colors.ClemsonOrange)
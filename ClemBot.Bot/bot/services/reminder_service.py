@@ -1,3 +1,4 @@
+import typing as t
 import uuid
 from datetime import datetime
 
@@ -12,8 +13,22 @@ from bot.utils.logging_utils import get_logger
 
 log = get_logger(__name__)
 
+# IPC topic to cancel reminders that another cluster scheduled
+CANCEL_REMINDER_TOPIC = "cancel_reminder"
+
+# IPC topic to have the primary cluster schedule a reminder that another cluster created
+SCHEDULE_REMINDER_TOPIC = "schedule_reminder"
+
 
 class ReminderService(BaseService):
+    """
+    Sends users the reminders they set once they are due
+
+    Every reminder is scheduled by the primary cluster, other clusters forward the reminders
+    they create to it. That way a cluster that restarts only has to reload the reminders it
+    owns, and the primary cluster owns all of them
+    """
+
     def __init__(self, *, bot: ClemBot):
         super().__init__(bot)
         self.reminders: dict[int, uuid.UUID] = {}
@@ -28,6 +43,13 @@ class ReminderService(BaseService):
             return None
         user = self.bot.get_user(reminder.user_id)
 
+        # The user can be in guilds of other clusters only
+        if not user and self.bot.ipc:
+            try:
+                user = await self.bot.fetch_user(reminder.user_id)
+            except discord.NotFound:
+                pass
+
         if not user:
             log.error("Unable to find remind user target: {id}", id=reminder.user_id)
             # Dispatch the reminder in the db anyway, if we cant find the user they probably left all of clembots servers
@@ -54,6 +76,22 @@ class ReminderService(BaseService):
         if not reminder_id:
             raise ReminderError("Creating reminder failed")
 
+        await self._schedule_reminder(reminder_id, time)
+
+    async def _schedule_reminder(self, reminder_id: int, time: datetime) -> None:
+        if not self.bot.is_primary_cluster:
+            # The reminder is stored already, if the primary cluster is down it schedules
+            # the reminder when it loads the stored ones
+            assert self.bot.ipc is not None
+            await self.bot.ipc.publish(
+                SCHEDULE_REMINDER_TOPIC, {"id": reminder_id, "time": time.isoformat()}
+            )
+            return
+
+        # The primary cluster can get a forwarded reminder while it loads the stored ones
+        if reminder_id in self.reminders:
+            return
+
         task_id = self.bot.scheduler.schedule_at(self._reminder_callback(reminder_id), time=time)
         self.reminders[reminder_id] = task_id
 
@@ -65,10 +103,33 @@ class ReminderService(BaseService):
             log.warning("Attempted to delete nonexistent reminder: {id}", id=reminder_id)
             return None
 
-        self.bot.scheduler.cancel(self.reminders[reminder_id])
-        self.reminders.pop(reminder_id)
+        if reminder_id not in self.reminders and self.bot.ipc:
+            await self.bot.ipc.publish(CANCEL_REMINDER_TOPIC, reminder_id)
+            return None
+
+        self._cancel_reminder(reminder_id)
+
+    def _cancel_reminder(self, reminder_id: int) -> None:
+        if task_id := self.reminders.pop(reminder_id, None):
+            self.bot.scheduler.cancel(task_id)
+
+    async def _on_ipc_cancel_reminder(self, reminder_id: int) -> None:
+        self._cancel_reminder(reminder_id)
+
+    async def _on_ipc_schedule_reminder(self, reminder: dict[str, t.Any]) -> None:
+        # Every other cluster gets the publish, only the primary one schedules reminders
+        if self.bot.is_primary_cluster:
+            await self._schedule_reminder(reminder["id"], datetime.fromisoformat(reminder["time"]))
 
     async def load_service(self) -> None:
+        if self.bot.ipc:
+            self.bot.ipc.handle(CANCEL_REMINDER_TOPIC, self._on_ipc_cancel_reminder)
+            self.bot.ipc.handle(SCHEDULE_REMINDER_TOPIC, self._on_ipc_schedule_reminder)
+
+        # The primary cluster owns every reminder, the other clusters have none to reload
+        if not self.bot.is_primary_cluster:
+            return
+
         reminders = await self.bot.reminder_route.fetch_all_reminders(raise_on_error=True)
         for reminder in reminders:
             if (reminder.time - datetime.utcnow()).total_seconds() <= 0:
@@ -76,7 +137,4 @@ class ReminderService(BaseService):
                 await self.bot.reminder_route.dispatch_reminder(reminder.id)
                 continue
 
-            task_id = self.bot.scheduler.schedule_at(
-                self._reminder_callback(reminder.id), time=reminder.time
-            )
-            self.reminders[reminder.id] = task_id
+            await self._schedule_reminder(reminder.id, reminder.time)
@@ -30,6 +30,9 @@ class RoleHandlingService(BaseService):
 
         await self.bot.role_route.remove_role(role.id, raise_on_error=True)
 
+        # Any claims granted through the deleted role are gone
+        self.bot.claims_cache.invalidate_guild(role.guild.id)
+
     @BaseService.listener(Events.on_guild_role_update)
     async def on_role_update(self, before: discord.Role, after: discord.Role) -> None:
         # Only send role updates that changed values we care about to the database
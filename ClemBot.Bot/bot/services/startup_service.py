@@ -1,96 +1,311 @@
 import asyncio
-import os
+import dataclasses
+import typing as t
+
+import discord
 
 import bot.bot_secrets as bot_secrets
+import bot.utils.log_serializers as serializers
 from bot.clem_bot import ClemBot
+from bot.messaging.events import Events
 from bot.services.base_service import BaseService
+from bot.utils.guild_state import (
+    GUILD_STATE_FILE,
+    MEMBER_ENTITIES,
+    GuildEntity,
+    GuildHashes,
+    GuildStateSnapshot,
+    hash_guild_state,
+)
 from bot.utils.logging_utils import get_logger
+from bot.utils.memory_profile import MEMORY_PROFILES, MemoryProfileName, ensure_chunked
+from bot.utils.task_graph import run_task_graph
 
 log = get_logger(__name__)
 
+# The entities that have to be uploaded before an entity of the same guild. Mappings
+# reference users and roles, threads are stored with the channels and reference them
+SYNC_DEPENDENCIES: dict[GuildEntity, tuple[GuildEntity, ...]] = {
+    GuildEntity.users: (),
+    GuildEntity.roles: (),
+    GuildEntity.role_mappings: (GuildEntity.users, GuildEntity.roles),
+    GuildEntity.channels: (),
+    GuildEntity.threads: (GuildEntity.channels,),
+}
+
+# Seconds between the progress logs and checkpoints of a running sync
+SYNC_PROGRESS_INTERVAL = 10.0
+
+
+@dataclasses.dataclass
+class SyncProgress:
+    guilds: int = 0
+    synced_guilds: int = 0
+    failed_guilds: int = 0
+
+    # Entities that were uploaded and that failed to upload
+    uploaded: int = 0
+    failed: int = 0
+
 
 class StartupService(BaseService):
     """
     Service to reload discord state into the database on restart
     this is to account for any leaves or joins, new roles, new channels etc
     that happened while the bot was offline
+
+    Only the state that changed since the last sync is uploaded, the hashes of
+    what was synced are kept in a snapshot in the bots data dir. While the sync
+    runs the snapshot is a checkpoint of the guilds that are done, so a sync that
+    crashed picks up where it stopped
+
+    Under the memory profiles that dont chunk at startup, guilds arent chunked just to
+    be synced. The users and role mappings of a guild are only synced if it is already
+    chunked, or if it was added while the bot was offline
     """
 
-    def __init__(self, *, bot: ClemBot) -> None:
+    def __init__(
+        self,
+        *,
+        bot: ClemBot,
+        snapshot: GuildStateSnapshot | None = None,
+        concurrency: int | None = None,
+        progress_interval: float = SYNC_PROGRESS_INTERVAL,
+        chunk_guilds: bool | None = None,
+    ) -> None:
         super().__init__(bot)
 
-    async def load_guilds(self) -> None:
-        tasks = []
-        for guild in self.bot.guilds:
-            if not await self.bot.guild_route.get_guild(guild.id):
-                log.info(f"Loading guild {guild.name}: {guild.id}")
-                assert guild.owner is not None
-                tasks.append(
-                    asyncio.create_task(
-                        self.bot.guild_route.add_guild(guild.id, guild.name, guild.owner.id)
-                    )
-                )
-        await asyncio.gather(*tasks)
+        if snapshot is None:
+            snapshot = GuildStateSnapshot(self.bot.data_dir / GUILD_STATE_FILE)
+        self.snapshot = snapshot
+
+        # How many guilds are synced at the same time
+        self.concurrency = concurrency or bot_secrets.secrets.startup_sync_concurrency
+        self.progress_interval = progress_interval
+
+        # Whether every guild is chunked to sync its members
+        if chunk_guilds is None:
+            profile = MEMORY_PROFILES[MemoryProfileName(bot_secrets.secrets.memory_profile)]
+            chunk_guilds = profile.chunk_guilds_at_startup
+        self.chunk_guilds = chunk_guilds
+
+        self.uploads: dict[GuildEntity, t.Callable[[discord.Guild], t.Awaitable[None]]] = {
+            GuildEntity.users: self.bot.guild_route.update_guild_users,
+            GuildEntity.roles: self.bot.guild_route.update_guild_roles,
+            GuildEntity.role_mappings: self.bot.guild_route.update_guild_role_user_mappings,
+            GuildEntity.channels: self.bot.guild_route.update_guild_channels,
+            GuildEntity.threads: self.bot.guild_route.update_guild_threads,
+        }
+
+        # Hashes of the state the api has of every synced guild, None until the sync ran
+        self.synced: dict[int, GuildHashes] | None = None
+        self.sync_finished = False
+        self.progress = SyncProgress()
+
+        self.reconnected = False
+
+        # Hashes of the last sync of the guilds that arent synced yet
+        self._previous = dict[int, GuildHashes]()
+
+        self._checkpoint_lock = asyncio.Lock()
+
+    async def load_guild(self, guild: discord.Guild) -> bool:
+        """Adds the guild if the api doesnt know it yet and returns whether it was added"""
+        if await self.bot.guild_route.get_guild(guild.id):
+            return False
+
+        log.info(f"Loading guild {guild.name}: {guild.id}")
+        assert guild.owner is not None
+        await self.bot.guild_route.add_guild(guild.id, guild.name, guild.owner.id)
+        return True
 
     async def load_users(self) -> None:
         await self.bot.user_route.create_user_bulk(self.bot.users)
 
-    async def load_users_guilds(self) -> None:
-        for guild in self.bot.guilds:
-            await self.bot.guild_route.update_guild_users(guild)
+    async def sync_guild(
+        self, guild: discord.Guild, synced: GuildHashes, *, chunk: bool = True
+    ) -> GuildHashes:
+        """
+        Uploads the state of a guild that changed since it was last synced, entities are
+        uploaded concurrently once the entities they depend on were uploaded
 
-    async def load_roles(self) -> None:
-        for guild in self.bot.guilds:
-            await self.bot.guild_route.update_guild_roles(guild)
+        Args:
+            guild (discord.Guild): The guild to sync
+            synced (GuildHashes): The hashes of the state the api has of the guild
+            chunk (bool): Whether to chunk the guild, if it isnt chunked and this is
+                False its users and role mappings are left as they are
 
-        for guild in self.bot.guilds:
-            await self.bot.guild_route.update_guild_role_user_mappings(guild)
+        Returns:
+            GuildHashes: The hashes of the state the api has after the sync
+        """
+        if chunk:
+            await ensure_chunked(guild)
 
-    async def load_channels(self) -> None:
-        for guild in self.bot.guilds:
-            await self.bot.guild_route.update_guild_channels(guild)
+        hashes = await hash_guild_state(guild, self.__hashable_entities(guild))
 
-    async def load_threads(self) -> None:
-        for guild in self.bot.guilds:
-            await self.bot.guild_route.update_guild_threads(guild)
+        changed = {e for e in hashes if synced.get(e) != hashes[e]}
+        if not changed:
+            return hashes
 
-    async def load_service(self) -> None:
+        log.info(
+            "Syncing {entities} of guild {guild}",
+            entities=[e.value for e in GuildEntity if e in changed],
+            guild=serializers.log_guild(guild),
+        )
 
-        # The startup load is too heavy on prod to reset state everytime we restart,
-        # So we should only do this on dev bots. We rely on the 24/7 uptime of the bot to
-        # Keep the database in sync. Future solutions to this problem
-        # Should be heavily researched
-        if bool(os.environ.get("PROD")):
-            log.warning("Skipping internal state reset on prod deployment")
-            self.bot.is_starting_up = False
-            return
+        result = {e: h for e, h in synced.items() if e not in changed}
+
+        def upload(entity: GuildEntity) -> t.Callable[[], t.Awaitable[None]]:
+            async def run() -> None:
+                await self.uploads[entity](guild)
+                result[entity] = hashes[entity]
+
+            return run
+
+        # Unchanged entities are already in the api, only wait on the changed ones
+        errors = await run_task_graph(
+            {e: upload(e) for e in changed},
+            {e: [d for d in SYNC_DEPENDENCIES[e] if d in changed] for e in changed},
+        )
+
+        for entity, error in errors.items():
+            if error is None:
+                self.progress.uploaded += 1
+                continue
+
+            # Left out of the result so the next startup uploads it again
+            self.progress.failed += 1
+            log.error(
+                "Syncing {entity} of guild {guild} failed",
+                entity=entity.value,
+                guild=guild.id,
+                exc_info=error,
+            )
+
+        return result
+
+    async def sync_guilds(self, previous: dict[int, GuildHashes]) -> None:
+        """
+        Runs the sync of every guild, up to concurrency guilds at the same time
+
+        Args:
+            previous (dict[int, GuildHashes]): The hashes of the last sync by guild id
+        """
+        self._previous = previous
+        semaphore = asyncio.Semaphore(self.concurrency)
+        loop = asyncio.get_running_loop()
+        last_report = loop.time()
+
+        synced = self.synced = {}
+        self.progress = SyncProgress(guilds=len(self.bot.guilds))
+
+        async def sync(guild: discord.Guild) -> None:
+            nonlocal last_report
+
+            async with semaphore:
+                try:
+                    # The api has nothing of guilds it just added, whatever the snapshot says
+                    added = await self.load_guild(guild)
+                    if added:
+                        previous.pop(guild.id, None)
+
+                    synced[guild.id] = await self.sync_guild(
+                        guild, previous.get(guild.id, {}), chunk=self.chunk_guilds or added
+                    )
+                    self.progress.synced_guilds += 1
+                except Exception:
+                    log.exception("Syncing guild {guild} failed", guild=guild.id)
+                    self.progress.failed_guilds += 1
+                    return
+
+            if loop.time() - last_report >= self.progress_interval:
+                last_report = loop.time()
+                self.__log_progress()
+                await self.checkpoint()
+
+        await asyncio.gather(*(sync(g) for g in self.bot.guilds))
+
+    async def checkpoint(self) -> None:
+        """Saves the hashes of the guilds synced so far so a crashed sync can resume"""
+        assert self.synced is not None
+
+        # Nothing else changes the api while the sync runs, the hashes of the guilds that
+        # arent done yet still hold
+        async with self._checkpoint_lock:
+            await self.snapshot.save({**self._previous, **self.synced})
+
+    @staticmethod
+    def __hashable_entities(guild: discord.Guild) -> t.Iterable[GuildEntity]:
+        if guild.chunked:
+            return GuildEntity
+
+        # Only some members are cached, hashing them would only tell that they changed
+        return [e for e in GuildEntity if e not in MEMBER_ENTITIES]
+
+    def __log_progress(self) -> None:
+        progress = self.progress
+        log.info(
+            "Internal state sync progress: {done}/{guilds} guilds, {uploaded} uploaded, "
+            "{failed} failed",
+            done=progress.synced_guilds + progress.failed_guilds,
+            guilds=progress.guilds,
+            uploaded=progress.uploaded,
+            failed=progress.failed,
+        )
+
+    @BaseService.listener(Events.on_backend_connect)
+    async def on_backend_connect(self) -> None:
+        # The services load after the first connect, this is a reconnect and events
+        # may have failed while the api was gone
+        self.reconnected = True
+
+    async def load_service(self) -> None:
 
         if bot_secrets.secrets.bot_only:
-            log.warning("Skipping internal state reset in bot_only deployment")
+            log.warning("Skipping internal state sync in bot_only deployment")
             self.bot.is_starting_up = False
             return
 
-        log.info("Starting development bot startup internal state reset")
+        previous = await self.snapshot.load()
+        log.info(
+            "Starting internal state sync with {count} guilds in the last snapshot",
+            count=len(previous),
+        )
+
+        # Every guild is added to the api if its missing, then its users, roles, role
+        # mappings, channels and threads are compared against the snapshot and only the
+        # ones that changed are sent to the backend to replace the current known state
+        await self.sync_guilds(previous)
+        self.__log_progress()
+
+        # Events change the api from here on, the snapshot is saved again on close
+        await self.snapshot.clear()
+        self.sync_finished = True
 
-        # First load any new guilds so that we can reference them
-        log.info("Resetting Guilds")
-        await self.load_guilds()
+        self.bot.is_starting_up = False
 
-        # Load user guild relationships, takes every guild and sends a complete list of users to the backend
-        # to replace the current known state
-        log.info("Resetting User_Guilds state")
-        await self.load_users_guilds()
+    async def close(self) -> None:
+        if self.synced is None:
+            return
 
-        # Reset active roles, send all roles to the backend and delete any not present and add any that are new
-        log.info("Resetting Guild Roles state")
-        await self.load_roles()
+        # Closing in the middle of the sync, let the next startup resume it
+        if not self.sync_finished:
+            await self.checkpoint()
+            return
 
-        # Reset active channels, send all channels to the backend and delete any not present and add any that are new
-        log.info("Resetting Guild Channels state")
-        await self.load_channels()
+        if self.reconnected or self.messenger.drain_metrics.dropped:
+            log.warning("Events may have been lost, not saving the guild state snapshot")
+            return
 
-        # Reset active threads, send all channels to the backend and delete any not present and add any that are new
-        log.info("Resetting Guild Threads state")
-        await self.load_threads()
+        # Events updated the api while the bot ran, if something changed it cant be
+        # told apart from a change the events missed. Keep only what is unchanged since
+        # the sync and let the next startup upload the rest
+        snapshot = dict[int, GuildHashes]()
+        for guild in self.bot.guilds:
+            if not (synced := self.synced.get(guild.id)):
+                continue
 
-        self.bot.is_starting_up = False
+            hashes = await hash_guild_state(guild, self.__hashable_entities(guild))
+            snapshot[guild.id] = {e: h for e, h in synced.items() if hashes.get(e) == h}
+
+        await self.snapshot.save(snapshot)
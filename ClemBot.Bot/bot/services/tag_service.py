@@ -101,9 +101,7 @@ class TagService(BaseService):
             try:
                 # Try to grab the tag prefixes from the db, raise an error on failure
                 # and bailout, we cant respond to anything at the moment
-                tag_prefixes = await bot.custom_tag_prefix_route.get_custom_tag_prefixes(
-                    message.guild.id, raise_on_error=True
-                )
+                tag_prefixes = (await bot.guild_settings.get(message.guild.id)).tag_prefixes
             except Exception:
                 # if the api call fails for any reason then we bail out and return nothing
                 # so as to not spam the servers with error messages on every message.
@@ -1,3 +1,4 @@
+import collections
 import dataclasses
 from datetime import datetime
 
@@ -23,9 +24,6 @@ class UpdateEvent:
 
 class UserHandlingService(BaseService):
     def __init__(self, *, bot: ClemBot):
-        # UserId cache so that we don't hit the database on subsequent user updates
-        self.user_id_cache = set[int]()
-
         super().__init__(bot)
 
     @BaseService.listener(Events.on_initial_user_join)
@@ -58,47 +56,40 @@ class UserHandlingService(BaseService):
             guild=serializers.log_guild(user.guild),
         )
 
-        # Even though a user leaving a server doesn't clear them from the db
-        # Its unlikely they are in multiple clembot servers
-        # So remove them from the cache to keep its size down, and they will be
-        # Readded the next time they are edited
-        if user.id in self.user_id_cache:
-            log.info(
-                "Removing {user} from the cache, new cache size is {size}",
-                user=serializers.log_user(user),
-                size=len(self.user_id_cache) - 1,
-            )
-            self.user_id_cache.remove(user.id)
-
         await self.bot.user_route.remove_user_guild(user.id, user.guild.id, raise_on_error=True)
 
         await self.notify_user_remove(user)
 
-    @BaseService.listener(Events.on_member_update)
-    async def on_member_update(self, before: discord.Member, after: discord.Member) -> None:
-        # only update roles if they have changed
-        if set(r.id for r in before.roles) == set(r.id for r in after.roles):
-            return
+    @BaseService.batch_listener(Events.on_member_update)
+    async def on_member_update(self, updates: list[tuple[discord.Member, discord.Member]]) -> None:
+        # Keep the first before and the last after of each member in the batch
+        changes = dict[tuple[int, int], tuple[discord.Member, discord.Member]]()
+        for before, after in updates:
+            key = (after.guild.id, after.id)
+            changes[key] = (changes.get(key, (before, after))[0], after)
 
-        # If user is not in local cache check the db
-        if before.id not in self.user_id_cache:
-            # If user is not in the db bail out
-            if not await self.bot.user_route.get_user(before.id):
-                # Possibly add them to the db if they don't exist
-                # For future enhancement
-                return
+        # only update roles if they have changed
+        guild_roles = collections.defaultdict[int, dict[int, list[int]]](dict)
+        for (guild_id, user_id), (before, after) in changes.items():
+            if set(r.id for r in before.roles) != set(r.id for r in after.roles):
+                guild_roles[guild_id][user_id] = [r.id for r in after.roles]
+
+        for guild_id, user_roles in guild_roles.items():
+            # Users that arent in the db are skipped by the api
+            updated = await self.bot.user_route.update_roles_bulk(
+                guild_id, user_roles, raise_on_error=False
+            )
 
             log.info(
-                "Adding {user} to the cache, new cache size is {size}",
-                user=serializers.log_user(before),
-                size=(len(self.user_id_cache) + 1),
+                "Updated the roles of {count} users in guild {guild}",
+                count=len(updated),
+                guild=guild_id,
             )
-            # This user exists, add it to the cache
-            self.user_id_cache.add(before.id)
 
-        await self.bot.user_route.update_roles(
-            before.id, before.guild.id, [r.id for r in after.roles], raise_on_error=False
-        )
+            for user_id in updated:
+                # Claims are granted through roles, now that the api knows about
+                # the new roles drop the users cached claims
+                self.bot.claims_cache.invalidate(guild_id, user_id)
 
     async def notify_user_join(self, user: discord.Member) -> None:
         embed = discord.Embed(title="New User Joined", color=Colors.ClemsonOrange)
@@ -0,0 +1,318 @@
+"""
+Local channel the processes of a sharded bot coordinate over. Every cluster process
+connects to a hub in the launcher over a unix socket, messages are newline delimited json
+"""
+
+import asyncio
+import contextlib
+import itertools
+import json
+import typing as t
+
+from bot.utils.logging_utils import get_logger
+
+log = get_logger(__name__)
+
+# Seconds a request waits for the replies of the other clusters
+IPC_REQUEST_TIMEOUT = 10.0
+
+# Max size of a single message, embeds and stats easily fit
+IPC_MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+IpcHandler = t.Callable[[t.Any], t.Awaitable[t.Any]]
+
+
+class IpcError(Exception):
+    pass
+
+
+async def _send(writer: asyncio.StreamWriter, message: dict[str, t.Any]) -> None:
+    writer.write(json.dumps(message).encode("utf-8") + b"\n")
+    await writer.drain()
+
+
+class IpcHub:
+    """
+    Relays messages between the cluster processes
+
+    Published messages go to every other cluster. Requests go to every cluster including
+    the one that sent it, the sender gets back the replies of all clusters that answered
+    before the timeout, indexed by cluster id
+
+    Args:
+        path (str): The unix socket to listen on
+        request_timeout (float): Seconds the hub waits for the replies of a request
+    """
+
+    def __init__(self, path: str, *, request_timeout: float = IPC_REQUEST_TIMEOUT) -> None:
+        self.path = path
+        self.request_timeout = request_timeout
+
+        self._server: asyncio.AbstractServer | None = None
+        self._clusters = dict[int, asyncio.StreamWriter]()
+
+        # Replies of the requests that are relayed right now, indexed by hub request id
+        self._pending = dict[int, dict[int, t.Any]]()
+        self._waiting = dict[int, set[int]]()
+        self._done = dict[int, asyncio.Event]()
+        self._ids = itertools.count(1)
+
+        self._tasks = set[asyncio.Task[None]]()
+
+    @property
+    def clusters(self) -> list[int]:
+        return sorted(self._clusters)
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_unix_server(
+            self._handle_cluster, self.path, limit=IPC_MAX_MESSAGE_SIZE
+        )
+        log.info("IPC hub listening on {path}", path=self.path)
+
+    async def close(self) -> None:
+        if self._server:
+            self._server.close()
+            self._server = None
+
+        for writer in self._clusters.values():
+            writer.close()
+        self._clusters.clear()
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _handle_cluster(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        cluster_id: int | None = None
+        try:
+            identify = json.loads(await reader.readline())
+            cluster_id = t.cast(int, identify["cluster"])
+            self._clusters[cluster_id] = writer
+            log.info("Cluster {cluster} connected to the IPC hub", cluster=cluster_id)
+
+            while line := await reader.readline():
+                message = json.loads(line)
+                match message["op"]:
+                    case "publish":
+                        await self.__publish(cluster_id, message)
+                    case "request":
+                        task = asyncio.create_task(self.__request(cluster_id, message))
+                        self._tasks.add(task)
+                        task.add_done_callback(self._tasks.discard)
+                    case "response":
+                        self.__response(cluster_id, message)
+        except (ConnectionError, json.JSONDecodeError, KeyError) as e:
+            log.warning(
+                "Dropping IPC connection of cluster {cluster}: {error}", cluster=cluster_id, error=e
+            )
+        finally:
+            if cluster_id is not None and self._clusters.get(cluster_id) is writer:
+                del self._clusters[cluster_id]
+                log.info("Cluster {cluster} disconnected from the IPC hub", cluster=cluster_id)
+
+                # Dont wait for replies that will never come
+                for request_id, waiting in self._waiting.items():
+                    waiting.discard(cluster_id)
+                    if not waiting:
+                        self._done[request_id].set()
+
+            writer.close()
+
+    async def __publish(self, origin: int, message: dict[str, t.Any]) -> None:
+        message["origin"] = origin
+        for cluster_id, writer in list(self._clusters.items()):
+            if cluster_id == origin:
+                continue
+
+            with contextlib.suppress(ConnectionError):
+                await _send(writer, message)
+
+    async def __request(self, origin: int, message: dict[str, t.Any]) -> None:
+        request_id = next(self._ids)
+        clusters = dict(self._clusters)
+
+        self._pending[request_id] = {}
+        self._waiting[request_id] = set(clusters)
+        self._done[request_id] = done = asyncio.Event()
+
+        relayed = {**message, "id": request_id, "origin": origin}
+        for cluster_id, writer in clusters.items():
+            try:
+                await _send(writer, relayed)
+            except ConnectionError:
+                self._waiting[request_id].discard(cluster_id)
+
+        if not self._waiting[request_id]:
+            done.set()
+
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(done.wait(), self.request_timeout)
+
+        replies = self._pending.pop(request_id)
+        del self._waiting[request_id]
+        del self._done[request_id]
+
+        if origin_writer := self._clusters.get(origin):
+            with contextlib.suppress(ConnectionError):
+                await _send(
+                    origin_writer,
+                    {
+                        "op": "response",
+                        "id": message["id"],
+                        # Json object keys are strings, send the replies as pairs
+                        "replies": list(replies.items()),
+                    },
+                )
+
+    def __response(self, cluster_id: int, message: dict[str, t.Any]) -> None:
+        request_id = message["id"]
+        if request_id not in self._pending:
+            # The request already timed out
+            return
+
+        self._pending[request_id][cluster_id] = message.get("data")
+        self._waiting[request_id].discard(cluster_id)
+        if not self._waiting[request_id]:
+            self._done[request_id].set()
+
+
+class IpcClient:
+    """
+    Connection of a single cluster process to the hub
+
+    Handlers are registered per topic and are called for both published messages and
+    requests, what a handler returns is the reply to a request
+
+    Args:
+        path (str): The unix socket of the hub
+        cluster_id (int): The id of the cluster this process runs
+        cluster_count (int): The total amount of clusters
+    """
+
+    def __init__(self, path: str, cluster_id: int, cluster_count: int) -> None:
+        self.path = path
+        self.cluster_id = cluster_id
+        self.cluster_count = cluster_count
+
+        self._handlers = dict[str, IpcHandler]()
+        self._requests = dict[int, asyncio.Future[dict[int, t.Any]]]()
+        self._ids = itertools.count(1)
+
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._read_task: asyncio.Task[None] | None = None
+        self._tasks = set[asyncio.Task[None]]()
+
+    def handle(self, topic: str, handler: IpcHandler) -> None:
+        """
+        Registers the handler of a topic, replaces the handler that was registered before
+
+        Args:
+            topic (str): The topic to handle
+            handler (Callable[[Any], Awaitable[Any]]): Called with the data of the message
+        """
+        self._handlers[topic] = handler
+
+    async def connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_unix_connection(
+            self.path, limit=IPC_MAX_MESSAGE_SIZE
+        )
+        await _send(self._writer, {"op": "identify", "cluster": self.cluster_id})
+
+        self._read_task = asyncio.create_task(self.__read())
+        log.info("Cluster {cluster} connected to IPC", cluster=self.cluster_id)
+
+    async def close(self) -> None:
+        if self._read_task:
+            self._read_task.cancel()
+            await asyncio.gather(self._read_task, return_exceptions=True)
+            self._read_task = None
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+
+    async def publish(self, topic: str, data: t.Any = None) -> None:
+        """
+        Sends a message to every other cluster
+
+        Args:
+            topic (str): The topic of the message
+            data (Any): The json serializable content of the message
+        """
+        await _send(self.__get_writer(), {"op": "publish", "topic": topic, "data": data})
+
+    async def request(
+        self, topic: str, data: t.Any = None, *, timeout: float = IPC_REQUEST_TIMEOUT
+    ) -> dict[int, t.Any]:
+        """
+        Sends a request to every cluster, this one included, and waits for their replies
+
+        Args:
+            topic (str): The topic of the request
+            data (Any): The json serializable content of the request
+            timeout (float): Seconds to wait for the hub to send the replies
+
+        Returns:
+            dict[int, Any]: The replies indexed by cluster id, clusters that didnt reply in
+            time are missing and clusters without a handler or whose handler failed reply None
+        """
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._requests[request_id] = future
+
+        try:
+            await _send(
+                self.__get_writer(),
+                {"op": "request", "id": request_id, "topic": topic, "data": data},
+            )
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._requests.pop(request_id, None)
+
+    def __get_writer(self) -> asyncio.StreamWriter:
+        if not self._writer:
+            raise IpcError("IPC client is not connected")
+        return self._writer
+
+    async def __read(self) -> None:
+        assert self._reader
+
+        while line := await self._reader.readline():
+            message = json.loads(line)
+            match message["op"]:
+                case "response":
+                    future = self._requests.get(message["id"])
+                    if future and not future.done():
+                        future.set_result(dict(message["replies"]))
+                case "publish" | "request":
+                    # Handlers can send requests themselves, dont block reading on them
+                    task = asyncio.create_task(self.__handle(message))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+
+        log.warning("Cluster {cluster} lost its IPC connection", cluster=self.cluster_id)
+
+    async def __handle(self, message: dict[str, t.Any]) -> None:
+        handler = self._handlers.get(message["topic"])
+        result = None
+        error = None
+
+        if handler:
+            try:
+                result = await handler(message["data"])
+            except Exception as e:
+                log.exception("IPC handler of {topic} failed", topic=message["topic"])
+                error = str(e)
+
+        if message["op"] == "request" and self._writer:
+            reply: dict[str, t.Any] = {"op": "response", "id": message["id"], "data": result}
+            if error is not None:
+                reply["error"] = error
+            await _send(self._writer, reply)
@@ -0,0 +1,196 @@
+"""
+Runs the bot as multiple processes that each own a part of the discord shards,
+so gateway events and command handling are spread over more than one core
+"""
+
+import asyncio
+import contextlib
+import dataclasses
+import multiprocessing
+import multiprocessing.process
+import os
+import signal
+import tempfile
+import time
+import typing as t
+
+from bot.sharding.ipc import IpcHub
+from bot.utils.logging_utils import get_logger
+
+log = get_logger(__name__)
+
+# Seconds between checks whether the cluster processes are still alive
+CLUSTER_POLL_INTERVAL = 1.0
+
+# Seconds to wait before a crashed cluster is started again
+CLUSTER_RESTART_DELAY = 5.0
+
+# Seconds the clusters get to close gracefully before they are killed
+CLUSTER_SHUTDOWN_TIMEOUT = 40.0
+
+
+@dataclasses.dataclass(frozen=True)
+class ClusterConfig:
+    """Everything a cluster process needs to know about its part of the bot"""
+
+    cluster_id: int
+    cluster_count: int
+    shard_ids: list[int]
+    shard_count: int
+    ipc_path: str
+
+
+ClusterRunner = t.Callable[[ClusterConfig], None]
+
+
+def cluster_shard_ids(cluster_id: int, clusters: int, shard_count: int) -> list[int]:
+    """
+    Gets the shards a cluster owns, shards are dealt out round robin so every
+    cluster owns the same amount of shards give or take one
+
+    Args:
+        cluster_id (int): The cluster to get the shards of
+        clusters (int): The total amount of clusters
+        shard_count (int): The total amount of shards
+    """
+    return list(range(cluster_id, shard_count, clusters))
+
+
+class ShardLauncher:
+    """
+    Starts a process per cluster and an IPC hub the clusters coordinate through,
+    clusters that exit unexpectedly are started again after a delay
+
+    Args:
+        clusters (int): The amount of processes to run
+        shard_count (int): The total amount of discord shards
+        runner (Callable[[ClusterConfig], None]): Runs a cluster until it closes, called in
+            the cluster process so it has to be importable from the top level of a module
+        ipc_path (str | None): The unix socket of the hub, a temporary one when not given
+        restart_delay (float): Seconds to wait before a crashed cluster is started again
+    """
+
+    def __init__(
+        self,
+        clusters: int,
+        shard_count: int,
+        runner: ClusterRunner,
+        *,
+        ipc_path: str | None = None,
+        restart_delay: float = CLUSTER_RESTART_DELAY,
+    ) -> None:
+        if not 0 < clusters <= shard_count:
+            raise ValueError(f"Cant run {clusters} clusters with {shard_count} shards")
+
+        self.clusters = clusters
+        self.shard_count = shard_count
+        self.runner = runner
+        self.ipc_path = ipc_path or os.path.join(tempfile.mkdtemp(), "clembot_ipc.sock")
+        self.restart_delay = restart_delay
+
+        self.hub = IpcHub(self.ipc_path)
+
+        # Spawn so the clusters dont inherit the event loop of the launcher
+        self._context = multiprocessing.get_context("spawn")
+        self._processes = dict[int, multiprocessing.process.BaseProcess]()
+        self._closing = asyncio.Event()
+
+    def config(self, cluster_id: int) -> ClusterConfig:
+        return ClusterConfig(
+            cluster_id=cluster_id,
+            cluster_count=self.clusters,
+            shard_ids=cluster_shard_ids(cluster_id, self.clusters, self.shard_count),
+            shard_count=self.shard_count,
+            ipc_path=self.ipc_path,
+        )
+
+    async def run(self) -> None:
+        """
+        Runs the clusters until close is called or the launcher receives SIGTERM or SIGINT
+        """
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            with contextlib.suppress(NotImplementedError):
+                loop.add_signal_handler(sig, self.close)
+
+        await self.hub.start()
+
+        try:
+            for cluster_id in range(self.clusters):
+                self.__start_cluster(cluster_id)
+
+            await self.__supervise()
+        finally:
+            await self.__stop_clusters()
+            await self.hub.close()
+
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.ipc_path)
+
+    def close(self) -> None:
+        self._closing.set()
+
+    def __start_cluster(self, cluster_id: int) -> None:
+        config = self.config(cluster_id)
+        process = self._context.Process(
+            target=self.runner, args=(config,), name=f"clembot-cluster-{cluster_id}"
+        )
+        process.start()
+        self._processes[cluster_id] = process
+
+        log.info(
+            "Started cluster {cluster} with shards {shards} in process {pid}",
+            cluster=cluster_id,
+            shards=config.shard_ids,
+            pid=process.pid,
+        )
+
+    async def __supervise(self) -> None:
+        restarts = dict[int, float]()
+        loop = asyncio.get_running_loop()
+
+        while not self._closing.is_set():
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._closing.wait(), CLUSTER_POLL_INTERVAL)
+
+            if self._closing.is_set():
+                return
+
+            for cluster_id, process in self._processes.items():
+                if process.is_alive() or cluster_id in restarts:
+                    continue
+
+                log.error(
+                    "Cluster {cluster} exited with code {code}, restarting in {delay} seconds",
+                    cluster=cluster_id,
+                    code=process.exitcode,
+                    delay=self.restart_delay,
+                )
+                restarts[cluster_id] = loop.time() + self.restart_delay
+
+            for cluster_id, restart_at in list(restarts.items()):
+                if loop.time() >= restart_at:
+                    del restarts[cluster_id]
+                    self.__start_cluster(cluster_id)
+
+    async def __stop_clusters(self) -> None:
+        log.info("Stopping {count} clusters", count=len(self._processes))
+
+        # Terminate sends SIGTERM, the clusters close gracefully on it
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+
+        # Joining blocks, wait for the processes in a thread so the hub keeps relaying
+        # messages while the clusters close
+        def join() -> None:
+            deadline = time.monotonic() + CLUSTER_SHUTDOWN_TIMEOUT
+            for process in self._processes.values():
+                process.join(max(deadline - time.monotonic(), 0))
+                if process.is_alive():
+                    log.warning("Killing cluster process {pid}", pid=process.pid)
+                    process.kill()
+                    process.join()
+
+        await asyncio.to_thread(join)
+        self._processes.clear()
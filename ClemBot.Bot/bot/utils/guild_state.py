@@ -0,0 +1,159 @@
+"""
+Content hashes of the discord state the api mirrors for every guild, startup compares
+them against the hashes of the last sync to only upload the parts of a guild that changed
+"""
+
+import asyncio
+import enum
+import hashlib
+import json
+import os
+import typing as t
+from pathlib import Path
+
+import discord
+
+from bot.utils.logging_utils import get_logger
+
+log = get_logger(__name__)
+
+# File under the bots data dir the hashes of the synced guilds are kept in
+GUILD_STATE_FILE = "guild_state.json"
+
+
+class GuildEntity(enum.Enum):
+    # Declared in the order they have to be uploaded in, mappings reference users and roles
+    users = "users"
+    roles = "roles"
+    role_mappings = "role_mappings"
+    channels = "channels"
+    threads = "threads"
+
+
+GuildHashes = dict[GuildEntity, str]
+
+# Entities made of the members of a guild, they can only be hashed once the guild is chunked
+MEMBER_ENTITIES = frozenset({GuildEntity.users, GuildEntity.role_mappings})
+
+# Guilds with at least this many members are hashed in a thread instead of on the event loop
+LARGE_GUILD_MEMBERS = 10_000
+
+Rows = t.Iterable[tuple[t.Any, ...]]
+
+
+def _digest(rows: t.Iterable[tuple[t.Any, ...]]) -> str:
+    # Sorted so the hash doesnt depend on the order discord.py caches things in
+    h = hashlib.sha256()
+    for row in sorted(rows):
+        h.update(repr(row).encode("utf-8"))
+        h.update(b"\n")
+
+    return h.hexdigest()
+
+
+def _rows(guild: discord.Guild, entity: GuildEntity) -> Rows:
+    match entity:
+        case GuildEntity.users:
+            return ((m.id, m.name) for m in guild.members)
+        case GuildEntity.roles:
+            return ((r.id, r.name, r.permissions.administrator) for r in guild.roles)
+        case GuildEntity.role_mappings:
+            # Walking the roles of every member once is cheaper than role.members, which
+            # walks every member once per role
+            return ((r.id, m.id) for m in guild.members for r in m.roles)
+        case GuildEntity.channels:
+            return ((c.id, c.name) for c in guild.channels)
+        case GuildEntity.threads:
+            return ((c.id, c.name, c.parent_id) for c in guild.threads)
+
+
+def guild_state_hashes(
+    guild: discord.Guild, entities: t.Iterable[GuildEntity] = GuildEntity
+) -> GuildHashes:
+    """
+    Hashes the state of a guild the api keeps, the guild has to be chunked for the hashes
+    of its users and role mappings to be complete
+
+    Args:
+        guild (discord.Guild): The guild to hash
+        entities (Iterable[GuildEntity]): The entities to hash, defaults to all of them
+    """
+    return {e: _digest(_rows(guild, e)) for e in entities}
+
+
+async def hash_guild_state(
+    guild: discord.Guild, entities: t.Iterable[GuildEntity] = GuildEntity
+) -> GuildHashes:
+    """
+    Hashes the state of a guild like guild_state_hashes, large guilds are sorted and
+    hashed in a thread so they dont block the event loop
+
+    Args:
+        guild (discord.Guild): The guild to hash
+        entities (Iterable[GuildEntity]): The entities to hash, defaults to all of them
+    """
+    if len(guild.members) < LARGE_GUILD_MEMBERS:
+        return guild_state_hashes(guild, entities)
+
+    # discord.py changes its cache on the event loop, so the rows are read here and only
+    # the copies are handed to the thread
+    rows = {e: list(_rows(guild, e)) for e in entities}
+    return await asyncio.to_thread(lambda: {e: _digest(r) for e, r in rows.items()})
+
+
+class GuildStateSnapshot:
+    """
+    Stores the hashes of the guild state the api was last synced to in a json file
+
+    While the bot runs the api is changed by events, so the snapshot is cleared once the
+    startup sync finished and the hashes only hold again once the bot closed cleanly and
+    saved them. A bot that crashed after its sync finds no snapshot and syncs every guild
+    """
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+
+    async def load(self) -> dict[int, GuildHashes]:
+        entries = await asyncio.to_thread(self.__read)
+
+        snapshot = dict[int, GuildHashes]()
+        for guild_id, hashes in entries.items():
+            # Entities this version doesnt know anymore are synced again, so are dropped ones
+            snapshot[int(guild_id)] = {
+                GuildEntity(k): v for k, v in hashes.items() if k in GuildEntity._value2member_map_
+            }
+
+        return snapshot
+
+    async def clear(self) -> None:
+        await asyncio.to_thread(self.path.unlink, missing_ok=True)
+
+    async def save(self, snapshot: dict[int, GuildHashes]) -> None:
+        entries = {
+            str(guild_id): {k.value: v for k, v in hashes.items()}
+            for guild_id, hashes in snapshot.items()
+        }
+        await asyncio.to_thread(self.__write, entries)
+
+    def __write(self, entries: dict[str, dict[str, str]]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temp file first so a kill mid write cant leave a corrupt file
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+
+        os.replace(tmp_path, self.path)
+
+    def __read(self) -> dict[str, dict[str, str]]:
+        if not self.path.exists():
+            return {}
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = t.cast(dict[str, dict[str, str]], json.load(f))
+        except json.JSONDecodeError:
+            log.warning("Discarding corrupt guild state file {path}", path=str(self.path))
+            entries = {}
+
+        return entries
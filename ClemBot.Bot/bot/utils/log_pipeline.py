@@ -0,0 +1,268 @@
+"""
+Logging mode that keeps log io off the event loop. Records are sampled per logger and
+handed to a background thread over a bounded queue, the thread formats and writes them
+"""
+
+import copy
+import functools
+import logging
+import logging.handlers
+import queue
+import random
+import typing as t
+
+P = t.ParamSpec("P")
+
+DEFAULT_LOG_QUEUE_SIZE = 10_000
+
+# Log properties that are longer than this many characters are dropped from the record
+DEFAULT_LOG_MAX_FIELD_SIZE = 4096
+
+
+class LazyLogValue:
+    """
+    Log property that is only built once the record is emitted, records that are
+    filtered or sampled out never pay for building it
+    """
+
+    __slots__ = ("_func", "_args", "_kwargs")
+
+    def __init__(self, func: t.Callable[..., t.Any], *args: t.Any, **kwargs: t.Any) -> None:
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+
+    def resolve(self) -> t.Any:
+        return resolve_log_value(self._func(*self._args, **self._kwargs))
+
+    def __str__(self) -> str:
+        return str(self.resolve())
+
+    def __repr__(self) -> str:
+        return repr(self.resolve())
+
+    def __format__(self, format_spec: str) -> str:
+        return format(self.resolve(), format_spec)
+
+
+def lazy_serializer(func: t.Callable[P, t.Any]) -> t.Callable[P, LazyLogValue]:
+    """Decorator that makes a log serializer return a LazyLogValue instead of its result"""
+
+    @functools.wraps(func)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> LazyLogValue:
+        return LazyLogValue(func, *args, **kwargs)
+
+    return wrapper
+
+
+def resolve_log_value(value: t.Any) -> t.Any:
+    """Resolves lazy values, including the ones nested in dicts and lists"""
+    match value:
+        case LazyLogValue():
+            return value.resolve()
+        case dict():
+            return {k: resolve_log_value(v) for k, v in value.items()}
+        case list() | tuple():
+            return [resolve_log_value(v) for v in value]
+        case _:
+            return value
+
+
+class LazyValueFilter(logging.Filter):
+    """
+    Resolves the lazy properties of records in place, handlers that arent behind the
+    AsyncLogHandler need it so they dont write the values out as their string form
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if props := getattr(record, "log_props", None):
+            for k, v in props.items():
+                props[k] = resolve_log_value(v)
+
+        return True
+
+
+def install_lazy_value_filter(handlers: t.Iterable[logging.Handler]) -> None:
+    """Adds a LazyValueFilter to every handler that doesnt have one yet"""
+    for handler in handlers:
+        if not any(isinstance(f, LazyValueFilter) for f in handler.filters):
+            handler.addFilter(LazyValueFilter())
+
+
+def parse_sample_rates(entries: t.Iterable[str]) -> dict[str, float]:
+    """
+    Parses sample rates given as logger=rate entries, e.g. bot.api.api_client=0.1
+
+    Args:
+        entries (Iterable[str]): The entries to parse
+    """
+    rates = dict[str, float]()
+    for entry in entries:
+        name, _, rate = entry.partition("=")
+        rates[name.strip()] = float(rate)
+
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of the records of a logger, a logger without a rate uses the rate
+    of its closest configured parent. Warnings and errors are always kept
+
+    Args:
+        rates (Mapping[str, float]): The fraction of records to keep by logger name
+        keep_level (int): Records of this level and above are never sampled out
+    """
+
+    def __init__(
+        self,
+        rates: t.Mapping[str, float],
+        *,
+        keep_level: int = logging.WARNING,
+        sample: t.Callable[[], float] = random.random,
+    ) -> None:
+        super().__init__()
+        self.rates = rates
+        self.keep_level = keep_level
+        self._sample = sample
+
+        # Resolved rate of every logger that logged, so the parents are only walked once
+        self._logger_rates = dict[str, float]()
+
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.keep_level:
+            return True
+
+        rate = self._logger_rates.get(record.name)
+        if rate is None:
+            rate = self._logger_rates[record.name] = self.__rate(record.name)
+
+        if rate >= 1 or self._sample() < rate:
+            return True
+
+        self.sampled_out += 1
+        return False
+
+    def __rate(self, name: str) -> float:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+
+        return self.rates.get("", 1.0)
+
+
+def _cap(value: t.Any, max_size: int) -> t.Any:
+    if isinstance(value, (str, bytes)) and len(value) > max_size:
+        return f"<{len(value)} characters dropped>"
+    return value
+
+
+class AsyncLogHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the log thread without blocking, records are dropped when the queue
+    is full instead of stalling the event loop
+
+    Lazy properties are resolved here, on the thread that logged, so they see the state
+    of the objects at the time of logging. Formatting happens on the log thread
+    """
+
+    def __init__(self, queue_size: int, max_field_size: int) -> None:
+        super().__init__(queue.Queue(queue_size))
+        self.max_field_size = max_field_size
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Shallow copy so other handlers of the logger still get the original record
+        record = copy.copy(record)
+
+        # Lazy values are resolved here on the event loop, the discord objects they read
+        # are only safe to touch from it. Lists of them are logged too, like roles
+        if props := getattr(record, "log_props", None):
+            record.log_props = {
+                k: _cap(resolve_log_value(v), self.max_field_size) for k, v in props.items()
+            }
+
+        # Tracebacks reference live frames, render them before they change
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+
+        return record
+
+
+class CappingQueueListener(logging.handlers.QueueListener):
+    """
+    Writes the queued records on the log thread, properties whose string form is longer
+    than the cap are dropped before the handlers format them
+    """
+
+    def __init__(
+        self, queue: queue.Queue[t.Any], *handlers: logging.Handler, max_field_size: int
+    ) -> None:
+        super().__init__(queue, *handlers, respect_handler_level=True)
+        self.max_field_size = max_field_size
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if props := getattr(record, "log_props", None):
+            for k, v in props.items():
+                if not isinstance(v, (str, bytes, int, float, bool, type(None))):
+                    if len(rendered := str(v)) > self.max_field_size:
+                        props[k] = _cap(rendered, self.max_field_size)
+
+        return record
+
+
+class LogPipeline:
+    """
+    Moves the handlers of the root logger behind an AsyncLogHandler
+
+    Args:
+        queue_size (int): How many records can wait for the log thread before new ones are dropped
+        sample_rates (Mapping[str, float]): The fraction of records to keep by logger name
+        max_field_size (int): Log properties longer than this are dropped from the record
+    """
+
+    def __init__(
+        self,
+        *,
+        queue_size: int = DEFAULT_LOG_QUEUE_SIZE,
+        sample_rates: t.Mapping[str, float] | None = None,
+        max_field_size: int = DEFAULT_LOG_MAX_FIELD_SIZE,
+    ) -> None:
+        self.handler = AsyncLogHandler(queue_size, max_field_size)
+        self.sampling = SamplingFilter(sample_rates or {})
+        self.handler.addFilter(self.sampling)
+
+        self._listener: CappingQueueListener | None = None
+        self._handlers = list[logging.Handler]()
+
+    def start(self) -> None:
+        root = logging.getLogger()
+        self._handlers = root.handlers[:]
+
+        self._listener = CappingQueueListener(
+            t.cast(queue.Queue[t.Any], self.handler.queue),
+            *self._handlers,
+            max_field_size=self.handler.max_field_size,
+        )
+        self._listener.start()
+
+        root.handlers = [self.handler]
+
+    def stop(self) -> None:
+        """Writes the queued records and gives the handlers back to the root logger"""
+        if not self._listener:
+            return
+
+        logging.getLogger().handlers = self._handlers
+        self._listener.stop()
+        self._listener = None
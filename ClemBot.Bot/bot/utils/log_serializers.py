@@ -2,11 +2,17 @@ import typing as t
 
 import discord
 
+from bot.utils.log_pipeline import lazy_serializer
 
+# The serializers only build their dicts once a record that uses them is emitted
+
+
+@lazy_serializer
 def log_guild(guild: discord.Guild) -> dict[str, t.Any]:
     return {"id": guild.id, "name": guild.name}
 
 
+@lazy_serializer
 def log_user(member: discord.Member | discord.User | discord.ClientUser) -> dict[str, t.Any]:
     return (
         {"id": member.id, "name": member.name, "guild": log_guild(member.guild)}
@@ -18,10 +24,12 @@ def log_user(member: discord.Member | discord.User | discord.ClientUser) -> dict
     )
 
 
+@lazy_serializer
 def log_message(message: discord.Message) -> dict[str, t.Any]:
     return {"author": log_user(message.author), "content": message.content}
 
 
+@lazy_serializer
 def log_channel(channel: t.Any) -> dict[str, t.Any]:
     id = getattr(channel, "id", None)
     name = getattr(channel, "name", str(channel))
@@ -30,5 +38,6 @@ def log_channel(channel: t.Any) -> dict[str, t.Any]:
     return {"id": id, "name": name, "guild": log_guild(guild) if guild else None}
 
 
+@lazy_serializer
 def log_role(role: discord.Role) -> dict[str, t.Any]:
     return {"id": role.id, "name": role.name, "guild": log_guild(role.guild)}
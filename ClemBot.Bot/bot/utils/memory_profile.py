@@ -0,0 +1,167 @@
+"""
+Memory profiles trade the discord state the bot keeps cached against resident memory,
+members and messages dominate what the bot holds on to
+"""
+
+import collections
+import dataclasses
+import enum
+import typing as t
+
+import discord
+
+from bot.utils.logging_utils import get_logger
+
+log = get_logger(__name__)
+
+
+class MemoryProfileName(enum.Enum):
+    # Every member of every guild is chunked at startup and kept up to date
+    full = "full"
+
+    # Guilds are chunked the first time something needs their members,
+    # members seen in events are cached in the meantime
+    lean = "lean"
+
+    # Members are only cached for guilds that were explicitly chunked
+    minimal = "minimal"
+
+
+@dataclasses.dataclass(frozen=True)
+class MemoryProfile:
+    name: MemoryProfileName
+
+    # Amount of messages discord.py keeps cached across all guilds
+    max_messages: int
+
+    chunk_guilds_at_startup: bool
+
+    # Whether members from gateway events are cached when their guild isnt chunked
+    cache_event_members: bool
+
+    def client_options(
+        self, intents: discord.Intents, *, max_messages: int | None = None
+    ) -> dict[str, t.Any]:
+        """
+        Gets the discord.py client options of the profile
+
+        Args:
+            intents (discord.Intents): The intents the client connects with
+            max_messages (int | None): Overrides the message cache size of the profile
+        """
+        if self.cache_event_members:
+            member_cache_flags = discord.MemberCacheFlags.from_intents(intents)
+        else:
+            member_cache_flags = discord.MemberCacheFlags.none()
+
+        return {
+            "max_messages": self.max_messages if max_messages is None else max_messages,
+            "chunk_guilds_at_startup": self.chunk_guilds_at_startup,
+            "member_cache_flags": member_cache_flags,
+        }
+
+
+MEMORY_PROFILES = {
+    MemoryProfileName.full: MemoryProfile(
+        MemoryProfileName.full,
+        max_messages=50000,
+        chunk_guilds_at_startup=True,
+        cache_event_members=True,
+    ),
+    MemoryProfileName.lean: MemoryProfile(
+        MemoryProfileName.lean,
+        max_messages=10000,
+        chunk_guilds_at_startup=False,
+        cache_event_members=True,
+    ),
+    MemoryProfileName.minimal: MemoryProfile(
+        MemoryProfileName.minimal,
+        max_messages=1000,
+        chunk_guilds_at_startup=False,
+        cache_event_members=False,
+    ),
+}
+
+
+async def ensure_chunked(guild: discord.Guild) -> None:
+    """
+    Requests the members of a guild if they arent all cached yet, has to be awaited before
+    anything that iterates the guilds members or takes a missing member to mean they left
+
+    Args:
+        guild (discord.Guild): The guild that needs its members
+    """
+    if guild.chunked:
+        return
+
+    log.info("Chunking guild {guild} on demand", guild=guild.id)
+
+    # discord.py shares a single request between concurrent chunks of the same guild
+    await guild.chunk(cache=True)
+
+
+async def get_or_fetch_member(guild: discord.Guild, user_id: int) -> discord.Member | None:
+    """
+    Gets a member from the cache and falls back to the api when the guild isnt chunked,
+    cheaper than chunking a whole guild for a single member
+
+    Args:
+        guild (discord.Guild): The guild of the member
+        user_id (int): The id of the member
+
+    Returns:
+        discord.Member | None: The member or None if the user isnt in the guild
+    """
+    if member := guild.get_member(user_id):
+        return member
+
+    if guild.chunked:
+        return None
+
+    try:
+        return await guild.fetch_member(user_id)
+    except discord.NotFound:
+        return None
+
+
+def _peak_rss_kb() -> int | None:
+    # resource only exists on unix, the report leaves the peak out on windows
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    # Kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def memory_report(bot: discord.Client, top: int = 10) -> dict[str, t.Any]:
+    """
+    Breaks down the discord state the bot has cached
+
+    Args:
+        bot (discord.Client): The bot to report on
+        top (int): How many of the guilds that cache the most to list
+    """
+    messages = collections.Counter(m.guild.id for m in bot.cached_messages if m.guild)
+
+    guilds = sorted(bot.guilds, key=lambda g: len(g.members) + messages[g.id], reverse=True)
+
+    return {
+        "guilds": len(bot.guilds),
+        "chunked_guilds": sum(g.chunked for g in bot.guilds),
+        "members": sum(len(g.members) for g in bot.guilds),
+        "users": len(bot.users),
+        "messages": len(bot.cached_messages),
+        "max_messages": bot._connection.max_messages,
+        "peak_rss_kb": _peak_rss_kb(),
+        "top_guilds": {
+            g.id: {
+                "members": len(g.members),
+                "member_count": g.member_count,
+                "chunked": g.chunked,
+                "messages": messages[g.id],
+            }
+            for g in guilds[:top]
+        },
+    }
@@ -0,0 +1,44 @@
+import typing as t
+
+from aiohttp import web
+
+from bot.utils.logging_utils import get_logger
+
+log = get_logger(__name__)
+
+METRICS_PATH = "/metrics"
+
+
+class MetricsServer:
+    """
+    Small http server that serves metrics in the prometheus text format on /metrics
+
+    Args:
+        port (int): The port to listen on
+        render (Callable[[], str]): Renders the current metrics, called on every scrape
+        host (str): The interface to listen on
+    """
+
+    def __init__(self, port: int, render: t.Callable[[], str], *, host: str = "0.0.0.0") -> None:
+        self.port = port
+        self.host = host
+        self._render = render
+        self._runner: web.AppRunner | None = None
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get(METRICS_PATH, self._handle_metrics)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+        log.info("Serving metrics on port {port}", port=self.port)
+
+    async def close(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle_metrics(self, _: web.Request) -> web.Response:
+        return web.Response(text=self._render(), content_type="text/plain", charset="utf-8")
@@ -0,0 +1,217 @@
+import dataclasses
+import json
+import os
+import typing as t
+from collections import OrderedDict
+from pathlib import Path
+
+from bot.utils.logging_utils import get_logger
+
+log = get_logger(__name__)
+
+SPOOL_MAX_BYTES = 50 * 1024 * 1024
+
+# Amount of acknowledged records after which the file is rewritten without them
+SPOOL_COMPACT_AFTER = 1000
+
+
+@dataclasses.dataclass(frozen=True)
+class SpoolRecord:
+    seq: int
+    kind: str
+    payload: t.Any
+
+
+class Spool:
+    """
+    Append only, line delimited json file of records that still have to be delivered
+
+    Records are appended before they are sent and acknowledged once they were delivered,
+    acknowledgements are appended as their own lines so that writes never rewrite the file.
+    The file is compacted once enough records were acknowledged, and the oldest records
+    are dropped when it grows past max_bytes
+
+    The spool has to be loaded before records are appended. All methods but the constructor
+    do blocking file io, callers on the event loop should run them in a thread
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        *,
+        max_bytes: int = SPOOL_MAX_BYTES,
+        compact_after: int = SPOOL_COMPACT_AFTER,
+    ) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.compact_after = compact_after
+
+        # Records that have not been acknowledged yet mapped to their size on disk, in append order
+        self._pending = OrderedDict[int, tuple[SpoolRecord, int]]()
+        self._next_seq = 1
+        self._acked_since_compaction = 0
+        self._size = 0
+
+        # Records that were dropped without being delivered because the spool was full
+        self.dropped = 0
+
+        self.loaded = False
+
+    def load(self) -> None:
+        """
+        Loads the records that were not acknowledged in the last run, does nothing if the
+        spool is already loaded
+        """
+        if self.loaded:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._load()
+        self.loaded = True
+
+    def append(self, kind: str, payload: t.Any) -> SpoolRecord:
+        """
+        Durably appends a record to the spool
+
+        Args:
+            kind (str): What the record contains, used by the consumer to decide how to deliver it
+            payload (Any): The json serializable content of the record
+        """
+        if not self.loaded:
+            raise RuntimeError(f"Spool {self.path} was appended to before it was loaded")
+
+        record = SpoolRecord(self._next_seq, kind, payload)
+        self._next_seq += 1
+
+        size = self._write({"seq": record.seq, "kind": kind, "payload": payload})
+        self._pending[record.seq] = (record, size)
+
+        if self._size > self.max_bytes:
+            self._drop_oldest()
+
+        return record
+
+    def ack(self, seq: int) -> None:
+        """
+        Marks a record as delivered so it is not replayed again
+
+        Args:
+            seq (int): The sequence number of the delivered record
+        """
+        if self._pending.pop(seq, None) is None:
+            return
+
+        # Nothing left to deliver, the whole file can go
+        if not self._pending:
+            self._rewrite()
+            return
+
+        self._write({"ack": seq})
+        self._acked_since_compaction += 1
+
+        if self._acked_since_compaction >= self.compact_after:
+            self._rewrite()
+
+    def pending(self) -> list[SpoolRecord]:
+        """
+        Gets every record that has not been acknowledged yet, oldest first
+        """
+        return [r for r, _ in self._pending.values()]
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def __contains__(self, seq: object) -> bool:
+        return seq in self._pending
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def _write(self, line: dict[str, t.Any]) -> int:
+        data = json.dumps(line, default=str) + "\n"
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+
+            # Flushing only hands the line to the os, it has to be on disk to survive a crash
+            os.fsync(f.fileno())
+
+        size = len(data.encode("utf-8"))
+        self._size += size
+        return size
+
+    def _rewrite(self) -> None:
+        """
+        Compacts the spool by atomically replacing the file with only the pending records
+        """
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+
+        size = 0
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for seq, (record, _) in self._pending.items():
+                data = json.dumps(
+                    {"seq": seq, "kind": record.kind, "payload": record.payload}, default=str
+                )
+                f.write(data + "\n")
+                size += len(data.encode("utf-8")) + 1
+
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_path, self.path)
+
+        self._size = size
+        self._acked_since_compaction = 0
+
+    def _drop_oldest(self) -> None:
+        pending_size = sum(s for _, s in self._pending.values())
+        dropped = 0
+
+        # Always keep the newest record, even if it alone is bigger than the cap
+        while pending_size > self.max_bytes and len(self._pending) > 1:
+            _, (_, size) = self._pending.popitem(last=False)
+            pending_size -= size
+            dropped += 1
+
+        if dropped:
+            self.dropped += dropped
+            log.warning(
+                "Spool {path} is full, dropped the {count} oldest undelivered records",
+                path=str(self.path),
+                count=dropped,
+            )
+
+        self._rewrite()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid write can leave a partial last line, skip it
+                    log.warning("Skipping corrupt line in spool {path}", path=str(self.path))
+                    continue
+
+                if "ack" in entry:
+                    self._pending.pop(entry["ack"], None)
+                    continue
+
+                record = SpoolRecord(entry["seq"], entry["kind"], entry["payload"])
+                self._pending[record.seq] = (record, len(line.encode("utf-8")))
+                self._next_seq = max(self._next_seq, record.seq + 1)
+
+        if self._pending:
+            log.info(
+                "Loaded {count} undelivered records from spool {path}",
+                count=len(self._pending),
+                path=str(self.path),
+            )
+
+        # Start from a compact file so acknowledgements from the last run dont pile up
+        self._rewrite()
@@ -0,0 +1,71 @@
+"""
+Runs coroutines that depend on each other, every coroutine starts as soon as the ones
+it depends on finished so independent ones run concurrently
+"""
+
+import asyncio
+import graphlib
+import typing as t
+
+K = t.TypeVar("K", bound=t.Hashable)
+
+
+class DependencyFailedError(Exception):
+    """A task that wasnt run because a task it depends on failed"""
+
+
+async def run_task_graph(
+    tasks: t.Mapping[K, t.Callable[[], t.Awaitable[t.Any]]],
+    dependencies: t.Mapping[K, t.Iterable[K]],
+) -> dict[K, BaseException | None]:
+    """
+    Runs every task once the tasks it depends on succeeded, tasks that depend on a failed
+    task are skipped. Raises graphlib.CycleError if the tasks depend on each other in a
+    cycle and ValueError if a task depends on a task that doesnt exist
+
+    Args:
+        tasks (Mapping[K, Callable[[], Awaitable[Any]]]): Starts the task of every key
+        dependencies (Mapping[K, Iterable[K]]): The keys of the tasks every key depends on
+
+    Returns:
+        dict[K, BaseException | None]: The error of every task, None for tasks that succeeded
+        and a DependencyFailedError for tasks that were skipped
+    """
+    graph = {key: set(dependencies.get(key, ())) for key in tasks}
+    for key, deps in graph.items():
+        if missing := deps - tasks.keys():
+            raise ValueError(f"{key} depends on unknown tasks {missing}")
+
+    sorter = graphlib.TopologicalSorter(graph)
+    sorter.prepare()
+
+    async def run(key: K) -> None:
+        await tasks[key]()
+
+    results = dict[K, BaseException | None]()
+    running = dict[asyncio.Task[None], K]()
+
+    try:
+        while sorter.is_active():
+            for key in sorter.get_ready():
+                if failed := [d for d in graph[key] if results[d] is not None]:
+                    results[key] = DependencyFailedError(f"{key} depends on failed {failed}")
+                    sorter.done(key)
+                    continue
+
+                running[asyncio.create_task(run(key))] = key
+
+            # Skipping a task can make the tasks that depend on it ready right away
+            if not running:
+                continue
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                key = running.pop(task)
+                results[key] = task.exception()
+                sorter.done(key)
+    finally:
+        for task in running:
+            task.cancel()
+
+    return results
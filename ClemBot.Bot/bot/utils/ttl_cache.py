@@ -0,0 +1,122 @@
+import time
+import typing as t
+from collections import OrderedDict
+
+K = t.TypeVar("K")
+V = t.TypeVar("V")
+
+
+class TTLCache(t.Generic[K, V]):
+    """
+    A size bounded, least recently used cache where every entry expires after a given time to live
+
+    Expired entries are not removed on expiry, they are kept around until they are evicted so that
+    callers can fall back to the last known value with get_stale() if a refresh fails
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl: float,
+        max_size: int,
+        on_evict: t.Callable[[K, V], None] | None = None,
+    ) -> None:
+        if ttl <= 0:
+            raise ValueError("TTLCache ttl must be greater than zero")
+
+        if max_size <= 0:
+            raise ValueError("TTLCache max_size must be greater than zero")
+
+        self.ttl = ttl
+        self.max_size = max_size
+
+        # Called with the key and value of every entry evicted to make room for a new one
+        self.on_evict = on_evict
+
+        # Maps a key to a tuple of (expiry time, value), ordered from least to most recently used
+        self._entries = OrderedDict[K, tuple[float, V]]()
+
+    def get(self, key: K) -> V | None:
+        """
+        Gets the value for a given key if it exists and has not expired
+
+        Args:
+            key (K): The key to look up
+        """
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return None
+
+        expires, value = entry
+        if expires <= time.monotonic():
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def get_stale(self, key: K) -> V | None:
+        """
+        Gets the value for a given key regardless of whether it has expired
+
+        Args:
+            key (K): The key to look up
+        """
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return None
+
+        return entry[1]
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        """
+        Sets the value of a key and resets its time to live,
+        evicts the least recently used entry if the cache is full
+
+        Args:
+            key (K): The key to set
+            value (V): The value to associate with the key
+            ttl (float | None): Overrides the time to live of the cache for this entry
+        """
+        self._entries[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            evicted, (_, evicted_value) = self._entries.popitem(last=False)
+            if self.on_evict:
+                self.on_evict(evicted, evicted_value)
+
+    def invalidate(self, key: K) -> None:
+        """
+        Removes a key from the cache if it exists
+
+        Args:
+            key (K): The key to remove
+        """
+        self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate: t.Callable[[K], bool]) -> None:
+        """
+        Removes every key from the cache that matches a given predicate
+
+        Args:
+            predicate (Callable[[K], bool]): Returns True for keys that should be removed
+        """
+        for key in [k for k in self._entries if predicate(k)]:
+            del self._entries[key]
+
+    def keys(self) -> list[K]:
+        """
+        Gets a copy of every key in the cache, including expired keys
+        """
+        return list(self._entries.keys())
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
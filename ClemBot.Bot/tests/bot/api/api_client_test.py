@@ -0,0 +1,209 @@
+import asyncio
+from http import HTTPStatus
+from unittest import mock
+
+import pytest
+
+from bot.api.api_client import ApiClient, HttpRequestType, Result
+from bot.api.bulk_payload import CsvJsonBody
+from bot.api.response_cache import CachePolicy, ResponseCache
+from bot.errors import ApiClientRequestError
+
+
+def client_with_response(response, *, coalesce_gets=True):
+    client = ApiClient(coalesce_gets=coalesce_gets)
+
+    async def request(*args, **kwargs):
+        await asyncio.sleep(0.01)
+        return response
+
+    client._request_or_reconnect = mock.AsyncMock(side_effect=request)
+    return client
+
+
+class TestApiClientCoalescing:
+    @pytest.mark.asyncio
+    async def test_identical_concurrent_gets_share_one_request(self):
+        client = client_with_response({"value": 1})
+
+        results = await asyncio.gather(*(client.get("bot/guilds/1") for _ in range(5)))
+
+        assert client._request_or_reconnect.await_count == 1
+        assert all(r == {"value": 1} for r in results)
+        assert client.coalescing_metrics.issued == 1
+        assert client.coalescing_metrics.coalesced == 4
+
+    @pytest.mark.asyncio
+    async def test_coalesced_waiters_get_copies_of_the_response(self):
+        client = client_with_response({"value": [1]})
+
+        first, second = await asyncio.gather(client.get("a"), client.get("a"))
+        first["value"].append(2)
+
+        assert second == {"value": [1]}
+
+    @pytest.mark.asyncio
+    async def test_different_params_are_not_coalesced(self):
+        client = client_with_response(None)
+
+        await asyncio.gather(
+            client.get("a", params={"id": 1}),
+            client.get("a", params={"id": 2}),
+            client.get("a", data={"id": 1}),
+            client.get("a", params={"id": 1}, raise_on_error=True),
+        )
+
+        assert client._request_or_reconnect.await_count == 4
+        assert client.coalescing_metrics.coalesced == 0
+
+    @pytest.mark.asyncio
+    async def test_sequential_gets_are_not_coalesced(self):
+        client = client_with_response(None)
+
+        await client.get("a")
+        await client.get("a")
+
+        assert client._request_or_reconnect.await_count == 2
+        assert len(client._in_flight_gets) == 0
+
+    @pytest.mark.asyncio
+    async def test_coalescing_disabled_issues_every_request(self):
+        client = client_with_response(None, coalesce_gets=False)
+
+        await asyncio.gather(client.get("a"), client.get("a"))
+
+        assert client._request_or_reconnect.await_count == 2
+        client._request_or_reconnect.assert_awaited_with(HttpRequestType.get, "a")
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_cancel_shared_request(self):
+        client = client_with_response({"value": 1})
+
+        first = asyncio.create_task(client.get("a"))
+        second = asyncio.create_task(client.get("a"))
+        await asyncio.sleep(0)
+
+        first.cancel()
+
+        assert await second == {"value": 1}
+
+
+def client_with_cache(*policies):
+    cache = ResponseCache()
+    cache.register(*policies)
+    client = ApiClient(response_cache=cache)
+    client._send_request = mock.AsyncMock(return_value=Result(HTTPStatus.OK, {"value": 1}))
+    return client
+
+
+class TestApiClientResponseCache:
+    @pytest.mark.asyncio
+    async def test_cached_get_is_only_sent_once(self):
+        client = client_with_cache(CachePolicy(r"bot/guilds/\d+", ttl=10))
+
+        first = await client._request(HttpRequestType.get, "bot/guilds/1", False)
+        second = await client._request(HttpRequestType.get, "bot/guilds/1", False)
+
+        assert first.value == second.value == {"value": 1}
+        assert client._send_request.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_get_without_policy_is_not_cached(self):
+        client = client_with_cache(CachePolicy(r"bot/guilds/\d+", ttl=10))
+
+        await client._request(HttpRequestType.get, "bot/roles/1", False)
+        await client._request(HttpRequestType.get, "bot/roles/1", False)
+
+        assert client._send_request.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_mutating_request_invalidates_cached_get(self):
+        client = client_with_cache(CachePolicy(r"bot/guilds/\d+", ttl=10))
+
+        await client._request(HttpRequestType.get, "bot/guilds/1", False)
+        await client._request(HttpRequestType.patch, "bot/guilds", False, body={"Id": 1})
+        await client._request(HttpRequestType.get, "bot/guilds/1", False)
+
+        assert client._send_request.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_failed_get_is_not_cached(self):
+        client = client_with_cache(CachePolicy(r"bot/guilds/\d+", ttl=10))
+        client._send_request.return_value = Result(HTTPStatus.NOT_FOUND, None)
+
+        await client._request(HttpRequestType.get, "bot/guilds/1", False)
+        await client._request(HttpRequestType.get, "bot/guilds/1", False)
+
+        assert client._send_request.await_count == 2
+
+
+class TestApiClientPoolMetrics:
+    @pytest.mark.asyncio
+    async def test_requests_past_pool_limit_count_as_saturated(self):
+        client = ApiClient()
+        client.session = mock.Mock()
+        client.pool_metrics.limit = 2
+
+        release = asyncio.Event()
+
+        async def send(*args, **kwargs):
+            await release.wait()
+            return Result(HTTPStatus.OK, None)
+
+        client._send = mock.AsyncMock(side_effect=send)
+
+        tasks = [
+            asyncio.create_task(client._send_request(HttpRequestType.get, "a", False, None, None))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+
+        assert client.pool_metrics.in_flight == 3
+        assert client.pool_metrics.saturated == 1
+
+        release.set()
+        await asyncio.gather(*tasks)
+
+        assert client.pool_metrics.in_flight == 0
+        assert client.pool_metrics.peak_in_flight == 3
+
+    @pytest.mark.parametrize(
+        "pool_size, per_host, limit", [(100, 50, 50), (10, 50, 10), (100, 0, 100), (0, 0, 0)]
+    )
+    def test_pool_limit_is_the_binding_limit(self, pool_size, per_host, limit):
+        with mock.patch("bot.api.api_client.bot_secrets") as secrets:
+            secrets.secrets.api_pool_size = pool_size
+            secrets.secrets.api_pool_size_per_host = per_host
+
+            assert ApiClient._pool_limit() == limit
+
+    @pytest.mark.asyncio
+    async def test_timed_out_request_raises_request_error(self):
+        client = ApiClient()
+        client.connected = True
+        client._request = mock.AsyncMock(side_effect=asyncio.TimeoutError)
+
+        with pytest.raises(ApiClientRequestError):
+            await client._request_or_reconnect(HttpRequestType.get, "a")
+
+        assert client.pool_metrics.timeouts == 1
+
+
+class TestApiClientTimeouts:
+    @pytest.mark.asyncio
+    async def test_streamed_body_has_no_total_timeout(self):
+        client = ApiClient()
+        client._base_url = ""
+        client.session = mock.MagicMock()
+        response = client.session.request.return_value.__aenter__.return_value
+        response.status = HTTPStatus.NO_CONTENT
+
+        with mock.patch("bot.api.api_client.bot_secrets") as secrets:
+            secrets.secrets.api_request_timeout = 30
+            secrets.secrets.api_connect_timeout = 5
+            body = CsvJsonBody({"GuildId": 1}, "Users", ["Id"], [])
+            await client._send(HttpRequestType.post, "a", False, None, body)
+
+        timeout = client.session.request.call_args.kwargs["timeout"]
+        assert timeout.total is None
+        assert timeout.sock_read == 30
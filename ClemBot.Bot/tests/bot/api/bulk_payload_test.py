@@ -0,0 +1,106 @@
+import csv
+import io
+import json
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from bot.api.api_client import ApiClient, HttpRequestType
+from bot.api.bulk_payload import CsvJsonBody
+
+
+async def read_body(body):
+    return b"".join([c async for c in body.chunks()])
+
+
+def parse_csv(text):
+    return list(csv.reader(io.StringIO(text)))
+
+
+class TestCsvJsonBody:
+    @pytest.mark.asyncio
+    async def test_body_is_json_with_csv_field(self):
+        body = CsvJsonBody({"GuildId": 1}, "UserCsv", ("UserId", "Name"), [(2, "a"), (3, "b")])
+
+        decoded = json.loads(await read_body(body))
+
+        assert decoded["GuildId"] == 1
+        assert parse_csv(decoded["UserCsv"]) == [["UserId", "Name"], ["2", "a"], ["3", "b"]]
+
+    @pytest.mark.asyncio
+    async def test_special_characters_round_trip(self):
+        names = ['quote " and, comma', "new\nline", "back\\slash", "ünïcödé 🎉"]
+        body = CsvJsonBody({}, "Csv", ("Name",), [(n,) for n in names], chunk_rows=1)
+
+        decoded = json.loads(await read_body(body))
+
+        assert parse_csv(decoded["Csv"])[1:] == [[n] for n in names]
+
+    @pytest.mark.asyncio
+    async def test_rows_are_split_into_chunks(self):
+        body = CsvJsonBody({}, "Csv", ("Id",), [(i,) for i in range(5)], chunk_rows=2)
+
+        chunks = [c async for c in body.chunks()]
+
+        # Prefix, three chunks of rows and the closing of the object
+        assert len(chunks) == 5
+
+    @pytest.mark.asyncio
+    async def test_rows_are_generated_lazily(self):
+        generated = []
+
+        def rows():
+            for i in range(4):
+                generated.append(i)
+                yield (i,)
+
+        body = CsvJsonBody({}, "Csv", ("Id",), rows(), chunk_rows=2)
+        chunks = body.chunks()
+
+        await anext(chunks)
+        await anext(chunks)
+
+        assert generated == [0, 1]
+
+    @pytest.mark.asyncio
+    async def test_empty_rows_send_header(self):
+        body = CsvJsonBody({"GuildId": 1}, "Csv", ("Id",), [])
+
+        assert json.loads(await read_body(body)) == {"GuildId": 1, "Csv": "Id\n"}
+
+
+class TestApiClientStreamedBody:
+    @pytest.mark.asyncio
+    async def test_body_is_streamed_as_json(self):
+        received = {}
+
+        async def handler(request):
+            received["content_type"] = request.content_type
+            received["chunked"] = request.headers.get("Transfer-Encoding") == "chunked"
+            received["body"] = await request.json()
+            return web.json_response({"ok": True})
+
+        app = web.Application()
+        app.router.add_patch("/update", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        client = ApiClient()
+        client._base_url = f"http://127.0.0.1:{port}/"
+        client.session = aiohttp.ClientSession()
+
+        try:
+            body = CsvJsonBody({"GuildId": 1}, "Csv", ("Id",), [(1,), (2,)], chunk_rows=1)
+            result = await client._send(HttpRequestType.patch, "update", False, None, body)
+        finally:
+            await client.session.close()
+            await runner.cleanup()
+
+        assert result.value == {"ok": True}
+        assert received["content_type"] == "application/json"
+        assert received["chunked"]
+        assert received["body"] == {"GuildId": 1, "Csv": "Id\n1\n2\n"}
@@ -0,0 +1,136 @@
+from unittest import mock
+
+from bot.api.response_cache import CachePolicy, ResponseCache
+
+
+def cache_with(*policies):
+    cache = ResponseCache(max_size=10)
+    cache.register(*policies)
+    return cache
+
+
+class TestCachePolicy:
+    def test_matches_full_endpoint_case_insensitive(self):
+        policy = CachePolicy(r"bot/guilds/\d+", ttl=10)
+
+        assert policy.matches("bot/Guilds/1")
+        assert not policy.matches("bot/guilds/1/roles")
+
+    def test_default_invalidation_is_same_resource(self):
+        policy = CachePolicy(r"bot/emoteboards/\d+", ttl=10)
+
+        assert policy.is_invalidated_by("bot/emoteboards/1", "bot/emoteboards/create")
+        assert not policy.is_invalidated_by("bot/emoteboards/1", "bot/emoteboardposts/create")
+
+    def test_explicit_invalidation_replaces_default(self):
+        policy = CachePolicy(r"bot/tags", ttl=10, invalidated_by=(r"bot/tags",))
+
+        assert policy.is_invalidated_by("bot/tags", "bot/tags")
+        assert not policy.is_invalidated_by("bot/tags", "bot/tags/invoke")
+
+
+class TestResponseCache:
+    def test_unregistered_endpoint_has_no_policy(self):
+        cache = cache_with(CachePolicy(r"bot/guilds", ttl=10))
+        assert cache.policy_for("bot/roles/1") is None
+
+    def test_register_ignores_duplicate_policies(self):
+        policy = CachePolicy(r"bot/guilds", ttl=10)
+        cache = cache_with(policy, policy)
+        assert cache._policies == [policy]
+
+    def test_set_then_get_is_hit(self):
+        policy = CachePolicy(r"bot/guilds/\d+", ttl=10)
+        cache = cache_with(policy)
+
+        assert cache.get("bot/guilds/1", None, None) == (False, None)
+        generation = cache.generation(policy, "bot/guilds/1")
+        cache.set(policy, "bot/guilds/1", None, None, {"id": 1}, generation)
+
+        assert cache.get("bot/guilds/1", None, None) == (True, {"id": 1})
+        assert cache.metrics.hits == 1
+        assert cache.metrics.misses == 1
+
+    def test_request_data_is_part_of_key(self):
+        policy = CachePolicy(r"bot/tags", ttl=10)
+        cache = cache_with(policy)
+        cache.set(policy, "bot/tags", None, {"Name": "a"}, {"content": "a"}, 0)
+
+        assert cache.get("bot/tags", None, {"Name": "b"}) == (False, None)
+
+    def test_get_returns_copy_of_cached_response(self):
+        policy = CachePolicy(r"bot/guilds", ttl=10)
+        cache = cache_with(policy)
+        cache.set(policy, "bot/guilds", None, None, [1], 0)
+
+        cache.get("bot/guilds", None, None)[1].append(2)
+
+        assert cache.get("bot/guilds", None, None) == (True, [1])
+
+    def test_entry_expires_after_policy_ttl(self):
+        policy = CachePolicy(r"bot/guilds", ttl=10)
+        cache = cache_with(policy)
+
+        with mock.patch("bot.utils.ttl_cache.time.monotonic", return_value=0):
+            cache.set(policy, "bot/guilds", None, None, [1], 0)
+
+        with mock.patch("bot.utils.ttl_cache.time.monotonic", return_value=11):
+            assert cache.get("bot/guilds", None, None) == (False, None)
+
+    def test_invalidate_drops_matching_entries(self):
+        boards = CachePolicy(r"bot/emoteboards/\d+", ttl=10)
+        guilds = CachePolicy(r"bot/guilds/\d+", ttl=10)
+        cache = cache_with(boards, guilds)
+        cache.set(boards, "bot/emoteboards/1", None, None, {}, 0)
+        cache.set(guilds, "bot/guilds/1", None, None, {}, 0)
+
+        cache.invalidate("bot/emoteboards/edit")
+
+        assert cache.get("bot/emoteboards/1", None, None) == (False, None)
+        assert cache.get("bot/guilds/1", None, None) == (True, {})
+        assert cache.metrics.invalidations == 1
+
+    def test_set_after_invalidation_is_ignored(self):
+        policy = CachePolicy(r"bot/guilds", ttl=10)
+        cache = cache_with(policy)
+        generation = cache.generation(policy, "bot/guilds")
+
+        cache.invalidate("bot/guilds")
+        cache.set(policy, "bot/guilds", None, None, [1], generation)
+
+        assert len(cache) == 0
+
+    def test_set_after_invalidation_of_other_resource_is_stored(self):
+        guilds = CachePolicy(r"bot/guilds", ttl=10)
+        tags = CachePolicy(r"bot/tags", ttl=10)
+        cache = cache_with(guilds, tags)
+        generation = cache.generation(guilds, "bot/guilds")
+
+        cache.invalidate("bot/tags/create")
+        cache.set(guilds, "bot/guilds", None, None, [1], generation)
+
+        assert cache.get("bot/guilds", None, None) == (True, [1])
+
+    def test_set_after_clear_is_ignored(self):
+        policy = CachePolicy(r"bot/guilds", ttl=10)
+        cache = cache_with(policy)
+        generation = cache.generation(policy, "bot/guilds")
+
+        cache.clear()
+        cache.set(policy, "bot/guilds", None, None, [1], generation)
+
+        assert len(cache) == 0
+
+    def test_evicted_entries_are_unindexed(self):
+        policy = CachePolicy(r"bot/guilds/\d+", ttl=10)
+        cache = cache_with(policy)
+
+        for i in range(20):
+            cache.set(policy, f"bot/guilds/{i}", None, None, {}, 0)
+
+        assert len(cache._scopes[policy.scope("bot/guilds/1")]) == 10
+
+        cache.invalidate("bot/guilds/edit")
+
+        assert len(cache) == 0
+        assert cache.metrics.invalidations == 10
@@ -0,0 +1,23 @@
+import pytest
+
+from bot.bot_secrets import BotSecrets
+from bot.errors import ConfigAccessError
+
+
+class TestBotSecretsLoadSecret:
+    def test_missing_required_key_raises(self):
+        with pytest.raises(ConfigAccessError):
+            BotSecrets()._load_secret("BOT_TOKEN", {}, str)
+
+    @pytest.mark.parametrize("key", ["METRICS_PORT", "SHARD_COUNT", "MESSAGE_CACHE_SIZE"])
+    def test_missing_optional_key_is_none(self, key, monkeypatch):
+        monkeypatch.delenv(key, raising=False)
+        assert BotSecrets()._load_secret(key, {}, int, default=None) is None
+
+    def test_missing_sample_rates_are_empty(self, monkeypatch):
+        monkeypatch.delenv("LOG_SAMPLE_RATES", raising=False)
+        assert BotSecrets()._load_secret("LOG_SAMPLE_RATES", {}, list[str], default=[]) == []
+
+    def test_env_overrides_json(self, monkeypatch):
+        monkeypatch.setenv("METRICS_PORT", "9100")
+        assert BotSecrets()._load_secret("METRICS_PORT", {"METRICS_PORT": 1}, int) == 9100
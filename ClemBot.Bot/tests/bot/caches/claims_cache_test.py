@@ -0,0 +1,87 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from bot.caches.claims_cache import ClaimsCache
+from bot.consts import Claims
+
+
+def create_bot():
+    bot = mock.Mock()
+    bot.claim_route.get_claims_user = mock.AsyncMock(return_value=[Claims.tag_add])
+    return bot
+
+
+def create_member(guild_id, user_id):
+    member = mock.Mock()
+    member.id = user_id
+    member.guild.id = guild_id
+    return member
+
+
+class TestClaimsCache:
+    @pytest.mark.asyncio
+    async def test_get_twice_requests_once(self):
+        bot = create_bot()
+        cache = ClaimsCache(bot)
+        member = create_member(1, 2)
+
+        assert await cache.get(member) == [Claims.tag_add]
+        assert await cache.get(member) == [Claims.tag_add]
+
+        assert bot.claim_route.get_claims_user.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_get_requests_once(self):
+        bot = create_bot()
+        cache = ClaimsCache(bot)
+        member = create_member(1, 2)
+
+        results = await asyncio.gather(*(cache.get(member) for _ in range(5)))
+
+        assert all(r == [Claims.tag_add] for r in results)
+        assert bot.claim_route.get_claims_user.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_different_guilds_request_separately(self):
+        bot = create_bot()
+        cache = ClaimsCache(bot)
+
+        await cache.get(create_member(1, 2))
+        await cache.get(create_member(3, 2))
+
+        assert bot.claim_route.get_claims_user.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_has_claim(self):
+        cache = ClaimsCache(create_bot())
+        member = create_member(1, 2)
+
+        assert await cache.has_claim(Claims.tag_add, member)
+        assert not await cache.has_claim(Claims.tag_delete, member)
+
+    @pytest.mark.asyncio
+    async def test_invalidate_requests_again(self):
+        bot = create_bot()
+        cache = ClaimsCache(bot)
+        member = create_member(1, 2)
+
+        await cache.get(member)
+        cache.invalidate(1, 2)
+        await cache.get(member)
+
+        assert bot.claim_route.get_claims_user.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidate_guild_only_drops_that_guild(self):
+        bot = create_bot()
+        cache = ClaimsCache(bot)
+
+        await cache.get(create_member(1, 2))
+        await cache.get(create_member(3, 2))
+        cache.invalidate_guild(1)
+        await cache.get(create_member(1, 2))
+        await cache.get(create_member(3, 2))
+
+        assert bot.claim_route.get_claims_user.call_count == 3
@@ -0,0 +1,135 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from bot.caches.command_status_index import CommandStatusIndex
+from bot.models.command_models import CommandRestrictionModel, CommandRestrictionType
+
+
+def restriction(command_name, channel_id=None, white_list=False, silently_fail=False):
+    return CommandRestrictionModel(
+        command_name=command_name,
+        channel_id=channel_id,
+        restriction_type=(
+            CommandRestrictionType.white_list if white_list else CommandRestrictionType.black_list
+        ),
+        silently_fail=None if white_list else silently_fail,
+    )
+
+
+def create_bot(*restrictions):
+    bot = mock.Mock()
+    bot.commands_route.get_restrictions = mock.AsyncMock(return_value=list(restrictions))
+    return bot
+
+
+class TestCommandStatusIndex:
+    @pytest.mark.asyncio
+    async def test_guild_is_loaded_once(self):
+        bot = create_bot(restriction("slots", channel_id=2))
+        index = CommandStatusIndex(bot, max_age=60)
+
+        assert (await index.get_status(1, 2, "slots")).disabled
+        assert not (await index.get_status(1, 3, "slots")).disabled
+        assert not (await index.get_status(1, 2, "help")).disabled
+
+        assert bot.commands_route.get_restrictions.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_checks_share_one_load(self):
+        bot = create_bot()
+        index = CommandStatusIndex(bot, max_age=60)
+
+        await asyncio.gather(*(index.get_status(1, i, "slots") for i in range(5)))
+
+        assert bot.commands_route.get_restrictions.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_guild_older_than_max_age_is_loaded_again(self):
+        bot = create_bot()
+        index = CommandStatusIndex(bot, max_age=0.01)
+
+        await index.get_status(1, 2, "slots")
+        await asyncio.sleep(0.02)
+        await index.get_status(1, 2, "slots")
+
+        assert bot.commands_route.get_restrictions.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_load_is_not_indexed(self):
+        bot = create_bot()
+        bot.commands_route.get_restrictions.return_value = None
+        index = CommandStatusIndex(bot, max_age=60)
+
+        assert await index.get_status(1, 2, "slots") is None
+        await index.get_status(1, 2, "slots")
+
+        assert bot.commands_route.get_restrictions.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_white_listed_channel_of_disabled_command_is_allowed(self):
+        bot = create_bot(
+            restriction("slots", silently_fail=True), restriction("slots", 3, white_list=True)
+        )
+        index = CommandStatusIndex(bot, max_age=60)
+
+        status = await index.get_status(1, 2, "slots")
+        assert status.disabled and status.silently_fail
+        assert not (await index.get_status(1, 3, "slots")).disabled
+
+    @pytest.mark.asyncio
+    async def test_changes_are_written_through(self):
+        bot = create_bot()
+        index = CommandStatusIndex(bot, max_age=60)
+        await index.get_status(1, 2, "slots")
+
+        index.command_disabled(1, "slots", None, silent=False)
+        assert (await index.get_status(1, 2, "slots")).disabled
+
+        index.command_enabled(1, "slots", 2)
+        assert not (await index.get_status(1, 2, "slots")).disabled
+        assert (await index.get_status(1, 3, "slots")).disabled
+
+        index.command_disabled(1, "slots", 2, silent=False)
+        assert (await index.get_status(1, 2, "slots")).disabled
+
+        index.command_enabled(1, "slots", None)
+        assert not (await index.get_status(1, 2, "slots")).disabled
+
+        assert bot.commands_route.get_restrictions.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_channel_restrictions_are_written_through(self):
+        bot = create_bot()
+        index = CommandStatusIndex(bot, max_age=60)
+        await index.get_status(1, 2, "slots")
+
+        index.command_disabled(1, "slots", 2, silent=True)
+        assert (await index.get_status(1, 2, "slots")).silently_fail
+        assert not (await index.get_status(1, 3, "slots")).disabled
+
+        index.command_enabled(1, "slots", 2)
+        assert not (await index.get_status(1, 2, "slots")).disabled
+
+    @pytest.mark.asyncio
+    async def test_load_started_before_change_is_not_indexed(self):
+        bot = create_bot()
+        index = CommandStatusIndex(bot, max_age=60)
+        loaded = asyncio.Event()
+
+        async def get_restrictions(guild_id):
+            await loaded.wait()
+            return []
+
+        bot.commands_route.get_restrictions.side_effect = get_restrictions
+        load = asyncio.create_task(index.get_status(1, 2, "slots"))
+        while not bot.commands_route.get_restrictions.await_count:
+            await asyncio.sleep(0)
+
+        index.command_disabled(1, "slots", None, silent=False)
+        loaded.set()
+        await load
+
+        await index.get_status(1, 2, "slots")
+        assert bot.commands_route.get_restrictions.await_count == 2
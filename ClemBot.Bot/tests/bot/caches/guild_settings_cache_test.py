@@ -0,0 +1,111 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from bot.caches.guild_settings_cache import GuildSettingsCache
+from bot.messaging.events import Events
+from bot.messaging.messenger import Messenger
+
+
+def create_bot():
+    bot = mock.Mock()
+    bot.messenger = Messenger()
+    bot.designated_channel_route.get_guild_all_designated_channels = mock.AsyncMock(
+        return_value={"message_log": [1]}
+    )
+    bot.custom_prefix_route.get_custom_prefixes = mock.AsyncMock(return_value=["?"])
+    bot.custom_tag_prefix_route.get_custom_tag_prefixes = mock.AsyncMock(return_value=["$"])
+    bot.guild_route.get_can_embed_link = mock.AsyncMock(return_value=True)
+    return bot
+
+
+class TestGuildSettingsCache:
+    @pytest.mark.asyncio
+    async def test_get_loads_snapshot(self):
+        cache = GuildSettingsCache(create_bot())
+
+        snapshot = await cache.get(1)
+
+        assert snapshot.prefixes == ["?"]
+        assert snapshot.tag_prefixes == ["$"]
+        assert snapshot.allow_embed_links
+        assert snapshot.designated_channel_ids("message_log") == [1]
+        assert snapshot.designated_channel_ids("user_join_log") == []
+
+    @pytest.mark.asyncio
+    async def test_get_twice_requests_once(self):
+        bot = create_bot()
+        cache = GuildSettingsCache(bot)
+
+        await cache.get(1)
+        await cache.get(1)
+
+        assert bot.custom_prefix_route.get_custom_prefixes.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_get_requests_once(self):
+        bot = create_bot()
+        cache = GuildSettingsCache(bot)
+
+        await asyncio.gather(cache.get(1), cache.get(1), cache.get(1))
+
+        assert bot.custom_prefix_route.get_custom_prefixes.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_get_unloaded_guild_raises_on_api_error(self):
+        bot = create_bot()
+        bot.custom_prefix_route.get_custom_prefixes.side_effect = ConnectionError()
+        cache = GuildSettingsCache(bot)
+
+        with pytest.raises(ConnectionError):
+            await cache.get(1)
+
+    @pytest.mark.asyncio
+    async def test_designated_channel_ids_are_empty_on_api_error(self):
+        bot = create_bot()
+        bot.custom_prefix_route.get_custom_prefixes.side_effect = ConnectionError()
+        cache = GuildSettingsCache(bot)
+
+        assert await cache.designated_channel_ids(1, "message_log") == []
+
+        bot.custom_prefix_route.get_custom_prefixes.side_effect = None
+        assert await cache.designated_channel_ids(1, "message_log") == [1]
+
+    @pytest.mark.asyncio
+    async def test_get_expired_serves_stale_on_api_error(self):
+        bot = create_bot()
+        cache = GuildSettingsCache(bot, ttl=0.01)
+
+        await cache.get(1)
+        await asyncio.sleep(0.02)
+        bot.custom_prefix_route.get_custom_prefixes.side_effect = ConnectionError()
+
+        snapshot = await cache.get(1)
+        # Let the background refresh fail
+        await asyncio.sleep(0)
+
+        assert snapshot.prefixes == ["?"]
+        assert (await cache.get(1)).prefixes == ["?"]
+
+    @pytest.mark.asyncio
+    async def test_set_custom_prefix_event_invalidates(self):
+        bot = create_bot()
+        cache = GuildSettingsCache(bot)
+
+        await cache.get(1)
+        bot.custom_prefix_route.get_custom_prefixes.return_value = [">>"]
+        await bot.messenger.publish(Events.on_set_custom_prefix, mock.Mock(id=1), ">>")
+
+        assert (await cache.get(1)).prefixes == [">>"]
+
+    @pytest.mark.asyncio
+    async def test_designated_channels_update_event_invalidates(self):
+        bot = create_bot()
+        cache = GuildSettingsCache(bot)
+
+        await cache.get(1)
+        bot.designated_channel_route.get_guild_all_designated_channels.return_value = {}
+        await bot.messenger.publish(Events.on_designated_channels_update, mock.Mock(id=1))
+
+        assert (await cache.get(1)).designated_channel_ids("message_log") == []
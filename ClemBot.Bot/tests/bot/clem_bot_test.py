@@ -0,0 +1,122 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+import bot.services.base_service as base_service
+from bot.clem_bot import ClemBot
+
+
+def create_service_type(name, order, *, depends_on=(), delay=0.0, error=None):
+    async def load_service(self):
+        order.append(f"{name} started")
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        order.append(f"{name} loaded")
+
+    return type(
+        name,
+        (),
+        {
+            "__init__": lambda self, *, bot: None,
+            "depends_on": list(depends_on),
+            "load_service": load_service,
+        },
+    )
+
+
+def create_bot():
+    bot = ClemBot.__new__(ClemBot)
+    bot.active_services = {}
+    bot.service_load_times = {}
+    bot.services_load_time = None
+    bot.global_error_handler = mock.AsyncMock()
+    return bot
+
+
+async def load_services(bot, *service_types):
+    with (
+        mock.patch.object(ClemBot, "walk_modules", return_value=[base_service]),
+        mock.patch.object(ClemBot, "walk_types", return_value=list(service_types)),
+    ):
+        await bot.load_services()
+
+
+class TestClemBotLoadServices:
+    @pytest.mark.asyncio
+    async def test_independent_services_load_concurrently(self):
+        order = []
+        bot = create_bot()
+
+        await load_services(
+            bot,
+            create_service_type("SlowService", order, delay=0.02),
+            create_service_type("FastService", order),
+        )
+
+        assert order == [
+            "SlowService started",
+            "FastService started",
+            "FastService loaded",
+            "SlowService loaded",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_services_wait_on_their_dependencies(self):
+        order = []
+        bot = create_bot()
+
+        await load_services(
+            bot,
+            create_service_type("DependentService", order, depends_on=["StartupService"]),
+            create_service_type("StartupService", order, delay=0.01),
+        )
+
+        assert order == [
+            "StartupService started",
+            "StartupService loaded",
+            "DependentService started",
+            "DependentService loaded",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_failed_dependency_skips_dependents(self):
+        order = []
+        error = RuntimeError("failed")
+        bot = create_bot()
+
+        await load_services(
+            bot,
+            create_service_type("StartupService", order, error=error),
+            create_service_type("DependentService", order, depends_on=["StartupService"]),
+            create_service_type("OtherService", order),
+        )
+
+        bot.global_error_handler.assert_awaited_once_with(error)
+        assert "DependentService started" not in order
+        assert "OtherService loaded" in order
+
+    @pytest.mark.asyncio
+    async def test_load_times_are_recorded(self):
+        bot = create_bot()
+
+        await load_services(
+            bot,
+            create_service_type("SlowService", [], delay=0.02),
+            create_service_type("FastService", []),
+        )
+
+        assert set(bot.service_load_times) == {"SlowService", "FastService"}
+        assert bot.service_load_times["SlowService"] >= 0.02
+        assert bot.services_load_time >= 0.02
+        assert bot.service_load_report(top=1).startswith("SlowService: ")
+
+    @pytest.mark.asyncio
+    async def test_unknown_dependency_raises(self):
+        bot = create_bot()
+
+        with pytest.raises(ValueError):
+            await load_services(
+                bot, create_service_type("DependentService", [], depends_on=["Missing"])
+            )
@@ -0,0 +1,137 @@
+from unittest import mock
+
+import pytest
+
+from bot.messaging.event_metrics import LatencyHistogram, render_prometheus
+from bot.messaging.event_policy import DispatchMode, EventPolicy
+from bot.messaging.messenger import Messenger
+
+
+class TestLatencyHistogram:
+    def test_empty_histogram_quantile_is_zero(self):
+        assert LatencyHistogram().quantile(0.99) == 0
+
+    def test_quantiles_fall_in_observed_buckets(self):
+        histogram = LatencyHistogram()
+        for _ in range(90):
+            histogram.observe(0.002)
+        for _ in range(10):
+            histogram.observe(0.2)
+
+        assert 0.001 <= histogram.quantile(0.5) <= 0.0025
+        assert 0.1 <= histogram.quantile(0.95) <= 0.2
+        assert histogram.quantile(1) == pytest.approx(0.2)
+
+    def test_merge_adds_observations(self):
+        first, second = LatencyHistogram(), LatencyHistogram()
+        first.observe(0.002)
+        second.observe(0.2)
+
+        first.merge(second)
+
+        assert first.count == 2
+        assert first.sum == pytest.approx(0.202)
+        assert first.max == pytest.approx(0.2)
+        assert first.quantile(1) == pytest.approx(0.2)
+
+    def test_quantile_never_exceeds_max(self):
+        histogram = LatencyHistogram()
+        histogram.observe(0.011)
+
+        assert histogram.quantile(0.99) <= 0.011
+
+    def test_values_past_last_bucket_are_counted(self):
+        histogram = LatencyHistogram()
+        histogram.observe(100)
+
+        assert histogram.counts[-1] == 1
+        assert histogram.quantile(0.5) <= 100
+
+
+class TestMessengerMetrics:
+    @pytest.mark.asyncio
+    async def test_event_and_listener_calls_are_counted(self):
+        messenger = Messenger()
+
+        async def foo():
+            pass
+
+        messenger.subscribe("bar", foo)
+        await messenger.publish("bar")
+        await messenger.publish("bar")
+
+        assert messenger.metrics.events["bar"].calls == 2
+        (listener,) = [m for (e, _), m in messenger.metrics.listeners.items() if e == "bar"]
+        assert listener.calls == 2
+        assert listener.latency.count == 2
+
+    @pytest.mark.asyncio
+    async def test_listener_errors_are_counted(self):
+        messenger = Messenger()
+
+        async def foo():
+            raise ValueError()
+
+        messenger.subscribe("bar", foo)
+        with pytest.raises(ValueError):
+            await messenger.publish("bar")
+
+        assert messenger.metrics.events["bar"].errors == 1
+        assert messenger.metrics.listener("bar", foo).errors == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_listener_errors_are_counted(self):
+        messenger = Messenger()
+        messenger.event_policies["bar"] = EventPolicy(dispatch=DispatchMode.concurrent)
+        messenger.error_callback = mock.AsyncMock()
+
+        async def foo():
+            raise ValueError()
+
+        messenger.subscribe("bar", foo)
+        await messenger.publish("bar")
+
+        assert messenger.metrics.events["bar"].errors == 1
+        assert messenger.metrics.listener("bar", foo).errors == 1
+
+    @pytest.mark.asyncio
+    async def test_queue_wait_is_recorded(self):
+        messenger = Messenger()
+
+        await messenger.publish_to_queue("bar", 1)
+        await messenger.publish_to_queue("bar", 1)
+        await messenger.close()
+
+        assert messenger.guild_queues[1].metrics.wait.count == 2
+
+    @pytest.mark.asyncio
+    async def test_queue_metrics_keep_reclaimed_queues(self):
+        messenger = Messenger(queue_idle_timeout=0)
+
+        await messenger.publish_to_queue("bar", 1)
+        await messenger.publish_to_queue("bar", 2)
+        await messenger._ready_guilds.join()
+        messenger.reclaim_idle_queues()
+        await messenger.publish_to_queue("bar", 1)
+        await messenger.close()
+
+        assert messenger.queue_metrics().wait.count == 3
+
+    @pytest.mark.asyncio
+    async def test_render_prometheus(self):
+        messenger = Messenger()
+
+        async def foo():
+            pass
+
+        messenger.subscribe("bar", foo)
+        await messenger.publish_to_queue("bar", 1)
+        await messenger.close()
+
+        text = render_prometheus(messenger)
+
+        assert 'clembot_event_calls_total{event="bar"} 1' in text
+        assert "clembot_guild_queue_wait_seconds_count 1" in text
+        assert "guild=" not in text
+        assert 'clembot_event_duration_seconds_bucket{event="bar",le="+Inf"} 1' in text
+        assert 'clembot_listener_calls_total{event="bar",listener=' in text
@@ -0,0 +1,108 @@
+from unittest import mock
+
+import discord
+import pytest
+
+from bot.messaging.event_policy import EventPriority
+from bot.messaging.event_queue import QueuedEvent
+from bot.messaging.event_store import QueuedEventStore
+
+
+def create_bot():
+    guild = mock.Mock(spec=discord.Guild)
+    guild.id = 1
+
+    member = mock.Mock(spec=discord.Member)
+    member.id = 2
+    member.guild = guild
+
+    role = mock.Mock(spec=discord.Role)
+    role.id = 3
+    role.guild = guild
+
+    guild.get_member.side_effect = lambda id: member if id == member.id else None
+    guild.get_role.side_effect = lambda id: role if id == role.id else None
+
+    bot = mock.Mock()
+    bot.get_guild.side_effect = lambda id: guild if id == guild.id else None
+    return bot, guild, member, role
+
+
+class TestQueuedEventStore:
+    @pytest.mark.asyncio
+    async def test_events_are_restored_from_cache(self, tmp_path):
+        bot, guild, member, role = create_bot()
+        store = QueuedEventStore(tmp_path / "events.json", bot)
+
+        event = QueuedEvent(
+            "on_guild_role_update", (role, member), {"count": 5}, priority=EventPriority.high
+        )
+        assert await store.save([(guild.id, event)]) == 1
+
+        ((guild_id, restored),) = await store.load()
+
+        assert guild_id == guild.id
+        assert restored.name == "on_guild_role_update"
+        assert restored.args == (role, member)
+        assert restored.kwargs == {"count": 5}
+        assert restored.priority is EventPriority.high
+
+    @pytest.mark.asyncio
+    async def test_load_forgets_events(self, tmp_path):
+        bot, guild, _, _ = create_bot()
+        store = QueuedEventStore(tmp_path / "events.json", bot)
+
+        await store.save([(guild.id, QueuedEvent("on_guild_joined", (guild,), {}))])
+        await store.load()
+
+        assert not store.path.exists()
+        assert await store.load() == []
+
+    @pytest.mark.asyncio
+    async def test_unpersistable_events_are_skipped(self, tmp_path):
+        bot, guild, _, _ = create_bot()
+        store = QueuedEventStore(tmp_path / "events.json", bot)
+
+        events = [
+            (guild.id, QueuedEvent("on_raw_reaction_add", (object(),), {})),
+            (guild.id, QueuedEvent("on_guild_joined", (guild,), {})),
+        ]
+
+        assert await store.save(events) == 1
+        assert [e.name for _, e in await store.load()] == ["on_guild_joined"]
+
+    @pytest.mark.asyncio
+    async def test_events_of_missing_objects_are_skipped(self, tmp_path):
+        bot, guild, member, _ = create_bot()
+        store = QueuedEventStore(tmp_path / "events.json", bot)
+
+        await store.save([(guild.id, QueuedEvent("on_user_removed", (member,), {}))])
+        guild.get_member.side_effect = lambda id: None
+
+        assert await store.load() == []
+
+    @pytest.mark.asyncio
+    async def test_uncached_members_are_fetched(self, tmp_path):
+        bot, guild, member, _ = create_bot()
+        store = QueuedEventStore(tmp_path / "events.json", bot)
+
+        await store.save([(guild.id, QueuedEvent("on_user_removed", (member,), {}))])
+
+        # Members arent cached under the lean memory profiles
+        guild.chunked = False
+        guild.get_member.side_effect = lambda id: None
+        guild.fetch_member = mock.AsyncMock(return_value=member)
+
+        ((_, restored),) = await store.load()
+
+        assert restored.args == (member,)
+        guild.fetch_member.assert_awaited_once_with(member.id)
+
+    @pytest.mark.asyncio
+    async def test_corrupt_file_is_discarded(self, tmp_path):
+        bot, _, _, _ = create_bot()
+        store = QueuedEventStore(tmp_path / "events.json", bot)
+        store.path.write_text("[{")
+
+        assert await store.load() == []
+        assert not store.path.exists()
@@ -0,0 +1,38 @@
+import time
+
+import pytest
+
+from bot.messaging.messenger import Messenger
+
+DISPATCHES = 2000
+
+
+class TestMessengerDispatchBenchmark:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("listener_count", [1, 10, 100])
+    async def test_dispatch_cost(self, listener_count):
+        messenger = Messenger()
+
+        class Foo:
+            def __init__(self):
+                self.calls = 0
+
+            async def listener(self, *args, **kwargs):
+                self.calls += 1
+
+        listeners = [Foo() for _ in range(listener_count)]
+        for listener in listeners:
+            messenger.subscribe("bar", listener.listener)
+
+        start = time.perf_counter()
+        for _ in range(DISPATCHES):
+            await messenger.publish("bar", 1, baz=2)
+        elapsed = time.perf_counter() - start
+
+        # Timings depend on the machine so they are only reported, run with -s to see them
+        print(
+            f"\n{listener_count} listeners: {elapsed / DISPATCHES * 1e6:.2f}us per dispatch, "
+            f"{elapsed / (DISPATCHES * listener_count) * 1e6:.3f}us per listener"
+        )
+
+        assert all(listener.calls == DISPATCHES for listener in listeners)
@@ -1,7 +1,12 @@
+import asyncio
+import time
 from unittest import mock
 
 import pytest
 
+from bot.messaging.event_policy import DispatchMode, EventPolicy, EventPriority, OverflowPolicy
+from bot.messaging.event_queue import GuildEventQueue, QueuedEvent
+from bot.messaging.events import Events
 from bot.messaging.messenger import Messenger
 
 
@@ -621,3 +626,752 @@ class TestMessenger:
         await messenger.close()
 
         assert error_call_state == [1] and foo.call_state == [2, 2]
+
+    @pytest.mark.asyncio
+    async def test_publish_to_queue_after_close_is_dropped(self):
+        messenger = Messenger()
+        listener = mock.Mock()
+
+        async def bar():
+            listener()
+
+        messenger.subscribe("bar", bar)
+        await messenger.close()
+
+        await messenger.publish_to_queue("bar", 1)
+        await asyncio.sleep(0)
+
+        assert not messenger._queue_workers
+        assert messenger.drain_metrics.rejected == 1
+        assert listener.call_count == 0
+
+
+class TestMessengerDispatchPolicy:
+    @pytest.mark.asyncio
+    async def test_declared_event_policy_is_used(self):
+        messenger = Messenger()
+
+        assert (
+            messenger.event_policies[Events.on_guild_message_received].dispatch
+            is DispatchMode.concurrent
+        )
+
+    @pytest.mark.asyncio
+    async def test_concurrent_policy_runs_listeners_at_the_same_time(self):
+        messenger = Messenger()
+        messenger.event_policies["bar"] = EventPolicy(dispatch=DispatchMode.concurrent)
+        running = []
+        overlap = []
+
+        class Foo:
+            async def slow(self):
+                running.append(1)
+                await asyncio.sleep(0.01)
+                overlap.append(len(running))
+                running.pop()
+
+        foo = Foo()
+        messenger.subscribe("bar", foo.slow)
+        messenger.subscribe("bar", foo.slow)
+        await messenger.publish("bar")
+
+        assert max(overlap) == 2
+
+    @pytest.mark.asyncio
+    async def test_bounded_policy_limits_running_listeners(self):
+        messenger = Messenger()
+        messenger.event_policies["bar"] = EventPolicy(
+            dispatch=DispatchMode.bounded, max_concurrency=2
+        )
+        running = []
+        overlap = []
+
+        async def slow():
+            running.append(1)
+            await asyncio.sleep(0.01)
+            overlap.append(len(running))
+            running.pop()
+
+        listeners = [slow for _ in range(5)]
+        for listener in listeners:
+            messenger.subscribe("bar", listener)
+        await messenger.publish("bar")
+
+        assert len(overlap) == 5
+        assert max(overlap) == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_policy_isolates_listener_errors(self):
+        messenger = Messenger()
+        messenger.event_policies["bar"] = EventPolicy(dispatch=DispatchMode.concurrent)
+        errors = []
+
+        async def error_callback(e, *, traceback: str):
+            errors.append(e)
+
+        messenger.error_callback = error_callback
+
+        class Foo:
+            def __init__(self):
+                self.mock = mock.Mock()
+
+            async def fails(self):
+                raise ValueError()
+
+            async def succeeds(self):
+                self.mock()
+
+        foo = Foo()
+        messenger.subscribe("bar", foo.fails)
+        messenger.subscribe("bar", foo.succeeds)
+        messenger.subscribe("bar", foo.fails)
+        await messenger.publish("bar")
+
+        foo.mock.assert_called_once_with()
+        assert len(errors) == 2
+        assert all(isinstance(e, ValueError) for e in errors)
+
+
+class TestMessengerListenerTable:
+    @pytest.mark.asyncio
+    async def test_dead_ref_does_not_skip_next_listener(self):
+        messenger = Messenger()
+
+        class Foo:
+            def __init__(self):
+                self.mock = mock.Mock()
+
+            async def listener(self):
+                self.mock()
+
+        dead = Foo()
+        alive = Foo()
+        messenger.subscribe("bar", dead.listener)
+        messenger.subscribe("bar", alive.listener)
+        del dead
+        await messenger.publish("bar")
+
+        alive.mock.assert_called_once_with()
+        assert len(messenger._listeners["bar"]) == 1
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe_removes_listener(self):
+        messenger = Messenger()
+
+        class Foo:
+            def __init__(self):
+                self.mock = mock.Mock()
+
+            async def listener(self):
+                self.mock()
+
+        foo = Foo()
+        messenger.subscribe("bar", foo.listener)
+        messenger.unsubscribe("bar", foo.listener)
+        await messenger.publish("bar")
+
+        foo.mock.assert_not_called()
+        assert messenger._listeners["bar"] == ()
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe_unknown_event_does_nothing(self):
+        async def foo():
+            pass
+
+        messenger = Messenger()
+        messenger.unsubscribe("bar", foo)
+
+        assert "bar" not in messenger._events
+
+    @pytest.mark.asyncio
+    async def test_subscribe_during_publish_applies_to_next_publish(self):
+        messenger = Messenger()
+        calls = []
+
+        async def second():
+            calls.append(2)
+
+        async def first():
+            calls.append(1)
+            messenger.subscribe("bar", second)
+
+        messenger.subscribe("bar", first)
+        await messenger.publish("bar")
+        assert calls == [1]
+
+        await messenger.publish("bar")
+        assert calls == [1, 1, 2]
+
+
+class TestMessengerQueueOverflow:
+    @pytest.mark.asyncio
+    async def test_drop_oldest_policy_drops_oldest_event(self):
+        messenger = Messenger()
+        messenger.event_policies["bar"] = EventPolicy(
+            max_queue_depth=2, overflow=OverflowPolicy.drop_oldest
+        )
+        queue = GuildEventQueue(messenger.event_policies)
+
+        for i in range(4):
+            await queue.put(QueuedEvent("bar", (i,), {}))
+
+        assert queue.qsize() == 2
+        assert queue.metrics.dropped == 2
+        assert [(await queue.get()).args for _ in range(2)] == [(2,), (3,)]
+
+    @pytest.mark.asyncio
+    async def test_drop_oldest_only_drops_same_event(self):
+        policies = {"bar": EventPolicy(max_queue_depth=1, overflow=OverflowPolicy.drop_oldest)}
+        queue = GuildEventQueue(policies)
+
+        await queue.put(QueuedEvent("baz", (), {}))
+        await queue.put(QueuedEvent("bar", (1,), {}))
+        await queue.put(QueuedEvent("bar", (2,), {}))
+
+        assert [(e.name, e.args) for e in [await queue.get(), await queue.get()]] == [
+            ("baz", ()),
+            ("bar", (2,)),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_block_policy_waits_for_room(self):
+        queue = GuildEventQueue({"bar": EventPolicy(max_queue_depth=1)})
+
+        await queue.put(QueuedEvent("bar", (1,), {}))
+        put = asyncio.create_task(queue.put(QueuedEvent("bar", (2,), {})))
+        await asyncio.sleep(0)
+
+        assert not put.done()
+        assert queue.metrics.blocked == 1
+
+        assert (await queue.get()).args == (1,)
+        await put
+        assert (await queue.get()).args == (2,)
+
+    @pytest.mark.asyncio
+    async def test_coalesce_policy_keeps_latest_per_key(self):
+        queue = GuildEventQueue(
+            {"bar": EventPolicy(overflow=OverflowPolicy.coalesce, coalesce_key=lambda k, v: k)}
+        )
+
+        await queue.put(QueuedEvent("bar", (1, "a"), {}))
+        await queue.put(QueuedEvent("bar", (2, "b"), {}))
+        await queue.put(QueuedEvent("bar", (1, "c"), {}))
+
+        assert queue.qsize() == 2
+        assert queue.metrics.coalesced == 1
+        assert [(await queue.get()).args for _ in range(2)] == [(1, "c"), (2, "b")]
+
+    @pytest.mark.asyncio
+    async def test_coalesce_after_dispatch_queues_again(self):
+        queue = GuildEventQueue(
+            {"bar": EventPolicy(overflow=OverflowPolicy.coalesce, coalesce_key=lambda k: k)}
+        )
+
+        await queue.put(QueuedEvent("bar", (1,), {}))
+        await queue.get()
+        await queue.put(QueuedEvent("bar", (1,), {}))
+
+        assert queue.qsize() == 1
+        assert queue.metrics.coalesced == 0
+
+    @pytest.mark.asyncio
+    async def test_member_update_keeps_first_before_and_last_after(self):
+        messenger = Messenger()
+        first, second, third = (mock.Mock(id=1) for _ in range(3))
+        calls = []
+
+        async def on_member_update(before, after):
+            calls.append((before, after))
+
+        # Hold the queue so the updates coalesce before they are dispatched
+        gate = asyncio.Event()
+
+        async def wait_for_gate():
+            await gate.wait()
+
+        messenger.subscribe("wait", wait_for_gate)
+        messenger.subscribe(Events.on_member_update, on_member_update)
+
+        await messenger.publish_to_queue("wait", 1)
+        await messenger.publish_to_queue(Events.on_member_update, 1, first, second)
+        await messenger.publish_to_queue(Events.on_member_update, 1, second, third)
+        gate.set()
+        await messenger.close()
+
+        assert calls == [(first, third)]
+        assert messenger._guild_event_queue[1].metrics.coalesced == 1
+
+
+class TestMessengerQueueWorkers:
+    @pytest.mark.asyncio
+    async def test_workers_are_shared_between_guilds(self):
+        messenger = Messenger(queue_workers=2)
+
+        for guild_id in range(10):
+            await messenger.publish_to_queue("bar", guild_id)
+
+        assert len(messenger._queue_workers) == 2
+        await messenger.close()
+
+    @pytest.mark.asyncio
+    async def test_guilds_are_dispatched_round_robin(self):
+        messenger = Messenger(queue_workers=1)
+        calls = []
+
+        async def listener(guild_id, i):
+            calls.append((guild_id, i))
+
+        messenger.subscribe("bar", listener)
+
+        for i in range(3):
+            await messenger.publish_to_queue("bar", 1, 1, i)
+        for i in range(3):
+            await messenger.publish_to_queue("bar", 2, 2, i)
+        await messenger.close()
+
+        assert calls == [(1, 0), (2, 0), (1, 1), (2, 1), (1, 2), (2, 2)]
+
+    @pytest.mark.asyncio
+    async def test_guild_order_is_kept_with_many_workers(self):
+        messenger = Messenger(queue_workers=4)
+        calls = []
+
+        async def listener(i):
+            # Yield so other workers get a chance to pick up the guild mid dispatch
+            await asyncio.sleep(0)
+            calls.append(i)
+
+        messenger.subscribe("bar", listener)
+
+        for i in range(20):
+            await messenger.publish_to_queue("bar", 1, i)
+        await messenger.close()
+
+        assert calls == list(range(20))
+
+    @pytest.mark.asyncio
+    async def test_idle_queues_are_reclaimed(self):
+        messenger = Messenger(queue_idle_timeout=60)
+
+        await messenger.publish_to_queue("bar", 1)
+        await messenger.close()
+
+        # Only lower the timeout now so the background reaper doesnt reclaim it first
+        messenger.queue_idle_timeout = 0
+        assert messenger.reclaim_idle_queues() == 1
+        assert len(messenger._guild_event_queue) == 0
+
+    @pytest.mark.asyncio
+    async def test_active_queues_are_not_reclaimed(self):
+        messenger = Messenger(queue_idle_timeout=60)
+
+        await messenger.publish_to_queue("bar", 1)
+        await messenger.close()
+
+        assert messenger.reclaim_idle_queues() == 0
+        assert len(messenger._guild_event_queue) == 1
+
+    @pytest.mark.asyncio
+    async def test_reclaimed_guild_gets_new_queue(self):
+        messenger = Messenger(queue_idle_timeout=0)
+        listener = mock.Mock()
+
+        async def bar():
+            listener()
+
+        messenger.subscribe("bar", bar)
+
+        await messenger.publish_to_queue("bar", 1)
+        await messenger._ready_guilds.join()
+        messenger.reclaim_idle_queues()
+        await messenger.publish_to_queue("bar", 1)
+        await messenger.close()
+
+        assert listener.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_worker_survives_queue_errors(self):
+        messenger = Messenger(queue_workers=1)
+        messenger.error_callback = mock.AsyncMock()
+        calls = []
+
+        async def listener(batch):
+            calls.append(batch)
+
+        messenger.subscribe_batch("bar", listener)
+        error = RuntimeError("failed")
+
+        with mock.patch.object(GuildEventQueue, "get_batch", side_effect=[error, []]):
+            await messenger.publish_to_queue("bar", 1, 1)
+            await messenger.publish_to_queue("bar", 1, 2)
+            await messenger.close()
+
+        messenger.error_callback.assert_awaited_once_with(error, traceback=mock.ANY)
+        assert calls == [[(2,)]]
+
+
+class FakeEventStore:
+    def __init__(self):
+        self.events = []
+
+    async def save(self, events):
+        self.events = list(events)
+        return len(self.events)
+
+    async def load(self):
+        events, self.events = self.events, []
+        return events
+
+
+class TestMessengerDrain:
+    @pytest.mark.asyncio
+    async def test_drained_events_are_counted(self):
+        messenger = Messenger(event_store=FakeEventStore())
+        calls = []
+
+        async def listener(i):
+            calls.append(i)
+
+        messenger.subscribe("bar", listener)
+
+        for i in range(3):
+            await messenger.publish_to_queue("bar", 1, i)
+        await messenger.close()
+
+        assert calls == [0, 1, 2]
+        assert messenger.drain_metrics.drained == 3
+        assert messenger.drain_metrics.persisted == 0
+        assert messenger.event_store.events == []
+
+    @pytest.mark.asyncio
+    async def test_events_left_at_deadline_are_persisted(self):
+        store = FakeEventStore()
+        messenger = Messenger(queue_workers=1, drain_timeout=0.01, event_store=store)
+        release = asyncio.Event()
+
+        async def listener(i):
+            await release.wait()
+
+        messenger.subscribe("bar", listener)
+
+        for i in range(3):
+            await messenger.publish_to_queue("bar", 1, i)
+        await messenger.publish_to_queue("bar", 2, 3, priority=EventPriority.high)
+        await messenger.close()
+
+        # The first event was in flight when the deadline passed, it isnt persisted
+        assert [(g, e.name, e.args) for g, e in store.events] == [
+            (1, "bar", (1,)),
+            (1, "bar", (2,)),
+            (2, "bar", (3,)),
+        ]
+        assert store.events[2][1].priority is EventPriority.high
+        assert messenger.drain_metrics.persisted == 3
+        assert messenger.drain_metrics.drained == 1
+
+    @pytest.mark.asyncio
+    async def test_leftovers_are_dropped_without_store(self):
+        messenger = Messenger(queue_workers=1, drain_timeout=0.01)
+
+        async def listener(i):
+            await asyncio.Event().wait()
+
+        messenger.subscribe("bar", listener)
+
+        for i in range(3):
+            await messenger.publish_to_queue("bar", 1, i)
+        await messenger.close()
+
+        assert messenger.drain_metrics.dropped == 2
+        assert messenger._guild_event_queue[1].qsize() == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_save_is_counted_as_dropped(self):
+        store = FakeEventStore()
+        store.save = mock.AsyncMock(side_effect=OSError)
+        messenger = Messenger(queue_workers=1, drain_timeout=0.01, event_store=store)
+        messenger.error_callback = mock.AsyncMock()
+
+        async def listener(i):
+            await asyncio.Event().wait()
+
+        messenger.subscribe("bar", listener)
+
+        for i in range(2):
+            await messenger.publish_to_queue("bar", 1, i)
+        await messenger.close()
+
+        assert messenger.drain_metrics.dropped == 1
+        messenger.error_callback.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_persisted_events_are_replayed(self):
+        store = FakeEventStore()
+        store.events = [(1, QueuedEvent("bar", (1,), {"x": 2}, priority=EventPriority.low))]
+        messenger = Messenger(event_store=store)
+        calls = []
+
+        async def listener(i, x):
+            calls.append((i, x))
+
+        messenger.subscribe("bar", listener)
+
+        assert await messenger.replay_persisted() == 1
+        await messenger.close()
+
+        assert calls == [(1, 2)]
+        assert messenger.drain_metrics.replayed == 1
+        assert store.events == []
+
+    @pytest.mark.asyncio
+    async def test_replay_without_store_does_nothing(self):
+        messenger = Messenger()
+
+        assert await messenger.replay_persisted() == 0
+
+
+class TestMessengerBatchSubscription:
+    @pytest.mark.asyncio
+    async def test_queued_events_are_dispatched_as_batch(self):
+        messenger = Messenger(queue_workers=1)
+        batches = []
+
+        async def listener(batch):
+            batches.append(batch)
+
+        messenger.subscribe_batch("bar", listener)
+
+        for i in range(5):
+            await messenger.publish_to_queue("bar", 1, i)
+        await messenger.close()
+
+        assert batches == [[(0,), (1,), (2,), (3,), (4,)]]
+
+    @pytest.mark.asyncio
+    async def test_batch_is_split_at_max_items(self):
+        messenger = Messenger(queue_workers=1)
+        batches = []
+
+        async def listener(batch):
+            batches.append(batch)
+
+        messenger.subscribe_batch("bar", listener, max_items=2)
+
+        for i in range(5):
+            await messenger.publish_to_queue("bar", 1, i)
+        await messenger.close()
+
+        assert [len(b) for b in batches] == [2, 2, 1]
+
+    @pytest.mark.asyncio
+    async def test_batch_stops_at_other_event(self):
+        messenger = Messenger(queue_workers=1)
+        calls = []
+
+        async def bar(batch):
+            calls.append(("bar", batch))
+
+        async def baz(i):
+            calls.append(("baz", i))
+
+        messenger.subscribe_batch("bar", bar)
+        messenger.subscribe("baz", baz)
+
+        await messenger.publish_to_queue("bar", 1, 0)
+        await messenger.publish_to_queue("bar", 1, 1)
+        await messenger.publish_to_queue("baz", 1, 2)
+        await messenger.publish_to_queue("bar", 1, 3)
+        await messenger.close()
+
+        assert calls == [("bar", [(0,), (1,)]), ("baz", 2), ("bar", [(3,)])]
+
+    @pytest.mark.asyncio
+    async def test_batch_waits_for_more_events(self):
+        messenger = Messenger(queue_workers=1)
+        batches = []
+
+        async def listener(batch):
+            batches.append(batch)
+
+        messenger.subscribe_batch("bar", listener, max_wait=0.05)
+
+        await messenger.publish_to_queue("bar", 1, 0)
+        await asyncio.sleep(0.01)
+        await messenger.publish_to_queue("bar", 1, 1)
+        await messenger.close()
+
+        assert batches == [[(0,), (1,)]]
+
+    @pytest.mark.asyncio
+    async def test_regular_listeners_still_get_each_event(self):
+        messenger = Messenger(queue_workers=1)
+        calls = []
+
+        async def single(i):
+            calls.append(i)
+
+        async def batch(batch):
+            calls.append(batch)
+
+        messenger.subscribe("bar", single)
+        messenger.subscribe_batch("bar", batch)
+
+        await messenger.publish_to_queue("bar", 1, 0)
+        await messenger.publish_to_queue("bar", 1, 1)
+        await messenger.close()
+
+        assert calls == [0, 1, [(0,), (1,)]]
+
+    @pytest.mark.asyncio
+    async def test_publish_dispatches_batch_of_one(self):
+        messenger = Messenger()
+        batches = []
+
+        async def listener(batch):
+            batches.append(batch)
+
+        messenger.subscribe_batch("bar", listener)
+        await messenger.publish("bar", 1, 2)
+
+        assert batches == [[(1, 2)]]
+
+    @pytest.mark.asyncio
+    async def test_batch_listener_error_is_reported(self):
+        messenger = Messenger()
+        errors = []
+
+        async def error_callback(e, *, traceback: str):
+            errors.append(e)
+
+        async def listener(batch):
+            raise ValueError()
+
+        messenger.error_callback = error_callback
+        messenger.subscribe_batch("bar", listener)
+
+        await messenger.publish_to_queue("bar", 1)
+        await messenger.close()
+
+        assert len(errors) == 1
+
+    @pytest.mark.asyncio
+    async def test_dead_batch_listener_is_removed(self):
+        messenger = Messenger()
+
+        class Foo:
+            async def listener(self, batch):
+                pass
+
+        foo = Foo()
+        messenger.subscribe_batch("bar", foo.listener)
+        del foo
+
+        assert messenger._batch_listeners["bar"] == ()
+
+
+def lane_event(name, priority, queued_at=None):
+    return QueuedEvent(
+        name,
+        (),
+        {},
+        priority=priority,
+        queued_at=time.perf_counter() if queued_at is None else queued_at,
+    )
+
+
+class TestGuildEventQueueLanes:
+    @pytest.mark.asyncio
+    async def test_lanes_are_drained_by_weight(self):
+        queue = GuildEventQueue(
+            {}, lane_weights={EventPriority.high: 2, EventPriority.normal: 1, EventPriority.low: 1}
+        )
+
+        for i in range(4):
+            await queue.put(lane_event(f"high{i}", EventPriority.high))
+        for i in range(2):
+            await queue.put(lane_event(f"low{i}", EventPriority.low))
+
+        names = [(await queue.get()).name for _ in range(6)]
+
+        assert names == ["high0", "low0", "high1", "high2", "low1", "high3"]
+
+    @pytest.mark.asyncio
+    async def test_order_within_lane_is_kept(self):
+        queue = GuildEventQueue({})
+
+        for i in range(5):
+            await queue.put(lane_event(f"low{i}", EventPriority.low))
+            await queue.put(lane_event(f"high{i}", EventPriority.high))
+
+        names = [(await queue.get()).name for _ in range(10)]
+
+        assert [n for n in names if n.startswith("low")] == [f"low{i}" for i in range(5)]
+        assert [n for n in names if n.startswith("high")] == [f"high{i}" for i in range(5)]
+
+    @pytest.mark.asyncio
+    async def test_starving_lane_is_served_first(self):
+        queue = GuildEventQueue({}, starvation_timeout=1)
+
+        await queue.put(lane_event("high", EventPriority.high))
+        await queue.put(lane_event("low", EventPriority.low, queued_at=time.perf_counter() - 2))
+
+        assert (await queue.get()).name == "low"
+        assert queue.metrics.starvation_promotions == 1
+
+    @pytest.mark.asyncio
+    async def test_event_policy_priority_is_used(self):
+        queue = GuildEventQueue({"bar": EventPolicy(priority=EventPriority.low)})
+
+        await queue.put(QueuedEvent("bar", (), {}))
+
+        assert queue.lane_size(EventPriority.low) == 1
+
+    @pytest.mark.asyncio
+    async def test_mixed_priorities_of_one_event_drop_queued_events(self):
+        queue = GuildEventQueue(
+            {"bar": EventPolicy(max_queue_depth=2, overflow=OverflowPolicy.drop_oldest)}
+        )
+
+        await queue.put(QueuedEvent("bar", (1,), {}, priority=EventPriority.normal))
+        await queue.put(QueuedEvent("bar", (2,), {}, priority=EventPriority.high))
+        assert (await queue.get()).args == (2,)
+
+        # The first event is the oldest one still queued, not the one that was dispatched
+        await queue.put(QueuedEvent("bar", (3,), {}, priority=EventPriority.normal))
+        await queue.put(QueuedEvent("bar", (4,), {}, priority=EventPriority.normal))
+
+        assert queue.lane_size(EventPriority.high) == 0
+        assert queue.lane_size(EventPriority.normal) == 2
+        assert [(await queue.get()).args for _ in range(2)] == [(3,), (4,)]
+        assert queue.metrics.dropped == 1
+
+    @pytest.mark.asyncio
+    async def test_publish_priority_overrides_policy(self):
+        messenger = Messenger()
+        calls = []
+
+        async def listener(i):
+            calls.append(i)
+
+        messenger.subscribe(Events.on_reaction_add, listener)
+        messenger.subscribe(Events.on_initial_user_join, listener)
+
+        # Hold the queue until all events are queued
+        gate = asyncio.Event()
+
+        async def wait_for_gate():
+            await gate.wait()
+
+        messenger.subscribe("wait", wait_for_gate)
+        await messenger.publish_to_queue("wait", 1)
+
+        await messenger.publish_to_queue(Events.on_reaction_add, 1, "reaction")
+        await messenger.publish_to_queue(Events.on_initial_user_join, 1, "join")
+        await messenger.publish_to_queue(
+            Events.on_reaction_add, 1, "urgent", priority=EventPriority.high
+        )
+        gate.set()
+        await messenger.close()
+
+        assert calls == ["join", "urgent", "reaction"]
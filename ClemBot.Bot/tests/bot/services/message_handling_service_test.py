@@ -0,0 +1,314 @@
+import asyncio
+from unittest import mock
+
+import aiohttp
+import pytest
+
+from bot.caches.guild_settings_cache import GuildSettingsSnapshot
+from bot.messaging.messenger import Messenger
+from bot.services.message_handling_service import (
+    SPOOL_CREATE,
+    SPOOL_EDIT,
+    SPOOL_MAX_ATTEMPTS,
+    MessageHandlingService,
+    combine_spooled,
+)
+from bot.utils.spool import Spool, SpoolRecord
+
+
+def create_service(tmp_path, **kwargs):
+    bot = mock.Mock()
+    bot.messenger = Messenger()
+    bot.guild_settings.get = mock.AsyncMock(
+        return_value=GuildSettingsSnapshot(
+            designated_channels={"message_log": [1]},
+            prefixes=[],
+            tag_prefixes=[],
+            allow_embed_links=False,
+        )
+    )
+    bot.guild_settings.designated_channel_ids = mock.AsyncMock(return_value=[1])
+    bot.message_route.batch_create_message = mock.AsyncMock()
+    bot.message_route.batch_edit_message = mock.AsyncMock()
+    return MessageHandlingService(bot=bot, spool=Spool(tmp_path / "spool.ndjson"), **kwargs)
+
+
+def response_error(status):
+    return aiohttp.ClientResponseError(mock.Mock(), (), status=status)
+
+
+def create_message(id):
+    message = mock.Mock()
+    message.id = id
+    message.content = f"message {id}"
+    message.guild.id = 1
+    message.author.id = 2
+    message.channel.id = 3
+    return message
+
+
+class TestMessageHandlingServiceBatching:
+    @pytest.mark.asyncio
+    async def test_full_batch_is_flushed_in_background(self, tmp_path):
+        service = create_service(tmp_path, batch_size=2, batch_max_age=60)
+        await service.load_service()
+
+        await service.batch_send_message(create_message(1))
+        await service.batch_send_message(create_message(2))
+        await asyncio.sleep(0.01)
+
+        create = service.bot.message_route.batch_create_message
+        create.assert_awaited_once()
+        assert [m.id for m in create.await_args.args[0]] == [1, 2]
+        assert service.batch_metrics.flushes == 1
+        assert service.batch_metrics.last_batch_size == 2
+
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_old_batch_is_flushed_in_background(self, tmp_path):
+        service = create_service(tmp_path, batch_size=100, batch_max_age=0.01)
+        await service.load_service()
+
+        await service.batch_send_message(create_message(1))
+        assert service.bot.message_route.batch_create_message.await_count == 0
+
+        await asyncio.sleep(0.05)
+
+        service.bot.message_route.batch_create_message.assert_awaited_once()
+        assert len(service.message_batch) == 0
+
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_flusher_survives_spool_errors(self, tmp_path):
+        service = create_service(tmp_path, batch_size=1, batch_max_age=0.01)
+        service.bot.global_error_handler = mock.AsyncMock()
+        await service.load_service()
+
+        error = OSError("disk full")
+        with mock.patch.object(service.spool, "append", side_effect=error):
+            await service.batch_send_message(create_message(1))
+            await asyncio.sleep(0.005)
+
+        service.bot.global_error_handler.assert_awaited_once_with(error, traceback=mock.ANY)
+
+        await service.batch_send_message(create_message(2))
+        await asyncio.sleep(0.05)
+
+        create = service.bot.message_route.batch_create_message
+        create.assert_awaited_once()
+        assert [m.id for m in create.await_args.args[0]] == [2]
+
+        await service.close()
+
+    @pytest.mark.asyncio
+    async def test_close_flushes_messages_and_edits(self, tmp_path):
+        service = create_service(tmp_path, batch_size=100, batch_max_age=60)
+        await service.load_service()
+
+        await service.batch_send_message(create_message(1))
+        await service.batch_send_message_edit(5, 1, "edited")
+
+        await service.close()
+
+        service.bot.message_route.batch_create_message.assert_awaited_once()
+        edit = service.bot.message_route.batch_edit_message
+        edit.assert_awaited_once()
+        assert edit.await_args.args[0][0].content == "edited"
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_is_counted(self, tmp_path):
+        service = create_service(tmp_path)
+        service.bot.message_route.batch_create_message.side_effect = ConnectionError
+
+        await service.batch_send_message(create_message(1))
+        await service.flush()
+
+        assert service.batch_metrics.failed_flushes == 1
+        assert service.batch_metrics.flushes == 0
+        assert len(service.spool) == 1
+
+    @pytest.mark.asyncio
+    async def test_server_error_keeps_batch_spooled(self, tmp_path):
+        service = create_service(tmp_path)
+        service.bot.message_route.batch_create_message.side_effect = response_error(503)
+
+        await service.batch_send_message(create_message(1))
+        await service.flush()
+
+        assert service.batch_metrics.failed_flushes == 1
+        assert len(service.spool) == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_edits_dont_send_creates_again(self, tmp_path):
+        service = create_service(tmp_path)
+        create = service.bot.message_route.batch_create_message
+        service.bot.message_route.batch_edit_message.side_effect = [response_error(500), None]
+
+        await service.batch_send_message(create_message(1))
+        await service.batch_send_message_edit(5, 1, "edited")
+        await service.flush()
+
+        assert len(service.spool) == 1
+
+        await service.flush()
+
+        create.assert_awaited_once()
+        assert service.bot.message_route.batch_edit_message.await_count == 2
+        assert len(service.spool) == 0
+
+    @pytest.mark.asyncio
+    async def test_batch_is_dropped_after_max_attempts(self, tmp_path):
+        service = create_service(tmp_path)
+        service.bot.message_route.batch_create_message.side_effect = response_error(500)
+
+        await service.batch_send_message(create_message(1))
+        for _ in range(SPOOL_MAX_ATTEMPTS - 1):
+            await service.flush()
+
+        assert len(service.spool) == 1
+
+        await service.flush()
+
+        assert len(service.spool) == 0
+        assert service.batch_metrics.abandoned_batches == 1
+
+    @pytest.mark.asyncio
+    async def test_connection_errors_dont_count_as_attempts(self, tmp_path):
+        service = create_service(tmp_path)
+        service.bot.message_route.batch_create_message.side_effect = ConnectionError
+
+        await service.batch_send_message(create_message(1))
+        for _ in range(SPOOL_MAX_ATTEMPTS):
+            await service.flush()
+
+        assert len(service.spool) == 1
+
+    @pytest.mark.asyncio
+    async def test_rejected_batch_is_dropped(self, tmp_path):
+        service = create_service(tmp_path)
+        service.bot.message_route.batch_create_message.side_effect = response_error(400)
+
+        await service.batch_send_message(create_message(1))
+        await service.batch_send_message_edit(5, 1, "edited")
+        await service.flush()
+
+        # The edits are still sent when the creates were rejected
+        service.bot.message_route.batch_edit_message.assert_awaited_once()
+        assert service.batch_metrics.rejected_requests == 1
+        assert len(service.spool) == 0
+
+    @pytest.mark.asyncio
+    async def test_spooled_batches_are_replayed_in_order_on_connect(self, tmp_path):
+        service = create_service(tmp_path)
+        create = service.bot.message_route.batch_create_message
+        create.side_effect = ConnectionError
+
+        await service.batch_send_message(create_message(1))
+        await service.flush()
+        await service.batch_send_message(create_message(2))
+        await service.flush()
+
+        create.side_effect = None
+        create.reset_mock()
+        await service.on_backend_connect()
+
+        # Both spooled batches are combined into a single request
+        create.assert_awaited_once()
+        assert [m.id for m in create.await_args.args[0]] == [1, 2]
+        assert len(service.spool) == 0
+
+    @pytest.mark.asyncio
+    async def test_spooled_batches_survive_restart(self, tmp_path):
+        service = create_service(tmp_path)
+        service.bot.message_route.batch_create_message.side_effect = ConnectionError
+
+        await service.batch_send_message(create_message(1))
+        await service.flush()
+
+        restarted = create_service(tmp_path)
+        await restarted.flush()
+
+        create = restarted.bot.message_route.batch_create_message
+        create.assert_awaited_once()
+        message = create.await_args.args[0][0]
+        assert message.id == 1
+        assert message.content == "message 1"
+
+    @pytest.mark.asyncio
+    async def test_flush_empty_batches_sends_nothing(self, tmp_path):
+        service = create_service(tmp_path)
+
+        await service.flush()
+
+        assert service.bot.message_route.batch_create_message.await_count == 0
+        assert service.bot.message_route.batch_edit_message.await_count == 0
+
+    @pytest.mark.asyncio
+    async def test_repeated_edits_only_send_last_content(self, tmp_path):
+        service = create_service(tmp_path)
+
+        await service.batch_send_message_edit(5, 1, "first")
+        await service.batch_send_message_edit(5, 1, "second")
+        await service.flush()
+
+        edits = service.bot.message_route.batch_edit_message.await_args.args[0]
+        assert [(e.id, e.content) for e in edits] == [(5, "second")]
+        assert service.batch_metrics.edits_coalesced == 1
+
+    @pytest.mark.asyncio
+    async def test_edit_of_pending_message_is_folded_into_message(self, tmp_path):
+        service = create_service(tmp_path)
+
+        await service.batch_send_message(create_message(1))
+        await service.batch_send_message_edit(1, 1, "edited")
+        await service.flush()
+
+        messages = service.bot.message_route.batch_create_message.await_args.args[0]
+        assert messages[0].content == "edited"
+        assert service.bot.message_route.batch_edit_message.await_count == 0
+
+
+def create_record(seq, kind, *items):
+    return SpoolRecord(seq, kind, [dict(id=i, content=c) for i, c in items])
+
+
+class TestCombineSpooled:
+    def test_edits_are_folded_into_spooled_creates(self):
+        records = [
+            create_record(1, SPOOL_CREATE, (1, "a")),
+            create_record(2, SPOOL_EDIT, (1, "b"), (2, "c")),
+        ]
+
+        (request,) = combine_spooled(records, 100)
+
+        assert request.seqs == [1, 2]
+        assert request.creates[1]["content"] == "b"
+        assert list(request.edits) == [2]
+        assert request.coalesced == 1
+
+    def test_folding_does_not_change_spooled_record(self):
+        records = [create_record(1, SPOOL_CREATE, (1, "a")), create_record(2, SPOOL_EDIT, (1, "b"))]
+
+        combine_spooled(records, 100)
+
+        assert records[0].payload[0]["content"] == "a"
+
+    def test_repeated_edits_keep_last(self):
+        records = [
+            create_record(1, SPOOL_EDIT, (1, "a")),
+            create_record(2, SPOOL_EDIT, (1, "b")),
+        ]
+
+        (request,) = combine_spooled(records, 100)
+
+        assert request.edits[1]["content"] == "b"
+        assert request.coalesced == 1
+
+    def test_requests_are_split_at_max_size(self):
+        records = [create_record(i, SPOOL_CREATE, (i, "a"), (i + 100, "b")) for i in range(3)]
+
+        requests = combine_spooled(records, 4)
+
+        assert [r.seqs for r in requests] == [[0, 1], [2]]
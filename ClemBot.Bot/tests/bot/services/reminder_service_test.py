@@ -0,0 +1,73 @@
+import datetime
+from unittest import mock
+
+import pytest
+
+from bot.services.reminder_service import SCHEDULE_REMINDER_TOPIC, ReminderService
+
+
+def create_service(*, primary=True, ipc=True):
+    bot = mock.Mock()
+    bot.is_primary_cluster = primary
+    bot.ipc = mock.Mock(publish=mock.AsyncMock()) if ipc else None
+    bot.scheduler.schedule_at = mock.Mock(side_effect=lambda coro, time: coro.close())
+    bot.reminder_route.create_reminder = mock.AsyncMock(return_value=1)
+    bot.reminder_route.fetch_all_reminders = mock.AsyncMock(return_value=[])
+    return ReminderService(bot=bot)
+
+
+def reminder_time():
+    return datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+
+
+class TestReminderServiceClusters:
+    @pytest.mark.asyncio
+    async def test_primary_cluster_schedules_reminders(self):
+        service = create_service()
+
+        await service.on_set_reminder(2, "url", reminder_time(), "content")
+
+        service.bot.scheduler.schedule_at.assert_called_once()
+        service.bot.ipc.publish.assert_not_awaited()
+        assert 1 in service.reminders
+
+    @pytest.mark.asyncio
+    async def test_other_clusters_forward_reminders(self):
+        service = create_service(primary=False)
+        time = reminder_time()
+
+        await service.on_set_reminder(2, "url", time, "content")
+
+        service.bot.scheduler.schedule_at.assert_not_called()
+        service.bot.ipc.publish.assert_awaited_once_with(
+            SCHEDULE_REMINDER_TOPIC, {"id": 1, "time": time.isoformat()}
+        )
+
+    @pytest.mark.asyncio
+    async def test_forwarded_reminders_are_scheduled_once(self):
+        service = create_service()
+        reminder = {"id": 1, "time": reminder_time().isoformat()}
+
+        await service._on_ipc_schedule_reminder(reminder)
+        await service._on_ipc_schedule_reminder(reminder)
+
+        service.bot.scheduler.schedule_at.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_other_clusters_ignore_forwarded_reminders(self):
+        service = create_service(primary=False)
+
+        await service._on_ipc_schedule_reminder({"id": 1, "time": reminder_time().isoformat()})
+
+        service.bot.scheduler.schedule_at.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_only_primary_cluster_loads_stored_reminders(self):
+        primary, other = create_service(), create_service(primary=False)
+        for service in (primary, other):
+            stored = mock.Mock(id=1, time=reminder_time())
+            service.bot.reminder_route.fetch_all_reminders.return_value = [stored]
+            await service.load_service()
+
+        assert 1 in primary.reminders
+        other.bot.reminder_route.fetch_all_reminders.assert_not_awaited()
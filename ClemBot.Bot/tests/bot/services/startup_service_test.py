@@ -0,0 +1,273 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from bot.messaging.messenger import Messenger
+from bot.services.startup_service import StartupService
+from bot.utils.guild_state import GuildEntity, GuildStateSnapshot, guild_state_hashes
+
+UPLOADS = {
+    GuildEntity.users: "update_guild_users",
+    GuildEntity.roles: "update_guild_roles",
+    GuildEntity.role_mappings: "update_guild_role_user_mappings",
+    GuildEntity.channels: "update_guild_channels",
+    GuildEntity.threads: "update_guild_threads",
+}
+
+
+def create_guild(id=1, members=((1, "one"), (2, "two")), channels=((10, "general"),)):
+    guild = mock.Mock()
+    guild.id = id
+    guild.chunked = True
+    guild.members = [mock.Mock(id=i) for i, _ in members]
+    for member, (_, name) in zip(guild.members, members):
+        member.name = name
+
+    role = mock.Mock(id=100)
+    role.name = "admin"
+    role.permissions.administrator = True
+    guild.roles = [role]
+    for member in guild.members:
+        member.roles = [role] if member.id == 1 else []
+
+    guild.channels = []
+    for channel_id, name in channels:
+        channel = mock.Mock(id=channel_id)
+        channel.name = name
+        guild.channels.append(channel)
+
+    guild.threads = []
+    return guild
+
+
+def create_service(tmp_path, *guilds, concurrency=4, chunk_guilds=True):
+    bot = mock.Mock()
+    bot.messenger = Messenger()
+    bot.guilds = list(guilds)
+    bot.guild_route.get_guild = mock.AsyncMock(return_value=object())
+    bot.guild_route.add_guild = mock.AsyncMock()
+    for name in UPLOADS.values():
+        setattr(bot.guild_route, name, mock.AsyncMock())
+
+    snapshot = GuildStateSnapshot(tmp_path / "guild_state.json")
+    return StartupService(
+        bot=bot, snapshot=snapshot, concurrency=concurrency, chunk_guilds=chunk_guilds
+    )
+
+
+def uploaded(service):
+    route = service.bot.guild_route
+    return {e for e, name in UPLOADS.items() if getattr(route, name).await_count}
+
+
+class TestStartupServiceSync:
+    @pytest.mark.asyncio
+    async def test_everything_is_uploaded_without_snapshot(self, tmp_path):
+        service = create_service(tmp_path, create_guild())
+
+        await service.sync_guilds({})
+
+        assert uploaded(service) == set(GuildEntity)
+        assert service.progress.uploaded == len(GuildEntity)
+        assert service.progress.synced_guilds == 1
+
+    @pytest.mark.asyncio
+    async def test_only_changed_entities_are_uploaded(self, tmp_path):
+        guild = create_guild(channels=((10, "renamed"),))
+        previous = {guild.id: guild_state_hashes(create_guild())}
+        service = create_service(tmp_path, guild)
+
+        await service.sync_guilds(previous)
+
+        assert uploaded(service) == {GuildEntity.channels}
+        assert service.synced == {guild.id: guild_state_hashes(guild)}
+
+    @pytest.mark.asyncio
+    async def test_added_guilds_ignore_snapshot(self, tmp_path):
+        guild = create_guild()
+        service = create_service(tmp_path, guild)
+        service.bot.guild_route.get_guild.return_value = None
+
+        await service.sync_guilds({guild.id: guild_state_hashes(guild)})
+
+        service.bot.guild_route.add_guild.assert_awaited_once()
+        assert uploaded(service) == set(GuildEntity)
+
+    @pytest.mark.asyncio
+    async def test_unchunked_guilds_keep_members(self, tmp_path):
+        guild = create_guild()
+        guild.chunked = False
+        guild.chunk = mock.AsyncMock()
+        previous = {guild.id: {GuildEntity.users: "old", GuildEntity.role_mappings: "old"}}
+        service = create_service(tmp_path, guild, chunk_guilds=False)
+
+        await service.sync_guilds(previous)
+
+        guild.chunk.assert_not_awaited()
+        assert uploaded(service) == {
+            GuildEntity.roles,
+            GuildEntity.channels,
+            GuildEntity.threads,
+        }
+        assert service.synced[guild.id][GuildEntity.users] == "old"
+
+    @pytest.mark.asyncio
+    async def test_added_guilds_are_chunked(self, tmp_path):
+        guild = create_guild()
+        guild.chunked = False
+
+        async def chunk(**kwargs):
+            guild.chunked = True
+
+        guild.chunk = mock.AsyncMock(side_effect=chunk)
+        service = create_service(tmp_path, guild, chunk_guilds=False)
+        service.bot.guild_route.get_guild.return_value = None
+
+        await service.sync_guilds({})
+
+        guild.chunk.assert_awaited_once()
+        assert uploaded(service) == set(GuildEntity)
+
+    @pytest.mark.asyncio
+    async def test_failed_uploads_are_left_out(self, tmp_path):
+        guild = create_guild()
+        service = create_service(tmp_path, guild)
+        service.uploads[GuildEntity.roles] = mock.AsyncMock(side_effect=RuntimeError)
+
+        await service.sync_guilds({})
+
+        assert set(service.synced[guild.id]) == {
+            GuildEntity.users,
+            GuildEntity.channels,
+            GuildEntity.threads,
+        }
+        assert service.progress.failed == 2
+
+    @pytest.mark.asyncio
+    async def test_entities_wait_on_their_dependencies(self, tmp_path):
+        service = create_service(tmp_path, create_guild())
+        order = []
+
+        def upload(entity):
+            async def run(guild):
+                await asyncio.sleep(0.01 if entity is GuildEntity.users else 0)
+                order.append(entity)
+
+            return run
+
+        service.uploads = {e: upload(e) for e in GuildEntity}
+
+        await service.sync_guilds({})
+
+        assert order.index(GuildEntity.role_mappings) > order.index(GuildEntity.users)
+        assert order.index(GuildEntity.role_mappings) > order.index(GuildEntity.roles)
+        assert order.index(GuildEntity.threads) > order.index(GuildEntity.channels)
+
+        # Channels dont wait on the users
+        assert order.index(GuildEntity.channels) < order.index(GuildEntity.users)
+
+    @pytest.mark.asyncio
+    async def test_guilds_sync_with_bounded_concurrency(self, tmp_path):
+        guilds = [create_guild(id=i) for i in range(6)]
+        service = create_service(tmp_path, *guilds, concurrency=2)
+
+        running = set()
+        peak = 0
+
+        async def upload(guild):
+            nonlocal peak
+            running.add(guild.id)
+            peak = max(peak, len(running))
+            await asyncio.sleep(0.01)
+            running.discard(guild.id)
+
+        service.uploads = {e: upload for e in GuildEntity}
+
+        await service.sync_guilds({})
+
+        assert peak == 2
+        assert len(service.synced) == 6
+
+
+class TestStartupServiceSnapshot:
+    @pytest.mark.asyncio
+    async def test_close_keeps_unchanged_entities(self, tmp_path):
+        guild = create_guild()
+        service = create_service(tmp_path, guild)
+        await service.sync_guilds({})
+        service.sync_finished = True
+
+        # Changed while running, the next startup uploads the channels again
+        guild.channels[0].name = "renamed"
+        await service.close()
+
+        snapshot = await service.snapshot.load()
+        assert set(snapshot[guild.id]) == set(GuildEntity) - {GuildEntity.channels}
+
+    @pytest.mark.asyncio
+    async def test_close_skips_snapshot_after_reconnect(self, tmp_path):
+        service = create_service(tmp_path, create_guild())
+        await service.sync_guilds({})
+        service.sync_finished = True
+
+        await service.on_backend_connect()
+        await service.close()
+
+        assert not service.snapshot.path.exists()
+
+    @pytest.mark.asyncio
+    async def test_snapshot_is_cleared_after_sync(self, tmp_path):
+        guild = create_guild()
+        service = create_service(tmp_path, guild)
+        await service.snapshot.save({guild.id: guild_state_hashes(guild)})
+
+        with mock.patch("bot.services.startup_service.bot_secrets") as secrets:
+            secrets.secrets.bot_only = False
+            await service.load_service()
+
+        assert uploaded(service) == set()
+        assert not service.bot.is_starting_up
+        assert not service.snapshot.path.exists()
+
+    @pytest.mark.asyncio
+    async def test_close_during_sync_saves_checkpoint(self, tmp_path):
+        first, second = create_guild(id=1), create_guild(id=2)
+        service = create_service(tmp_path, first, second, concurrency=1)
+        previous = {second.id: {GuildEntity.users: "old"}}
+
+        blocked = asyncio.Event()
+
+        async def block(guild):
+            if guild.id == second.id:
+                await blocked.wait()
+
+        service.uploads[GuildEntity.users] = block
+        sync = asyncio.create_task(service.sync_guilds(previous))
+        await asyncio.sleep(0.01)
+
+        # The first guild is done, the second one still has the hashes of the last sync
+        await service.close()
+        sync.cancel()
+
+        snapshot = await service.snapshot.load()
+        assert snapshot[first.id] == guild_state_hashes(first)
+        assert snapshot[second.id] == {GuildEntity.users: "old"}
+
+    @pytest.mark.asyncio
+    async def test_checkpoint_resumes_sync(self, tmp_path):
+        first, second = create_guild(id=1), create_guild(id=2)
+        service = create_service(tmp_path, first, second)
+        await service.snapshot.save({first.id: guild_state_hashes(first)})
+
+        await service.sync_guilds(await service.snapshot.load())
+
+        assert service.bot.guild_route.update_guild_users.await_args_list == [mock.call(second)]
+
+    @pytest.mark.asyncio
+    async def test_close_skips_snapshot_before_sync(self, tmp_path):
+        service = create_service(tmp_path, create_guild())
+
+        await service.close()
+
+        assert not service.snapshot.path.exists()
@@ -0,0 +1,70 @@
+from unittest import mock
+
+import pytest
+
+from bot.messaging.messenger import Messenger
+from bot.services.user_handling_service import UserHandlingService
+
+
+def create_service():
+    bot = mock.Mock()
+    bot.messenger = Messenger()
+    bot.user_route.update_roles_bulk = mock.AsyncMock(side_effect=lambda g, u, **_: list(u))
+    return UserHandlingService(bot=bot)
+
+
+def create_member(id, *role_ids, guild_id=1):
+    member = mock.Mock()
+    member.id = id
+    member.guild.id = guild_id
+    member.roles = [mock.Mock(id=r) for r in role_ids]
+    return member
+
+
+class TestUserHandlingServiceMemberUpdate:
+    @pytest.mark.asyncio
+    async def test_batch_sends_one_request_per_guild(self):
+        service = create_service()
+
+        await service.on_member_update(
+            [
+                (create_member(1, 10), create_member(1, 10, 11)),
+                (create_member(2, 10), create_member(2, 12)),
+                (create_member(3, 10, guild_id=2), create_member(3, 13, guild_id=2)),
+            ]
+        )
+
+        update = service.bot.user_route.update_roles_bulk
+        assert update.await_count == 2
+        assert update.await_args_list[0].args == (1, {1: [10, 11], 2: [12]})
+        assert update.await_args_list[1].args == (2, {3: [13]})
+
+    @pytest.mark.asyncio
+    async def test_unchanged_roles_are_skipped(self):
+        service = create_service()
+
+        await service.on_member_update([(create_member(1, 10), create_member(1, 10))])
+
+        assert service.bot.user_route.update_roles_bulk.await_count == 0
+
+    @pytest.mark.asyncio
+    async def test_repeated_member_uses_first_before_and_last_after(self):
+        service = create_service()
+
+        # The roles change and change back in the same batch, nothing to update
+        await service.on_member_update(
+            [
+                (create_member(1, 10), create_member(1, 11)),
+                (create_member(1, 11), create_member(1, 10)),
+            ]
+        )
+
+        assert service.bot.user_route.update_roles_bulk.await_count == 0
+
+    @pytest.mark.asyncio
+    async def test_claims_are_invalidated_for_updated_users(self):
+        service = create_service()
+
+        await service.on_member_update([(create_member(1, 10), create_member(1, 11))])
+
+        service.bot.claims_cache.invalidate.assert_called_once_with(1, 1)
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from bot.sharding.ipc import IpcClient, IpcHub
+
+
+async def start_hub(tmp_path, clusters, **kwargs):
+    hub = IpcHub(str(tmp_path / "hub.sock"), **kwargs)
+    await hub.start()
+
+    clients = [IpcClient(hub.path, i, clusters) for i in range(clusters)]
+    for client in clients:
+        await client.connect()
+
+    # Wait until the hub knows every cluster
+    while len(hub.clusters) < clusters:
+        await asyncio.sleep(0.01)
+
+    return hub, clients
+
+
+async def close(hub, clients):
+    for client in clients:
+        await client.close()
+    await hub.close()
+
+
+class TestIpc:
+    @pytest.mark.asyncio
+    async def test_publish_goes_to_other_clusters(self, tmp_path):
+        hub, clients = await start_hub(tmp_path, 3)
+        received = asyncio.Queue()
+
+        for client in clients:
+
+            async def handler(data, cluster_id=client.cluster_id):
+                await received.put((cluster_id, data))
+
+            client.handle("foo", handler)
+
+        await clients[0].publish("foo", {"bar": 1})
+
+        messages = [await asyncio.wait_for(received.get(), 1) for _ in range(2)]
+        assert sorted(messages) == [(1, {"bar": 1}), (2, {"bar": 1})]
+        assert received.empty()
+
+        await close(hub, clients)
+
+    @pytest.mark.asyncio
+    async def test_request_gets_replies_of_every_cluster(self, tmp_path):
+        hub, clients = await start_hub(tmp_path, 3)
+
+        for client in clients:
+
+            async def handler(data, cluster_id=client.cluster_id):
+                return data * cluster_id
+
+            client.handle("foo", handler)
+
+        assert await clients[1].request("foo", 2) == {0: 0, 1: 2, 2: 4}
+
+        await close(hub, clients)
+
+    @pytest.mark.asyncio
+    async def test_clusters_without_handler_reply_none(self, tmp_path):
+        hub, clients = await start_hub(tmp_path, 2)
+
+        async def handler(data):
+            raise ValueError
+
+        clients[0].handle("foo", handler)
+
+        assert await clients[0].request("foo") == {0: None, 1: None}
+
+        await close(hub, clients)
+
+    @pytest.mark.asyncio
+    async def test_request_does_not_wait_for_slow_clusters(self, tmp_path):
+        hub, clients = await start_hub(tmp_path, 2, request_timeout=0.05)
+
+        async def fast(_):
+            return "fast"
+
+        async def slow(_):
+            await asyncio.sleep(1)
+
+        clients[0].handle("foo", fast)
+        clients[1].handle("foo", slow)
+
+        assert await clients[0].request("foo") == {0: "fast"}
+
+        await close(hub, clients)
+
+    @pytest.mark.asyncio
+    async def test_disconnected_cluster_is_not_waited_for(self, tmp_path):
+        hub, clients = await start_hub(tmp_path, 2)
+
+        async def handler(_):
+            return 1
+
+        clients[0].handle("foo", handler)
+        await clients[1].close()
+
+        while len(hub.clusters) > 1:
+            await asyncio.sleep(0.01)
+
+        assert await clients[0].request("foo", timeout=1) == {0: 1}
+
+        await close(hub, clients[:1])
@@ -0,0 +1,70 @@
+import asyncio
+import signal
+
+import pytest
+
+from bot.sharding.ipc import IpcClient
+from bot.sharding.launcher import ShardLauncher, cluster_shard_ids
+
+
+async def fake_cluster(config):
+    """Stands in for a bot cluster, answers stats instead of connecting to the gateway"""
+    ipc = IpcClient(config.ipc_path, config.cluster_id, config.cluster_count)
+
+    async def stats(_):
+        return {"shards": config.shard_ids, "shard_count": config.shard_count}
+
+    ipc.handle("cluster_stats", stats)
+    await ipc.connect()
+
+    closing = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, closing.set)
+    await closing.wait()
+
+    await ipc.close()
+
+
+def run_fake_cluster(config):
+    asyncio.run(fake_cluster(config))
+
+
+class TestClusterShardIds:
+    def test_shards_are_dealt_round_robin(self):
+        assert [cluster_shard_ids(i, 3, 8) for i in range(3)] == [[0, 3, 6], [1, 4, 7], [2, 5]]
+
+    def test_every_shard_is_owned_once(self):
+        shards = [s for i in range(4) for s in cluster_shard_ids(i, 4, 10)]
+        assert sorted(shards) == list(range(10))
+
+
+class TestShardLauncher:
+    def test_more_clusters_than_shards_raises(self):
+        with pytest.raises(ValueError):
+            ShardLauncher(3, 2, run_fake_cluster)
+
+    @pytest.mark.asyncio
+    async def test_clusters_own_their_shards(self, tmp_path):
+        launcher = ShardLauncher(2, 4, run_fake_cluster, ipc_path=str(tmp_path / "hub.sock"))
+        task = asyncio.create_task(launcher.run())
+
+        async def wait_for_clusters():
+            while launcher.hub.clusters != [0, 1]:
+                await asyncio.sleep(0.05)
+
+        await asyncio.wait_for(wait_for_clusters(), 30)
+
+        client = IpcClient(launcher.ipc_path, 2, 3)
+        await client.connect()
+        stats = await client.request("cluster_stats")
+        await client.close()
+
+        assert stats == {
+            0: {"shards": [0, 2], "shard_count": 4},
+            1: {"shards": [1, 3], "shard_count": 4},
+            2: None,
+        }
+
+        launcher.close()
+        await asyncio.wait_for(task, 30)
+
+        assert launcher.hub.clusters == []
@@ -0,0 +1,108 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from bot.utils.guild_state import (
+    MEMBER_ENTITIES,
+    GuildEntity,
+    GuildStateSnapshot,
+    guild_state_hashes,
+    hash_guild_state,
+)
+
+
+def create_guild(id=1, members=((1, "one"), (2, "two")), channels=((10, "general"),)):
+    guild = mock.Mock()
+    guild.id = id
+    guild.chunked = True
+    guild.members = [mock.Mock(id=i) for i, _ in members]
+    for member, (_, name) in zip(guild.members, members):
+        member.name = name
+
+    role = mock.Mock(id=100)
+    role.name = "admin"
+    role.permissions.administrator = True
+    guild.roles = [role]
+    for member in guild.members:
+        member.roles = [role] if member.id == 1 else []
+
+    guild.channels = []
+    for channel_id, name in channels:
+        channel = mock.Mock(id=channel_id)
+        channel.name = name
+        guild.channels.append(channel)
+
+    guild.threads = []
+    return guild
+
+
+class TestGuildStateHashes:
+    def test_hashes_dont_depend_on_order(self):
+        first = guild_state_hashes(create_guild(members=((1, "one"), (2, "two"))))
+        second = guild_state_hashes(create_guild(members=((2, "two"), (1, "one"))))
+
+        assert first == second
+
+    def test_only_changed_entity_hash_changes(self):
+        before = guild_state_hashes(create_guild())
+        after = guild_state_hashes(create_guild(channels=((10, "renamed"),)))
+
+        changed = {e for e in GuildEntity if before[e] != after[e]}
+        assert changed == {GuildEntity.channels}
+
+    def test_only_requested_entities_are_hashed(self):
+        entities = set(GuildEntity) - MEMBER_ENTITIES
+
+        hashes = guild_state_hashes(create_guild(), entities)
+
+        assert set(hashes) == entities
+
+    def test_role_mappings_come_from_member_roles(self):
+        guild = create_guild()
+        before = guild_state_hashes(guild)
+
+        guild.members[1].roles = guild.roles
+
+        after = guild_state_hashes(guild)
+        changed = {e for e in GuildEntity if before[e] != after[e]}
+        assert changed == {GuildEntity.role_mappings}
+
+    @pytest.mark.asyncio
+    async def test_large_guilds_hash_the_same_in_a_thread(self):
+        guild = create_guild()
+
+        with mock.patch("bot.utils.guild_state.LARGE_GUILD_MEMBERS", 1):
+            with mock.patch("asyncio.to_thread", wraps=asyncio.to_thread) as to_thread:
+                hashes = await hash_guild_state(guild)
+
+        to_thread.assert_called_once()
+        assert hashes == guild_state_hashes(guild)
+
+
+class TestGuildStateSnapshot:
+    @pytest.mark.asyncio
+    async def test_snapshot_round_trips(self, tmp_path):
+        snapshot = GuildStateSnapshot(tmp_path / "guild_state.json")
+        hashes = guild_state_hashes(create_guild())
+
+        await snapshot.save({1: hashes})
+
+        assert await snapshot.load() == {1: hashes}
+
+    @pytest.mark.asyncio
+    async def test_clear_forgets_snapshot(self, tmp_path):
+        snapshot = GuildStateSnapshot(tmp_path / "guild_state.json")
+
+        await snapshot.save({1: guild_state_hashes(create_guild())})
+        await snapshot.clear()
+
+        assert not snapshot.path.exists()
+        assert await snapshot.load() == {}
+
+    @pytest.mark.asyncio
+    async def test_unknown_entities_are_dropped(self, tmp_path):
+        snapshot = GuildStateSnapshot(tmp_path / "guild_state.json")
+        snapshot.path.write_text('{"1": {"users": "a", "emotes": "b"}}')
+
+        assert await snapshot.load() == {1: {GuildEntity.users: "a"}}
@@ -0,0 +1,188 @@
+import logging
+import queue
+from unittest import mock
+
+import seqlog
+
+from bot.utils.log_pipeline import (
+    AsyncLogHandler,
+    CappingQueueListener,
+    LazyLogValue,
+    LazyValueFilter,
+    LogPipeline,
+    SamplingFilter,
+    install_lazy_value_filter,
+    lazy_serializer,
+    parse_sample_rates,
+)
+
+
+def create_record(name="bot.test", level=logging.INFO, **props):
+    record = logging.LogRecord(name, level, __file__, 1, "message", (), None)
+    record.log_props = props
+    return record
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class TestLazySerializers:
+    def test_serializer_runs_when_resolved(self):
+        serializer = mock.Mock(return_value={"id": 1})
+        value = lazy_serializer(serializer)("user")
+
+        serializer.assert_not_called()
+        assert isinstance(value, LazyLogValue)
+        assert value.resolve() == {"id": 1}
+        serializer.assert_called_once_with("user")
+
+    def test_nested_values_are_resolved(self):
+        inner = lazy_serializer(lambda: {"id": 2})
+        outer = lazy_serializer(lambda: {"guild": inner()})
+
+        assert outer().resolve() == {"guild": {"id": 2}}
+
+    def test_message_formatting_resolves_values(self):
+        logger = seqlog.StructuredLogger("bot.test")
+        handler = RecordingHandler()
+        logger.addHandler(handler)
+
+        logger.info("User {user}", user=lazy_serializer(lambda: {"id": 3})())
+
+        assert handler.records[0].getMessage() == "User {'id': 3}"
+
+    def test_filter_resolves_values_for_sync_handlers(self):
+        logger = seqlog.StructuredLogger("bot.test")
+        handler = RecordingHandler()
+        install_lazy_value_filter([handler])
+        logger.addHandler(handler)
+
+        logger.info("User {user}", user=lazy_serializer(lambda: {"id": 4})())
+
+        assert handler.records[0].log_props["user"] == {"id": 4}
+
+    def test_filter_resolves_lists_of_values(self):
+        role = lazy_serializer(lambda i: {"id": i})
+        record = create_record(roles=[role(1), role(2)])
+
+        LazyValueFilter().filter(record)
+
+        assert record.log_props["roles"] == [{"id": 1}, {"id": 2}]
+
+    def test_filter_is_installed_once(self):
+        handler = RecordingHandler()
+
+        install_lazy_value_filter([handler])
+        install_lazy_value_filter([handler])
+
+        assert len([f for f in handler.filters if isinstance(f, LazyValueFilter)]) == 1
+
+
+class TestSamplingFilter:
+    def test_parse_sample_rates(self):
+        assert parse_sample_rates(["bot.api=0.1", " bot.services = 0.5"]) == {
+            "bot.api": 0.1,
+            "bot.services": 0.5,
+        }
+
+    def test_closest_parent_rate_is_used(self):
+        sampling = SamplingFilter({"bot": 1.0, "bot.api": 0.0})
+
+        assert sampling.filter(create_record("bot.services.tag_service"))
+        assert not sampling.filter(create_record("bot.api.api_client"))
+        assert sampling.sampled_out == 1
+
+    def test_warnings_are_never_sampled_out(self):
+        sampling = SamplingFilter({"": 0.0})
+
+        assert sampling.filter(create_record(level=logging.WARNING))
+        assert not sampling.filter(create_record(level=logging.INFO))
+
+    def test_records_are_kept_below_rate(self):
+        samples = iter([0.2, 0.7])
+        sampling = SamplingFilter({"bot": 0.5}, sample=lambda: next(samples))
+
+        assert sampling.filter(create_record())
+        assert not sampling.filter(create_record())
+
+
+class TestAsyncLogHandler:
+    def test_sampled_out_records_dont_serialize(self):
+        serializer = mock.Mock(return_value={"id": 1})
+        handler = AsyncLogHandler(10, 100)
+        handler.addFilter(SamplingFilter({"": 0.0}))
+
+        handler.handle(create_record(user=lazy_serializer(serializer)()))
+
+        serializer.assert_not_called()
+        assert handler.queue.empty()
+
+    def test_lazy_values_are_resolved_on_enqueue(self):
+        handler = AsyncLogHandler(10, 100)
+        record = create_record(user=lazy_serializer(lambda: {"id": 1})())
+
+        handler.handle(record)
+
+        queued = handler.queue.get_nowait()
+        assert queued.log_props == {"user": {"id": 1}}
+        assert isinstance(record.log_props["user"], LazyLogValue)
+
+    def test_lists_of_lazy_values_are_resolved_on_enqueue(self):
+        handler = AsyncLogHandler(10, 100)
+        role = lazy_serializer(lambda i: {"id": i})
+
+        handler.handle(create_record(roles=[role(1), role(2)]))
+
+        assert handler.queue.get_nowait().log_props == {"roles": [{"id": 1}, {"id": 2}]}
+
+    def test_records_are_dropped_when_queue_is_full(self):
+        handler = AsyncLogHandler(1, 100)
+
+        handler.handle(create_record())
+        handler.handle(create_record())
+
+        assert handler.queue.qsize() == 1
+        assert handler.dropped == 1
+
+    def test_large_fields_are_capped(self):
+        handler = AsyncLogHandler(10, 10)
+        handler.handle(create_record(content="a" * 11, small="a" * 10))
+
+        queued = handler.queue.get_nowait()
+        assert queued.log_props == {"content": "<11 characters dropped>", "small": "a" * 10}
+
+    def test_listener_caps_large_objects(self):
+        target = RecordingHandler()
+        listener = CappingQueueListener(queue.Queue(), target, max_field_size=10)
+
+        record = listener.prepare(create_record(data={"body": "a" * 20}, count=5))
+
+        assert record.log_props["data"].endswith("characters dropped>")
+        assert record.log_props["count"] == 5
+
+
+class TestLogPipeline:
+    def test_records_are_written_by_original_handlers(self):
+        root = logging.getLogger()
+        original = root.handlers
+        target = RecordingHandler()
+        root.handlers = [target]
+
+        try:
+            pipeline = LogPipeline(queue_size=10)
+            pipeline.start()
+            assert root.handlers == [pipeline.handler]
+
+            logging.getLogger("bot.test").warning("queued")
+            pipeline.stop()
+
+            assert root.handlers == [target]
+            assert [r.getMessage() for r in target.records] == ["queued"]
+        finally:
+            root.handlers = original
@@ -0,0 +1,123 @@
+from unittest import mock
+
+import discord
+import pytest
+
+from bot.utils.memory_profile import (
+    MEMORY_PROFILES,
+    MemoryProfileName,
+    ensure_chunked,
+    get_or_fetch_member,
+    memory_report,
+)
+
+
+def create_guild(id, members=0, chunked=True):
+    guild = mock.Mock()
+    guild.id = id
+    guild.members = [mock.Mock() for _ in range(members)]
+    guild.member_count = members if chunked else members + 10
+    guild.chunked = chunked
+    guild.chunk = mock.AsyncMock()
+    guild.fetch_member = mock.AsyncMock()
+    return guild
+
+
+def create_intents():
+    intents = discord.Intents.default()
+    intents.members = True
+    return intents
+
+
+class TestMemoryProfile:
+    def test_full_profile_caches_every_member(self):
+        options = MEMORY_PROFILES[MemoryProfileName.full].client_options(create_intents())
+
+        assert options["chunk_guilds_at_startup"]
+        assert options["member_cache_flags"].joined
+        assert options["max_messages"] == 50000
+
+    def test_minimal_profile_caches_no_event_members(self):
+        options = MEMORY_PROFILES[MemoryProfileName.minimal].client_options(create_intents())
+
+        assert not options["chunk_guilds_at_startup"]
+        assert options["member_cache_flags"].value == discord.MemberCacheFlags.none().value
+
+    def test_message_cache_size_overrides_profile(self):
+        profile = MEMORY_PROFILES[MemoryProfileName.lean]
+
+        assert profile.client_options(create_intents(), max_messages=5)["max_messages"] == 5
+
+
+class TestEnsureChunked:
+    @pytest.mark.asyncio
+    async def test_chunks_guild_that_is_not_chunked(self):
+        guild = create_guild(1, chunked=False)
+
+        await ensure_chunked(guild)
+
+        guild.chunk.assert_awaited_once_with(cache=True)
+
+    @pytest.mark.asyncio
+    async def test_chunked_guild_is_not_chunked_again(self):
+        guild = create_guild(1)
+
+        await ensure_chunked(guild)
+
+        guild.chunk.assert_not_awaited()
+
+
+class TestGetOrFetchMember:
+    @pytest.mark.asyncio
+    async def test_cached_member_is_not_fetched(self):
+        guild = create_guild(1, chunked=False)
+        member = guild.get_member.return_value
+
+        assert await get_or_fetch_member(guild, 2) is member
+        guild.fetch_member.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_missing_member_of_chunked_guild_is_not_fetched(self):
+        guild = create_guild(1)
+        guild.get_member.return_value = None
+
+        assert await get_or_fetch_member(guild, 2) is None
+        guild.fetch_member.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_missing_member_of_lazy_guild_is_fetched(self):
+        guild = create_guild(1, chunked=False)
+        guild.get_member.return_value = None
+        guild.fetch_member.side_effect = discord.NotFound(mock.Mock(status=404), "")
+
+        assert await get_or_fetch_member(guild, 2) is None
+        guild.fetch_member.assert_awaited_once_with(2)
+
+
+class TestMemoryReport:
+    def test_reports_cached_state(self):
+        guilds = [create_guild(1, members=5), create_guild(2, members=1, chunked=False)]
+        messages = [mock.Mock(guild=guilds[1]) for _ in range(10)]
+
+        bot = mock.Mock()
+        bot.guilds = guilds
+        bot.users = [mock.Mock()] * 6
+        bot.cached_messages = messages
+        bot._connection.max_messages = 100
+
+        report = memory_report(bot, top=1)
+
+        assert report["guilds"] == 2
+        assert report["chunked_guilds"] == 1
+        assert report["members"] == 6
+        assert report["messages"] == 10
+        assert list(report["top_guilds"]) == [2]
+        assert report["top_guilds"][2]["messages"] == 10
+
+    def test_report_leaves_out_peak_rss_without_resource(self):
+        bot = mock.Mock(guilds=[], users=[], cached_messages=[])
+
+        with mock.patch.dict("sys.modules", {"resource": None}):
+            report = memory_report(bot)
+
+        assert report["peak_rss_kb"] is None
@@ -0,0 +1,28 @@
+import socket
+
+import aiohttp
+import pytest
+
+from bot.utils.metrics_server import MetricsServer
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class TestMetricsServer:
+    @pytest.mark.asyncio
+    async def test_serves_rendered_metrics(self):
+        port = free_port()
+        server = MetricsServer(port, lambda: "foo 1\n", host="127.0.0.1")
+        await server.start()
+
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{port}/metrics") as resp:
+                    assert resp.status == 200
+                    assert await resp.text() == "foo 1\n"
+        finally:
+            await server.close()
@@ -0,0 +1,97 @@
+import pytest
+
+from bot.utils.spool import Spool
+
+
+def load_spool(path, **kwargs):
+    spool = Spool(path, **kwargs)
+    spool.load()
+    return spool
+
+
+class TestSpool:
+    def test_append_adds_pending_record(self, tmp_path):
+        spool = load_spool(tmp_path / "spool.ndjson")
+
+        record = spool.append("create", [1])
+
+        assert spool.pending() == [record]
+        assert record.payload == [1]
+
+    def test_ack_removes_pending_record(self, tmp_path):
+        spool = load_spool(tmp_path / "spool.ndjson")
+        first = spool.append("create", [1])
+        second = spool.append("create", [2])
+
+        spool.ack(first.seq)
+
+        assert spool.pending() == [second]
+
+    def test_ack_last_record_truncates_file(self, tmp_path):
+        spool = load_spool(tmp_path / "spool.ndjson")
+        record = spool.append("create", [1])
+
+        spool.ack(record.seq)
+
+        assert spool.size == 0
+        assert (tmp_path / "spool.ndjson").read_text() == ""
+
+    def test_pending_records_are_reloaded_in_order(self, tmp_path):
+        spool = load_spool(tmp_path / "spool.ndjson")
+        first = spool.append("create", [1])
+        spool.append("edit", [2])
+        spool.append("create", [3])
+        spool.ack(first.seq)
+
+        reloaded = load_spool(tmp_path / "spool.ndjson")
+
+        assert [(r.kind, r.payload) for r in reloaded.pending()] == [("edit", [2]), ("create", [3])]
+
+    def test_reloaded_spool_continues_sequence(self, tmp_path):
+        spool = load_spool(tmp_path / "spool.ndjson")
+        record = spool.append("create", [1])
+
+        reloaded = load_spool(tmp_path / "spool.ndjson")
+
+        assert reloaded.append("create", [2]).seq > record.seq
+
+    def test_corrupt_last_line_is_skipped(self, tmp_path):
+        spool = load_spool(tmp_path / "spool.ndjson")
+        spool.append("create", [1])
+
+        with open(tmp_path / "spool.ndjson", "a") as f:
+            f.write('{"seq": 2, "ki')
+
+        assert [r.payload for r in load_spool(tmp_path / "spool.ndjson").pending()] == [[1]]
+
+    def test_compacts_after_enough_acks(self, tmp_path):
+        spool = load_spool(tmp_path / "spool.ndjson", compact_after=2)
+        records = [spool.append("create", [i]) for i in range(3)]
+
+        spool.ack(records[0].seq)
+        size_before = spool.size
+        spool.ack(records[1].seq)
+
+        assert spool.size < size_before
+        assert len((tmp_path / "spool.ndjson").read_text().splitlines()) == 1
+
+    def test_full_spool_drops_oldest_records(self, tmp_path):
+        spool = load_spool(tmp_path / "spool.ndjson", max_bytes=200)
+
+        for i in range(10):
+            spool.append("create", ["x" * 20, i])
+
+        assert spool.size <= 200
+        assert spool.dropped > 0
+        assert spool.pending()[-1].payload == ["x" * 20, 9]
+
+    def test_append_before_load_raises(self, tmp_path):
+        spool = Spool(tmp_path / "spool.ndjson")
+
+        with pytest.raises(RuntimeError):
+            spool.append("create", [1])
+
+    def test_constructor_does_no_file_io(self, tmp_path):
+        Spool(tmp_path / "data" / "spool.ndjson")
+
+        assert not (tmp_path / "data").exists()
@@ -0,0 +1,78 @@
+import asyncio
+import graphlib
+
+import pytest
+
+from bot.utils.task_graph import DependencyFailedError, run_task_graph
+
+
+def recorder(order, key, *, delay=0.0, error=None):
+    async def run():
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        order.append(key)
+
+    return run
+
+
+class TestRunTaskGraph:
+    @pytest.mark.asyncio
+    async def test_tasks_run_after_their_dependencies(self):
+        order = []
+        tasks = {
+            "a": recorder(order, "a", delay=0.02),
+            "b": recorder(order, "b"),
+            "c": recorder(order, "c"),
+        }
+
+        results = await run_task_graph(tasks, {"c": ["a", "b"]})
+
+        assert order == ["b", "a", "c"]
+        assert results == {"a": None, "b": None, "c": None}
+
+    @pytest.mark.asyncio
+    async def test_independent_tasks_run_concurrently(self):
+        running = 0
+        peak = 0
+
+        async def task():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        await run_task_graph({i: task for i in range(3)}, {})
+
+        assert peak == 3
+
+    @pytest.mark.asyncio
+    async def test_dependents_of_failed_tasks_are_skipped(self):
+        order = []
+        error = RuntimeError("failed")
+        tasks = {
+            "a": recorder(order, "a", error=error),
+            "b": recorder(order, "b"),
+            "c": recorder(order, "c"),
+            "d": recorder(order, "d"),
+        }
+
+        results = await run_task_graph(tasks, {"b": ["a"], "c": ["b"]})
+
+        assert results["a"] is error
+        assert isinstance(results["b"], DependencyFailedError)
+        assert isinstance(results["c"], DependencyFailedError)
+        assert order == ["d"]
+
+    @pytest.mark.asyncio
+    async def test_cycles_raise(self):
+        tasks = {"a": recorder([], "a"), "b": recorder([], "b")}
+
+        with pytest.raises(graphlib.CycleError):
+            await run_task_graph(tasks, {"a": ["b"], "b": ["a"]})
+
+    @pytest.mark.asyncio
+    async def test_unknown_dependencies_raise(self):
+        with pytest.raises(ValueError):
+            await run_task_graph({"a": recorder([], "a")}, {"a": ["b"]})
@@ -0,0 +1,108 @@
+from unittest import mock
+
+import pytest
+
+from bot.utils.ttl_cache import TTLCache
+
+
+class TestTTLCache:
+    def test_zero_ttl_throws_value_error(self):
+        with pytest.raises(ValueError):
+            TTLCache(ttl=0, max_size=1)
+
+    def test_zero_max_size_throws_value_error(self):
+        with pytest.raises(ValueError):
+            TTLCache(ttl=1, max_size=0)
+
+    def test_get_missing_key_returns_none(self):
+        cache = TTLCache(ttl=10, max_size=10)
+        assert cache.get(1) is None
+
+    def test_set_then_get_returns_value(self):
+        cache = TTLCache(ttl=10, max_size=10)
+        cache.set(1, ["!"])
+        assert cache.get(1) == ["!"]
+
+    def test_get_expired_key_returns_none(self):
+        cache = TTLCache(ttl=10, max_size=10)
+
+        with mock.patch("bot.utils.ttl_cache.time.monotonic", return_value=0):
+            cache.set(1, ["!"])
+
+        with mock.patch("bot.utils.ttl_cache.time.monotonic", return_value=11):
+            assert cache.get(1) is None
+
+    def test_get_stale_expired_key_returns_value(self):
+        cache = TTLCache(ttl=10, max_size=10)
+
+        with mock.patch("bot.utils.ttl_cache.time.monotonic", return_value=0):
+            cache.set(1, ["!"])
+
+        with mock.patch("bot.utils.ttl_cache.time.monotonic", return_value=11):
+            assert cache.get_stale(1) == ["!"]
+
+    def test_set_over_max_size_evicts_least_recently_used(self):
+        cache = TTLCache(ttl=10, max_size=2)
+        cache.set(1, "a")
+        cache.set(2, "b")
+
+        # Touch the first key so the second one becomes the least recently used
+        cache.get(1)
+        cache.set(3, "c")
+
+        assert len(cache) == 2
+        assert 1 in cache
+        assert 2 not in cache
+        assert 3 in cache
+
+    def test_invalidate_removes_key(self):
+        cache = TTLCache(ttl=10, max_size=10)
+        cache.set(1, "a")
+        cache.invalidate(1)
+
+        assert cache.get_stale(1) is None
+
+    def test_invalidate_missing_key_does_nothing(self):
+        cache = TTLCache(ttl=10, max_size=10)
+        cache.invalidate(1)
+        assert len(cache) == 0
+
+    def test_keys_includes_expired_keys(self):
+        cache = TTLCache(ttl=10, max_size=10)
+
+        with mock.patch("bot.utils.ttl_cache.time.monotonic", return_value=0):
+            cache.set(1, "a")
+            cache.set(2, "b")
+
+        with mock.patch("bot.utils.ttl_cache.time.monotonic", return_value=11):
+            assert cache.keys() == [1, 2]
+
+    def test_invalidate_where_removes_matching_keys(self):
+        cache = TTLCache(ttl=10, max_size=10)
+        cache.set((1, 1), "a")
+        cache.set((1, 2), "b")
+        cache.set((2, 1), "c")
+
+        cache.invalidate_where(lambda k: k[0] == 1)
+
+        assert len(cache) == 1
+        assert (2, 1) in cache
+
+    def test_set_with_ttl_overrides_cache_ttl(self):
+        cache = TTLCache(ttl=10, max_size=10)
+
+        with mock.patch("bot.utils.ttl_cache.time.monotonic", return_value=0):
+            cache.set(1, "a", ttl=100)
+
+        with mock.patch("bot.utils.ttl_cache.time.monotonic", return_value=50):
+            assert cache.get(1) == "a"
+
+    def test_on_evict_is_called_with_evicted_entry(self):
+        evicted = []
+        cache = TTLCache(ttl=10, max_size=1, on_evict=lambda k, v: evicted.append((k, v)))
+
+        cache.set(1, "a")
+        cache.set(2, "b")
+        cache.invalidate(2)
+
+        assert evicted == [(1, "a")]